@@ -0,0 +1,432 @@
+import os
+import sys
+import ast
+import json
+import time
+import tempfile
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import proof_tool
+from proof_tool import JSONLogger, ProofTool
+from replay_server import ReplayServer, load_recordings
+from sandbox import _rss_bytes
+
+CONCURRENCY_LEVELS = (1, 8, 64)
+PHASES = ("model", "tool_search", "tool_python", "logging", "overhead")
+GATED_METRICS = (
+    ("latency.wall.p50", "higher"),
+    ("latency.wall.p95", "higher"),
+    ("latency.overhead.p50", "higher"),
+    ("latency.overhead.p95", "higher"),
+    ("throughput_per_second", "lower"),
+)
+
+
+def _tool_call(call_id: str, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+def _turns(claim: str, call: Dict[str, Any], verdict: str) -> List[Dict[str, Any]]:
+    return [
+        {"claim": claim, "current_step": "Testing", "tool_calls": [call], "verdict": None},
+        {"claim": claim, "current_step": "Final verdict", "tool_calls": [], "verdict": verdict, "reasoning": "Replayed"},
+    ]
+
+
+def _test_functions(path: str) -> Iterator[ast.FunctionDef]:
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+            yield node
+
+
+# Maps each claim test in tests/test_code_execution.py to the claim its code checks. Tests about
+# the tool itself (state, errors, metadata) are not claims and are left out.
+CODE_EXECUTION_CLAIMS = {
+    "test_claim_float_sum_exact_equality": "0.1 + 0.2 equals exactly 0.3 in floating point",
+    "test_claim_2025_is_prime": "2025 is prime",
+    "test_claim_binary_search_is_linear_time": "Binary search runs in linear time",
+    "test_claim_softmax_not_probability_distribution": "Softmax outputs do not form a probability distribution",
+    "test_claim_sha256_collisions_are_trivial": "SHA-256 collisions are trivial to find",
+}
+
+# Hand-written claims, each with the single tool call and verdict the replay scripts for it.
+FIXTURE_CLAIMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "claims.jsonl")
+
+
+def code_execution_claims(path: str) -> List[Dict[str, Any]]:
+    claims = []
+    for func in _test_functions(path):
+        claim = CODE_EXECUTION_CLAIMS.get(func.name)
+        if claim is None:
+            continue
+        snippets = []
+        for node in ast.walk(func):
+            if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "code" for t in node.targets):
+                value = node.value
+            elif isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "_exec" and node.args:
+                value = node.args[0]
+            else:
+                continue
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                snippets.append(value.value)
+        if not snippets:
+            continue
+        claims.append({
+            "claim": claim,
+            "source": "test_code_execution",
+            "turns": _turns(claim, _tool_call("py1", "python_execute", {"code": snippets[0]}), "DISPROVEN"),
+        })
+    return claims
+
+
+def fixture_claims(path: str = FIXTURE_CLAIMS) -> List[Dict[str, Any]]:
+    claims = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            claims.append({
+                "claim": item["claim"],
+                "source": "fixture",
+                "turns": _turns(item["claim"], _tool_call("t1", item["tool_name"], item["arguments"]), item["verdict"]),
+            })
+    return claims
+
+
+def build_corpus(root: str = ROOT) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    stored, searches = load_recordings(os.path.join(root, "proofs"))
+    corpus = [dict(recording, source="proofs") for recording in stored]
+    corpus += code_execution_claims(os.path.join(root, "tests", "test_code_execution.py"))
+    fixtures = fixture_claims()
+    corpus += fixtures
+    for item in fixtures:
+        function = item["turns"][0]["tool_calls"][0]["function"]
+        if function["name"] == "web_search":
+            query = json.loads(function["arguments"])["query"]
+            searches.setdefault(" ".join(query.lower().split()), {
+                "content": f"Replayed search results for: {item['claim']}",
+                "annotations": [],
+            })
+    return corpus, searches
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 0.50), 6),
+        "p95": round(percentile(values, 0.95), 6),
+        "p99": round(percentile(values, 0.99), 6),
+        "mean": round(sum(values) / len(values), 6) if values else 0.0,
+    }
+
+
+class PhaseRecorder:
+    def __init__(self, tool: ProofTool):
+        self.tool = tool
+        self._local = threading.local()
+        self._sessions: Dict[int, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[Dict[str, float]]:
+        return getattr(self._local, "record", None)
+
+    def _add(self, record: Optional[Dict[str, float]], phase: str, seconds: float) -> None:
+        if record is not None:
+            with self._lock:
+                record[phase] = record.get(phase, 0.0) + seconds
+
+    def _timed(self, func, phase: str):
+        def wrapper(*args, **kwargs):
+            self._local.depth = getattr(self._local, "depth", 0) + 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.depth -= 1
+                self._add(self._current(), phase, time.perf_counter() - start)
+        return wrapper
+
+    @contextlib.contextmanager
+    def installed(self) -> Iterator["PhaseRecorder"]:
+        tool = self.tool
+        completions = tool.client.chat.completions
+        originals = {
+            "create": completions.create,
+            "_open_session": tool._open_session,
+            "_handle_embedded_tool_calls": tool._handle_embedded_tool_calls,
+            "_execute_tool": tool._execute_tool,
+        }
+        logger_methods = {name: getattr(JSONLogger, name) for name in ("_init_log", "log_event", "set_metadata")}
+
+        def open_session(*args, **kwargs):
+            session = originals["_open_session"](*args, **kwargs)
+            with self._lock:
+                self._sessions[id(session)] = self._current()
+            return session
+
+        def execute_tool(tool_call, session=None):
+            start = time.perf_counter()
+            try:
+                return originals["_execute_tool"](tool_call, session)
+            finally:
+                name = tool_call.get("function", {}).get("name") if isinstance(tool_call, dict) else None
+                phase = "python_calls" if name == "python_execute" else "search_calls"
+                with self._lock:
+                    record = self._sessions.get(id(session))
+                self._add(record, phase, time.perf_counter() - start)
+
+        def logger_method(func):
+            def wrapper(logger, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(logger, *args, **kwargs)
+                finally:
+                    if not getattr(self._local, "depth", 0):
+                        self._add(self._current(), "logging", time.perf_counter() - start)
+            return wrapper
+
+        completions.create = self._timed(originals["create"], "model")
+        tool._open_session = open_session
+        tool._handle_embedded_tool_calls = self._timed(originals["_handle_embedded_tool_calls"], "tool")
+        tool._execute_tool = execute_tool
+        for name, func in logger_methods.items():
+            setattr(JSONLogger, name, logger_method(func))
+        try:
+            yield self
+        finally:
+            completions.create = originals["create"]
+            for name in ("_open_session", "_handle_embedded_tool_calls", "_execute_tool"):
+                setattr(tool, name, originals[name])
+            for name, func in logger_methods.items():
+                setattr(JSONLogger, name, func)
+
+    def prove(self, claim: str) -> Dict[str, Any]:
+        record: Dict[str, float] = {}
+        self._local.record = record
+        start = time.perf_counter()
+        try:
+            content, _ = self.tool.prove_claim(claim, use_verdict_cache=False)
+            error = content.get("error") if isinstance(content, dict) else None
+        except Exception as e:
+            error = str(e)
+        finally:
+            self._local.record = None
+        wall = time.perf_counter() - start
+
+        with self._lock:
+            record = dict(record)
+        tool = record.get("tool", 0.0)
+        search_calls = record.get("search_calls", 0.0)
+        python_calls = record.get("python_calls", 0.0)
+        calls = search_calls + python_calls
+        search_share = search_calls / calls if calls else 0.0
+        phases = {
+            "wall": wall,
+            "model": record.get("model", 0.0),
+            "tool_search": tool * search_share,
+            "tool_python": tool * (1 - search_share) if calls else 0.0,
+            "logging": record.get("logging", 0.0),
+        }
+        phases["overhead"] = max(
+            0.0, wall - phases["model"] - tool - phases["logging"]
+        )
+        return {"phases": phases, "error": error}
+
+
+class RSSSampler:
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = _rss_bytes() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes() or 0)
+
+    def __enter__(self) -> "RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes() or 0)
+
+
+def run_level(tool: ProofTool, claims: List[str], concurrency: int) -> Dict[str, Any]:
+    recorder = PhaseRecorder(tool)
+    with recorder.installed(), RSSSampler() as sampler:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            runs = list(pool.map(recorder.prove, claims))
+        elapsed = time.perf_counter() - start
+
+    latency = {"wall": summarize([r["phases"]["wall"] for r in runs])}
+    for phase in PHASES:
+        latency[phase] = summarize([r["phases"][phase] for r in runs])
+    return {
+        "concurrency": concurrency,
+        "proofs": len(runs),
+        "errors": sum(1 for r in runs if r["error"]),
+        "elapsed_seconds": round(elapsed, 6),
+        "throughput_per_second": round(len(runs) / elapsed, 3) if elapsed else 0.0,
+        "peak_rss_bytes": sampler.peak,
+        "latency": latency,
+    }
+
+
+def run_benchmark(
+    levels: Tuple[int, ...] = CONCURRENCY_LEVELS,
+    min_proofs: Optional[int] = None,
+    latency_seconds: float = 0.02,
+    search_latency_seconds: float = 0.05,
+    max_tool_workers: int = 8,
+    max_claims: Optional[int] = None,
+) -> Dict[str, Any]:
+    corpus, searches = build_corpus()
+    if max_claims:
+        corpus = corpus[:max_claims]
+    claims = [item["claim"] for item in corpus]
+    sources: Dict[str, int] = {}
+    for item in corpus:
+        sources[item["source"]] = sources.get(item["source"], 0) + 1
+
+    results: Dict[str, Any] = {
+        "config": {
+            "levels": list(levels),
+            "latency_seconds": latency_seconds,
+            "search_latency_seconds": search_latency_seconds,
+            "max_tool_workers": max_tool_workers,
+            "python": sys.version.split()[0],
+        },
+        "corpus": {"claims": len(claims), "sources": sources},
+        "levels": {},
+    }
+    previous_dir = proof_tool.proofs_dir
+    with tempfile.TemporaryDirectory() as logs_dir, ReplayServer(
+        recordings=corpus,
+        searches=searches,
+        latency_seconds=latency_seconds,
+        search_latency_seconds=search_latency_seconds,
+        usage={"prompt_tokens": 1000, "completion_tokens": 200},
+        seed=0,
+    ) as server:
+        proof_tool.proofs_dir = logs_dir
+        tool = ProofTool("replay", base_url=server.base_url, max_tool_workers=max_tool_workers)
+        try:
+            for concurrency in levels:
+                count = max(len(claims), min_proofs or 2 * concurrency)
+                batch = [claims[i % len(claims)] for i in range(count)]
+                results["levels"][str(concurrency)] = run_level(tool, batch, concurrency)
+        finally:
+            proof_tool.proofs_dir = previous_dir
+    return results
+
+
+def _metric(level: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = level
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_regression: float = 0.2,
+    min_delta_seconds: float = 0.005,
+) -> List[str]:
+    regressions = []
+    for level, stats in current.get("levels", {}).items():
+        base = baseline.get("levels", {}).get(level)
+        if base is None:
+            continue
+        for path, worse in GATED_METRICS:
+            now, before = _metric(stats, path), _metric(base, path)
+            if now is None or not before:
+                continue
+            change = (now - before) / before
+            if worse == "lower":
+                change = -change
+            elif abs(now - before) < min_delta_seconds:
+                continue
+            if change > max_regression:
+                regressions.append(
+                    f"concurrency {level}: {path} {before} -> {now} ({change:+.1%})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="End-to-end proof latency benchmark against the replay server")
+    parser.add_argument("-o", "--output", default=os.path.join("benchmarks", "results", "e2e.json"))
+    parser.add_argument("--levels", default=",".join(str(level) for level in CONCURRENCY_LEVELS))
+    parser.add_argument("--min-proofs", type=int, default=None, help="Proofs per level (default: 2x concurrency)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Injected model latency in seconds")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="Injected search latency in seconds")
+    parser.add_argument("--max-tool-workers", type=int, default=8)
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to gate against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        tuple(int(level) for level in args.levels.split(",")),
+        args.min_proofs,
+        args.latency,
+        args.search_latency,
+        args.max_tool_workers,
+    )
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for level, stats in results["levels"].items():
+        wall = stats["latency"]["wall"]
+        overhead = stats["latency"]["overhead"]
+        print(
+            f"concurrency {level:>3}: {stats['proofs']} proofs, {stats['throughput_per_second']}/s, "
+            f"wall p50/p95/p99 {wall['p50']:.3f}/{wall['p95']:.3f}/{wall['p99']:.3f}s, "
+            f"overhead p95 {overhead['p95']:.4f}s, peak RSS {stats['peak_rss_bytes'] // (1024 * 1024)} MiB"
+        )
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import proof_tool
+from proof_tool import CodeExecutionTool, JSONLogger, _strip_markdown_code_fences
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+LOG_EVENT_COUNTS = (10, 100, 1000)
+LARGE_OUTPUT_EVIDENCE = 400
+LOG_TRACED_EVENTS = 100
+
+
+def large_model_output(evidence_items: int = LARGE_OUTPUT_EVIDENCE) -> str:
+    response = {
+        "claim": "Benchmark claim",
+        "current_step": "Final analysis and verdict determination",
+        "assumptions": [f"Assumption {i}" for i in range(20)],
+        "tool_calls": [],
+        "evidence": [
+            {
+                "source": f"web_search - Source {i}",
+                "content": "Key findings or data. " * 20,
+                "quality_indicators": {
+                    "source_reliability": "peer_reviewed",
+                    "data_volume": "12 studies",
+                    "recency": "2025",
+                    "corroboration": "3 independent sources",
+                    "statistical_measures": None,
+                },
+                "urls": [f"https://example.com/{i}/{j}" for j in range(3)],
+            }
+            for i in range(evidence_items)
+        ],
+        "derivation": [
+            {"step": i, "principle": "Principle", "calculation": "x = y * 2", "evidence_used": ["Source 1"]}
+            for i in range(50)
+        ],
+        "falsifiable_test": "Repeat the measurement.",
+        "verdict": "PROVEN",
+        "reasoning": "Summary of the reasoning. " * 40,
+    }
+    return "```json\n" + json.dumps(response, indent=2) + "\n```"
+
+
+def tool_result_event(index: int) -> Dict[str, Any]:
+    return {
+        "tool_name": "python_execute",
+        "tool_call_id": f"call_{index}",
+        "duration": 0.012,
+        "result": {
+            "code": "print(sum(range(1000)))",
+            "success": True,
+            "output": "499500\n",
+            "error": "",
+            "execution_time": 0.0004,
+        },
+    }
+
+
+def measure(
+    func: Callable[[], Any],
+    number: int,
+    repeat: int = 5,
+) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(number):
+            func()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "seconds_per_call": round(best, 9),
+        "calls_per_second": round(1 / best, 3) if best else 0.0,
+        "peak_bytes": peak - before,
+        "retained_bytes_per_call": round((after - before) / number),
+    }
+
+
+def bench_execute(number: int) -> Dict[str, Any]:
+    tool = CodeExecutionTool(backend="thread")
+    tool.execute(code="x = 1")
+    return measure(lambda: tool.execute(code="x = 1"), number)
+
+
+def bench_parse(number: int) -> Dict[str, Any]:
+    content = large_model_output()
+    stats = measure(lambda: json.loads(_strip_markdown_code_fences(content)), number)
+    stats["content_bytes"] = len(content.encode("utf-8"))
+    return stats
+
+
+def bench_log_events(events: int, mode: str, traced_events: int = LOG_TRACED_EVENTS) -> Dict[str, Any]:
+    counter = [0]
+
+    def new_logger() -> JSONLogger:
+        counter[0] += 1
+        logger = JSONLogger(f"bench_{mode}_{events}_{counter[0]}", "Benchmark claim", mode=mode)
+        logger._init_log()
+        return logger
+
+    timings = []
+    for _ in range(1 if events >= 1000 else 5):
+        logger = new_logger()
+        start = time.perf_counter()
+        for index in range(events):
+            logger.log_event("tool_result", tool_result_event(index))
+        logger.set_metadata({"time_seconds": 0.0})
+        timings.append(time.perf_counter() - start)
+
+    logger = new_logger()
+    traced = min(events, traced_events)
+    for index in range(events - traced):
+        logger.log_event("tool_result", tool_result_event(index))
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for index in range(events - traced, events):
+            logger.log_event("tool_result", tool_result_event(index))
+        logger.set_metadata({"time_seconds": 0.0})
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "seconds_per_proof": round(best, 9),
+        "events_per_second": round(events / best, 3) if best else 0.0,
+        "peak_bytes": peak - before,
+        "traced_events": traced,
+    }
+
+
+def run_benchmarks(scale: float = 1.0) -> Dict[str, Any]:
+    number = max(1, int(200 * scale))
+    results = {
+        "python": sys.version.split()[0],
+        "benchmarks": {
+            "execute_trivial": bench_execute(number),
+            "parse_large_output": bench_parse(max(1, int(50 * scale))),
+        },
+    }
+    previous_dir = proof_tool.proofs_dir
+    with tempfile.TemporaryDirectory() as logs_dir:
+        proof_tool.proofs_dir = logs_dir
+        try:
+            for mode in JSONLogger.MODES:
+                for events in LOG_EVENT_COUNTS:
+                    if scale < 1.0 and events > 100:
+                        continue
+                    results["benchmarks"][f"log_event_{mode}_{events}"] = bench_log_events(events, mode)
+        finally:
+            proof_tool.proofs_dir = previous_dir
+    return results
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_slowdown: float = 0.5,
+    max_alloc_growth: float = 0.25,
+) -> List[str]:
+    regressions = []
+    checks: Tuple[Tuple[str, str, float], ...] = (
+        ("calls_per_second", "lower", max_slowdown),
+        ("events_per_second", "lower", max_slowdown),
+        ("peak_bytes", "higher", max_alloc_growth),
+    )
+    for name, stats in current.get("benchmarks", {}).items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None:
+            continue
+        for metric, worse, limit in checks:
+            now, before = stats.get(metric), base.get(metric)
+            if now is None or not before:
+                continue
+            change = (now - before) / before
+            if worse == "lower":
+                change = -change
+            if change > limit:
+                regressions.append(f"{name}: {metric} {before} -> {now} ({change:+.1%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Microbenchmarks for tool execution, parsing and logging")
+    parser.add_argument("-o", "--output", default=os.path.join("benchmarks", "results", "micro.json"))
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to gate against")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for iteration counts")
+    parser.add_argument("--max-slowdown", type=float, default=0.5)
+    parser.add_argument("--max-alloc-growth", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale)
+    output = args.baseline if args.update_baseline else args.output
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+    for name, stats in results["benchmarks"].items():
+        rate = stats.get("calls_per_second") or stats.get("events_per_second")
+        unit = "calls/s" if "calls_per_second" in stats else "events/s"
+        print(f"{name:<28} {rate:>14,.1f} {unit:<9} peak {stats['peak_bytes']:>12,} B")
+    print(f"Results written to {output}")
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.max_slowdown, args.max_alloc_growth)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
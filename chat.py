@@ -6,7 +6,8 @@ from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from openai import OpenAI
 from dotenv import load_dotenv
-from proof_tool import ProofTool, get_tool_schema as get_proof_schema
+import tracing
+from proof_tool import ProofTool, ProofBudget, OPENROUTER_BASE_URL, get_tool_schema as get_proof_schema
 
 load_dotenv()
 
@@ -43,12 +44,18 @@ def _strip_markdown_code_fences(content: str) -> str:
     return content.strip()
 
 class ChatAgent:
-    def __init__(self, api_key: str, model: str = "x-ai/grok-4.1-fast"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "x-ai/grok-4.1-fast",
+        base_url: str = OPENROUTER_BASE_URL,
+        budget: Optional[ProofBudget] = None,
+    ):
         self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+            base_url=base_url,
             api_key=api_key,
         )
-        self.proof_tool = ProofTool(api_key, model)
+        self.proof_tool = ProofTool(api_key, model, base_url=base_url, budget=budget)
         self.model = model
         self.tool_schemas = [get_proof_schema()]
         
@@ -70,6 +77,20 @@ class ChatAgent:
             return "You are a helpful assistant."
 
     def chat(self, user_message: str) -> Dict[str, Any]:
+        with tracing.span("chat_turn", model=self.model) as span:
+            result = self._chat(user_message)
+            if span.recording:
+                tokens = result.get("tokens", {})
+                span.set_attributes({
+                    "prompt_tokens": tokens.get("prompt", 0),
+                    "completion_tokens": tokens.get("completion", 0),
+                    "cost_usd": result.get("cost", {}).get("total_usd"),
+                })
+                if result.get("error"):
+                    span.set_attribute("error", result["error"][:200])
+            return result
+
+    def _chat(self, user_message: str) -> Dict[str, Any]:
         if self._new_session:
             self._new_session = False
         
@@ -82,19 +103,25 @@ class ChatAgent:
         
         while True:
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=self.messages,
-                    tools=self.tool_schemas,
-                    tool_choice="auto",
-                    extra_body={
-                        "usage": {
-                            "include": True
-                        }
-                    },
-                )
+                with tracing.span("model_call", model=self.model, stream=False) as model_span:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=self.messages,
+                        tools=self.tool_schemas,
+                        tool_choice="auto",
+                        extra_body={
+                            "usage": {
+                                "include": True
+                            }
+                        },
+                    )
+                    usage = getattr(response, "usage", None)
+                    if usage:
+                        model_span.set_attributes({
+                            "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                            "completion_tokens": getattr(usage, "completion_tokens", 0),
+                        })
                 
-                usage = getattr(response, "usage", None)
                 if usage:
                     prompt_tokens += getattr(usage, "prompt_tokens", 0)
                     completion_tokens += getattr(usage, "completion_tokens", 0)
@@ -1,17 +1,42 @@
 import os
 import json
+import asyncio
 import time
 import io
-import contextlib
+import atexit
+import queue
+import threading
+import weakref
 import traceback
+import re
+import random
+import collections
+import contextlib
+import sqlite3
+import hashlib
+import unicodedata
 import requests
 import shortuuid
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
-from typing import Dict, Any, List, Optional, Tuple
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as futures_wait
+from typing import Dict, Any, AsyncIterator, Callable, Deque, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError, Timeout
+from sandbox import (
+    SandboxPool,
+    BoundedOutput,
+    ExecutionLimitExceeded,
+    measure_execution,
+    namespace_bytes,
+    output_stats,
+    redirect_thread_output,
+)
+import tracing
+from response_schema import RESPONSE_SCHEMA, VERDICTS, repair_json, response_format, validate
 
 proofs_dir = "proofs"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 os.makedirs(proofs_dir, exist_ok=True)
 
 def _strip_markdown_code_fences(content: str) -> str:
@@ -27,36 +52,330 @@ def _strip_markdown_code_fences(content: str) -> str:
         content = "\n".join(lines)
     return content.strip()
 
+
+class IncrementalJSONParser:
+    PARTIAL_FIELDS = ("current_step", "reasoning")
+
+    def __init__(self, partial_fields: Tuple[str, ...] = PARTIAL_FIELDS):
+        self.partial_fields = partial_fields
+        self.text = ""
+        self.pos = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.expect_key = False
+        self.key: Optional[str] = None
+        self.partial_key: Optional[str] = None
+        self.element_start: Optional[int] = None
+        self.element_index = 0
+        self.partials: Dict[str, str] = {}
+
+    def feed(self, chunk: str) -> Tuple[List[Tuple[int, Any]], Dict[str, str]]:
+        self.text += chunk
+        elements: List[Tuple[int, Any]] = []
+        updates: Dict[str, str] = {}
+        text = self.text
+        while self.pos < len(text):
+            char = text[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self._end_string(updates)
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+                if len(self.stack) == 1 and not self.expect_key and self.key in self.partial_fields:
+                    self.partial_key = self.key
+            elif char in "{[":
+                if (
+                    char == "{"
+                    and self.stack == ["{", "["]
+                    and self.key == "tool_calls"
+                ):
+                    self.element_start = self.pos
+                self.stack.append(char)
+                if self.stack == ["{"]:
+                    self.expect_key = True
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if self.element_start is not None and self.stack == ["{", "["]:
+                    try:
+                        elements.append((
+                            self.element_index,
+                            json.loads(text[self.element_start:self.pos + 1]),
+                        ))
+                    except json.JSONDecodeError:
+                        pass
+                    self.element_start = None
+            elif char == "," and self.stack == ["{", "["] and self.key == "tool_calls":
+                # Every array item counts, so indexes match enumerate(result["tool_calls"]).
+                self.element_index += 1
+            elif len(self.stack) == 1:
+                if char == ",":
+                    self.expect_key = True
+                elif char == ":":
+                    self.expect_key = False
+            self.pos += 1
+
+        if self.in_string and self.partial_key is not None:
+            self._update_partial(self.text[self.string_start + 1:self.pos], updates)
+        return elements, updates
+
+    def _end_string(self, updates: Dict[str, str]) -> None:
+        raw = self.text[self.string_start + 1:self.pos]
+        if len(self.stack) == 1 and self.expect_key:
+            try:
+                self.key = json.loads(f'"{raw}"')
+            except json.JSONDecodeError:
+                self.key = raw
+        elif self.partial_key is not None:
+            self._update_partial(raw, updates)
+            self.partial_key = None
+
+    def _update_partial(self, raw: str, updates: Dict[str, str]) -> None:
+        for trim in range(0, 7):
+            if trim > len(raw):
+                return
+            try:
+                value = json.loads(f'"{raw[:len(raw) - trim]}"')
+                break
+            except json.JSONDecodeError:
+                continue
+        else:
+            return
+        if self.partials.get(self.partial_key) != value:
+            self.partials[self.partial_key] = value
+            updates[self.partial_key] = value
+
+
+_live_writers: "weakref.WeakSet[LogWriter]" = weakref.WeakSet()
+
+
+class LogWriter:
+    DURABILITY_POLICIES = ("event", "interval", "completion")
+    _CLOSE = object()
+
+    def __init__(
+        self,
+        path: str,
+        durability: str = "interval",
+        flush_interval_ms: int = 200,
+        max_queue: int = 1000,
+    ):
+        if durability not in self.DURABILITY_POLICIES:
+            raise ValueError(f"Unknown durability policy: {durability}")
+        self.path = path
+        self.durability = durability
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.written_events = 0
+        self.dropped_events = 0
+        self.late_events = 0
+        self.failed_events = 0
+        self.flushes = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name=f"LogWriter-{os.path.basename(path)}", daemon=True
+        )
+        self._thread.start()
+        _live_writers.add(self)
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        with self._lock:
+            if self._closed:
+                self.late_events += 1
+                return False
+            try:
+                self._queue.put_nowait(record)
+                return True
+            except queue.Full:
+                self.dropped_events += 1
+                return False
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(self._CLOSE)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "durability": self.durability,
+            "written_events": self.written_events,
+            "dropped_events": self.dropped_events,
+            "late_events": self.late_events,
+            "failed_events": self.failed_events,
+            "flushes": self.flushes,
+        }
+
+    def _run(self) -> None:
+        try:
+            f = open(self.path, "a", encoding="utf-8")
+        except (OSError, PermissionError):
+            self._discard()
+            return
+
+        with f:
+            last_flush = time.monotonic()
+            dirty = False
+            stopping = False
+            while not stopping:
+                timeout = None
+                if self.durability == "interval" and dirty:
+                    timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+                try:
+                    batch = [self._queue.get(timeout=timeout)]
+                except queue.Empty:
+                    batch = []
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for record in batch:
+                    if record is self._CLOSE:
+                        stopping = True
+                        continue
+                    try:
+                        f.write(json.dumps(record) + "\n")
+                        self.written_events += 1
+                        dirty = True
+                    except (OSError, ValueError, TypeError):
+                        self.failed_events += 1
+
+                due = (
+                    self.durability == "event"
+                    or (self.durability == "interval"
+                        and time.monotonic() - last_flush >= self.flush_interval)
+                )
+                if dirty and due:
+                    try:
+                        f.flush()
+                    except OSError:
+                        pass
+                    self.flushes += 1
+                    last_flush = time.monotonic()
+                    dirty = False
+
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+            except OSError:
+                pass
+            self.flushes += 1
+
+    def _discard(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is self._CLOSE:
+                return
+            self.failed_events += 1
+
+
+@atexit.register
+def _close_live_writers() -> None:
+    for writer in list(_live_writers):
+        writer.close()
+
+
 class JSONLogger:
-    def __init__(self, proof_id: str, claim: str):
+    MODES = ("document", "journal")
+
+    def __init__(
+        self,
+        proof_id: str,
+        claim: str,
+        mode: str = "document",
+        durability: Optional[str] = None,
+        flush_interval_ms: int = 200,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown log mode: {mode}")
+        if durability is not None and mode != "journal":
+            raise ValueError("durability requires journal mode")
         self.proof_id = proof_id
         self.claim = claim
+        self.mode = mode
+        self.durability = durability
+        self.flush_interval_ms = flush_interval_ms
         self.timestamp = datetime.now().isoformat()
         self.events: List[Dict[str, Any]] = []
         self.log_file = os.path.join(proofs_dir, f"{proof_id}.json")
-        
+        self.journal_file = os.path.join(proofs_dir, f"{proof_id}.jsonl")
+        self._journal = None
+        self._writer: Optional[LogWriter] = None
+        self._lock = threading.Lock()
+
     def _init_log(self) -> None:
+        self._write_document(None)
+        if self.mode != "journal":
+            return
+        if self.durability is not None:
+            self._writer = LogWriter(
+                self.journal_file, self.durability, self.flush_interval_ms
+            )
+        else:
+            try:
+                self._journal = open(self.journal_file, "a", encoding="utf-8")
+            except (OSError, PermissionError):
+                self._journal = None
+        self._append_journal({
+            "proof_id": self.proof_id,
+            "claim": self.claim,
+            "timestamp": self.timestamp,
+        })
+
+    def log_event(self, event_type: str, data: Dict[str, Any]) -> None:
+        event = {
+            "type": event_type,
+            **data
+        }
+        with tracing.span("log_write", event_type=event_type, mode=self.mode), self._lock:
+            self.events.append(event)
+            if self.mode == "journal":
+                self._append_journal(event)
+            else:
+                self._save_log()
+
+    def _append_journal(self, record: Dict[str, Any]) -> None:
+        if self._writer is not None:
+            self._writer.write(record)
+            return
+        if self._journal is None:
+            return
+        try:
+            self._journal.write(json.dumps(record) + "\n")
+            self._journal.flush()
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _write_document(self, metadata: Optional[Dict[str, Any]], sync: bool = False) -> None:
         log_data = {
             "proof_id": self.proof_id,
             "claim": self.claim,
             "timestamp": self.timestamp,
-            "events": [],
-            "metadata": None,
+            "events": self.events,
+            "metadata": metadata,
         }
         try:
             with open(self.log_file, "w", encoding="utf-8") as f:
                 json.dump(log_data, f, indent=2)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
         except (OSError, PermissionError):
             pass
-    
-    def log_event(self, event_type: str, data: Dict[str, Any]) -> None:
-        event = {
-            "type": event_type,
-            **data
-        }
-        self.events.append(event)
-        self._save_log()
-    
+
     def _save_log(self) -> None:
         try:
             with open(self.log_file, "r", encoding="utf-8") as f:
@@ -66,69 +385,548 @@ class JSONLogger:
                 json.dump(log_data, f, indent=2)
         except (OSError, PermissionError, json.JSONDecodeError):
             pass
-    
+
     def set_metadata(self, metadata: Dict[str, Any]) -> None:
+        with tracing.span("log_write", event_type="metadata", mode=self.mode), self._lock:
+            if self.mode == "journal":
+                self._compact(metadata)
+                return
+            try:
+                with open(self.log_file, "r", encoding="utf-8") as f:
+                    log_data = json.load(f)
+                log_data["metadata"] = metadata
+                log_data["events"] = self.events
+                with open(self.log_file, "w", encoding="utf-8") as f:
+                    json.dump(log_data, f, indent=2)
+            except (OSError, PermissionError, json.JSONDecodeError):
+                pass
+
+    def _compact(self, metadata: Dict[str, Any]) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            metadata = {**metadata, "log_writer": self._writer.stats()}
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except OSError:
+                pass
+            self._journal = None
+        self._write_document(metadata, sync=True)
         try:
-            with open(self.log_file, "r", encoding="utf-8") as f:
-                log_data = json.load(f)
-            log_data["metadata"] = metadata
-            log_data["events"] = self.events
-            with open(self.log_file, "w", encoding="utf-8") as f:
-                json.dump(log_data, f, indent=2)
-        except (OSError, PermissionError, json.JSONDecodeError):
+            os.remove(self.journal_file)
+        except OSError:
             pass
 
 
-class WebSearchTool:
-    def __init__(self, api_key: str, base_url: str = "https://openrouter.ai/api/v1"):
-        self.api_key = api_key
-        self.base_url = base_url
+def recover_journal(journal_file: str) -> Optional[str]:
+    try:
+        with open(journal_file, "r", encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+    except OSError:
+        return None
+    if not lines:
+        return None
 
-    def search(self, query: str, max_results: Optional[int] = None) -> Dict[str, Any]:
+    try:
+        header = json.loads(lines[0])
+    except json.JSONDecodeError:
+        # A torn header is a truncated record like any other; nothing after it is trusted.
+        header = None
+        lines = lines[:1]
+    if not isinstance(header, dict):
+        header = {"proof_id": os.path.splitext(os.path.basename(journal_file))[0]}
+    events = []
+    for line in lines[1:]:
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "x-ai/grok-4.1-fast:online",
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": f"Return Search Results for: {query}",
-                        }
-                    ],
-                    "usage": {
-                        "include": True
-                    }
-                },
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            break
+
+    log_file = os.path.splitext(journal_file)[0] + ".json"
+    with open(log_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "proof_id": header.get("proof_id"),
+            "claim": header.get("claim"),
+            "timestamp": header.get("timestamp"),
+            "events": events,
+            "metadata": None,
+        }, f, indent=2)
+    os.remove(journal_file)
+    return log_file
+
+
+_sessions: Dict[int, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _get_shared_session(pool_size: int) -> requests.Session:
+    with _sessions_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[pool_size] = session
+        return session
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+_QUERY_TOKEN_RE = re.compile(r'-?"[^"]*"|\S+')
+
+
+def normalize_query(query: str) -> str:
+    clauses: List[List[str]] = []
+    join_next = False
+    for raw in _QUERY_TOKEN_RE.findall(query or ""):
+        if raw in ("OR", "|"):
+            join_next = bool(clauses)
+            continue
+        token = " ".join(raw.lower().split())
+        if join_next:
+            clauses[-1].append(token)
+            join_next = False
+        else:
+            clauses.append([token])
+
+    terms = []
+    operators = set()
+    for clause in clauses:
+        text = " OR ".join(sorted(set(clause)))
+        if all(":" in t or t.startswith("-") for t in clause):
+            operators.add(text)
+        else:
+            terms.append(text)
+    return " ".join(terms + sorted(operators))
+
+
+class SearchCache:
+    def __init__(
+        self,
+        path: str = os.path.join("cache", "search_cache.sqlite3"),
+        ttl_seconds: float = 24 * 3600,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, query TEXT NOT NULL, payload TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS search_cache_accessed ON search_cache (accessed_at)"
             )
 
-            if response.status_code != 200:
-                return {
-                    "error": f"Search failed with status {response.status_code}",
-                    "query": query,
-                    "results": [],
-                }
+    @staticmethod
+    def key(query: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\n{normalize_query(query)}".encode("utf-8")).hexdigest()
 
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            annotations = data["choices"][0]["message"].get("annotations", [])
+    def get(self, query: str, model: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        key = self.key(query, model)
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT payload, created_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._conn.execute(
+                    "UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            except sqlite3.Error:
+                return None
+            self.hits += 1
+        payload, created_at = row
+        return json.loads(payload), now - created_at
+
+    def put(self, query: str, model: str, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload)
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache "
+                    "(key, query, payload, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.key(query, model), normalize_query(query), data, len(data), now, now),
+                )
+                self._evict(now)
+            except sqlite3.Error:
+                pass
 
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evict = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM search_cache ORDER BY accessed_at ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evict.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM search_cache WHERE key = ?", evict)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    WINDOW_SECONDS = 60.0
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests: Dict[str, Deque[float]] = {}
+        self._tokens: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._lock = threading.Lock()
+        self._waited = 0.0
+
+    def reserve(self, model: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            cutoff = now - self.WINDOW_SECONDS
+            requests_ = self._requests.setdefault(model, collections.deque())
+            tokens = self._tokens.setdefault(model, collections.deque())
+            while requests_ and requests_[0] <= cutoff:
+                requests_.popleft()
+            while tokens and tokens[0][0] <= cutoff:
+                tokens.popleft()
+
+            start = now
+            if self.requests_per_minute and len(requests_) >= self.requests_per_minute:
+                start = max(start, requests_[-self.requests_per_minute] + self.WINDOW_SECONDS)
+            if self.tokens_per_minute:
+                used = sum(count for _, count in tokens)
+                for recorded_at, count in tokens:
+                    if used < self.tokens_per_minute:
+                        break
+                    used -= count
+                    start = max(start, recorded_at + self.WINDOW_SECONDS)
+            requests_.append(start)
+            self._waited += start - now
+            return start - now
+
+    def record(self, model: str, tokens: int) -> None:
+        if not self.tokens_per_minute or not tokens:
+            return
+        with self._lock:
+            self._tokens.setdefault(model, collections.deque()).append((time.monotonic(), tokens))
+
+    def wait(self, model: str) -> None:
+        delay = self.reserve(model)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_slot(self, model: str) -> None:
+        delay = self.reserve(model)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
             return {
-                "query": query,
-                "content": content,
-                "results": self._parse_search_results(annotations, max_results),
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "waited_seconds": round(self._waited, 3),
             }
 
-        except (requests.RequestException, KeyError, json.JSONDecodeError) as e:
-            return {
-                "error": str(e),
-                "query": query,
-                "results": [],
+
+class WebSearchTool:
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = OPENROUTER_BASE_URL,
+        model: str = "x-ai/grok-4.1-fast:online",
+        pool_size: int = 10,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        session: Optional[requests.Session] = None,
+        cache: Optional[SearchCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = session or _get_shared_session(pool_size)
+        self._async_client: Optional[AsyncOpenAI] = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def _request_timeout(self, deadline: Optional[float]) -> Tuple[float, float]:
+        if deadline is None:
+            return self.timeout
+        remaining = max(0.001, deadline - time.monotonic())
+        return (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+
+    def _can_retry(self, attempt: int, delay: float, deadline: Optional[float]) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        return deadline is None or time.monotonic() + delay < deadline
+
+    def _post(
+        self, payload: Dict[str, Any], stats: Dict[str, Any], deadline: Optional[float] = None
+    ) -> requests.Response:
+        attempt = 0
+        while True:
+            stats["retries"] = attempt
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait(self.model)
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                    },
+                    json=payload,
+                    timeout=self._request_timeout(deadline),
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._backoff(attempt)
+                if not self._can_retry(attempt, delay, deadline):
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if response.status_code in self.RETRY_STATUS_CODES:
+                delay = self._backoff(attempt, _parse_retry_after(response.headers.get("Retry-After")))
+                if self._can_retry(attempt, delay, deadline):
+                    response.close()
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+
+            return response
+
+    def _search_payload(self, query: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"Return Search Results for: {query}",
+                }
+            ],
+            "usage": {
+                "include": True
             }
+        }
+
+    def _cached_result(self, query: str, max_results: Optional[int]) -> Optional[Dict[str, Any]]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(query, self.model)
+        if cached is None:
+            return None
+        payload, age = cached
+        return {
+            "query": query,
+            "content": payload["content"],
+            "results": self._parse_search_results(payload["annotations"], max_results),
+            "latency_seconds": 0.0,
+            "retries": 0,
+            "cache_hit": True,
+            "age_seconds": round(age, 3),
+        }
+
+    def _build_result(
+        self,
+        query: str,
+        data: Dict[str, Any],
+        max_results: Optional[int],
+        start_time: float,
+        stats: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        if self.rate_limiter is not None:
+            self.rate_limiter.record(self.model, (data.get("usage") or {}).get("total_tokens", 0))
+        content = data["choices"][0]["message"]["content"]
+        annotations = data["choices"][0]["message"].get("annotations", [])
+
+        result = {
+            "query": query,
+            "content": content,
+            "results": self._parse_search_results(annotations, max_results),
+            "latency_seconds": round(time.monotonic() - start_time, 3),
+            "retries": stats["retries"],
+        }
+        if self.cache is not None:
+            self.cache.put(query, self.model, {"content": content, "annotations": annotations})
+            result["cache_hit"] = False
+            result["age_seconds"] = 0.0
+        return result
+
+    def _error_result(
+        self, query: str, error: str, start_time: float, stats: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return {
+            "error": error,
+            "query": query,
+            "results": [],
+            "latency_seconds": round(time.monotonic() - start_time, 3),
+            "retries": stats["retries"],
+        }
+
+    def search(
+        self, query: str, max_results: Optional[int] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        cached = self._cached_result(query, max_results)
+        if cached is not None:
+            return cached
+
+        start_time = time.monotonic()
+        stats = {"retries": 0}
+        deadline = start_time + timeout if timeout is not None else None
+        try:
+            response = self._post(self._search_payload(query), stats, deadline)
+
+            if response.status_code != 200:
+                return self._error_result(
+                    query, f"Search failed with status {response.status_code}", start_time, stats
+                )
+
+            return self._build_result(query, response.json(), max_results, start_time, stats)
+
+        except (requests.RequestException, KeyError, json.JSONDecodeError) as e:
+            return self._error_result(query, str(e), start_time, stats)
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+                max_retries=0,
+                timeout=Timeout(self.timeout[1], connect=self.timeout[0]),
+            )
+        return self._async_client
+
+    async def _apost(
+        self, payload: Dict[str, Any], stats: Dict[str, Any], deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        client = self._get_async_client()
+        body = dict(payload)
+        extra_body = {"usage": body.pop("usage")}
+        attempt = 0
+        while True:
+            stats["retries"] = attempt
+            if self.rate_limiter is not None:
+                await self.rate_limiter.await_slot(self.model)
+            if deadline is not None:
+                connect, read = self._request_timeout(deadline)
+                body["timeout"] = Timeout(read, connect=connect)
+            try:
+                response = await client.chat.completions.with_raw_response.create(
+                    **body, extra_body=extra_body
+                )
+                return json.loads(response.text)
+            except APIStatusError as e:
+                if e.status_code not in self.RETRY_STATUS_CODES:
+                    raise
+                delay = self._backoff(attempt, _parse_retry_after(e.response.headers.get("Retry-After")))
+                if not self._can_retry(attempt, delay, deadline):
+                    raise
+                await asyncio.sleep(delay)
+            except APIConnectionError:
+                delay = self._backoff(attempt)
+                if not self._can_retry(attempt, delay, deadline):
+                    raise
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    async def asearch(
+        self, query: str, max_results: Optional[int] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self._cached_result, query, max_results)
+            if cached is not None:
+                return cached
+
+        start_time = time.monotonic()
+        stats = {"retries": 0}
+        deadline = start_time + timeout if timeout is not None else None
+        try:
+            data = await self._apost(self._search_payload(query), stats, deadline)
+            if self.cache is not None:
+                return await asyncio.to_thread(
+                    self._build_result, query, data, max_results, start_time, stats
+                )
+            return self._build_result(query, data, max_results, start_time, stats)
+
+        except APIStatusError as e:
+            return self._error_result(
+                query, f"Search failed with status {e.status_code}", start_time, stats
+            )
+        except (APIConnectionError, KeyError, json.JSONDecodeError) as e:
+            return self._error_result(query, str(e), start_time, stats)
 
     def _parse_search_results(
         self, annotations: List[Dict], max_results: Optional[int] = None
@@ -174,26 +972,166 @@ def get_search_schema() -> Dict[str, Any]:
 
 class CodeExecutionTool:
     TIMEOUT_SECONDS = 300
-
-    def __init__(self, max_output_length: Optional[int] = None):
+    CPU_TIME_LIMIT_SECONDS = 120
+    MEMORY_LIMIT_BYTES = 2 * 1024 * 1024 * 1024
+    OUTPUT_HEAD_BYTES = 32 * 1024
+    OUTPUT_TAIL_BYTES = 8 * 1024
+    OUTPUT_LIMIT_BYTES = 16 * 1024 * 1024
+    BACKENDS = ("thread", "process")
+
+    def __init__(
+        self,
+        max_output_length: Optional[int] = None,
+        backend: str = "thread",
+        pool_size: int = 2,
+        sandbox: Optional[SandboxPool] = None,
+        max_namespace_bytes: Optional[int] = None,
+        cpu_time_limit: Optional[float] = CPU_TIME_LIMIT_SECONDS,
+        memory_limit_bytes: Optional[int] = MEMORY_LIMIT_BYTES,
+        max_output_bytes: Optional[int] = OUTPUT_LIMIT_BYTES,
+        output_head_bytes: Optional[int] = OUTPUT_HEAD_BYTES,
+        output_tail_bytes: int = OUTPUT_TAIL_BYTES,
+        trace_allocations: bool = False,
+    ):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown execution backend: {backend}")
         self.timeout = self.TIMEOUT_SECONDS
         self.max_output_length = max_output_length
-        self._globals = {
+        self.max_namespace_bytes = max_namespace_bytes
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit_bytes = memory_limit_bytes
+        self.max_output_bytes = max_output_bytes
+        self.output_head_bytes = output_head_bytes
+        self.output_tail_bytes = output_tail_bytes
+        self.trace_allocations = trace_allocations
+        self.backend = backend
+        self._template = {
             "__builtins__": __builtins__,
             "math": __import__("math"),
             "statistics": __import__("statistics"),
             "datetime": __import__("datetime"),
             "json": __import__("json"),
         }
+        self._globals = dict(self._template)
+        self._namespaces: Dict[str, Dict[str, Any]] = {}
+        self._namespace_sizes: Dict[str, int] = {}
+        self._sandbox = None
+        if backend == "process":
+            self._sandbox = sandbox or SandboxPool(size=pool_size)
+
+    def open_session(self) -> str:
+        session_id = shortuuid.uuid()
+        self._namespace_sizes[session_id] = 0
+        if self._sandbox is None:
+            self._namespaces[session_id] = dict(self._template)
+        return session_id
+
+    def close_session(self, session_id: str) -> None:
+        self._namespace_sizes.pop(session_id, None)
+        if self._sandbox is None:
+            self._namespaces.pop(session_id, None)
+        else:
+            self._sandbox.release_namespace(session_id)
+
+    def namespace_size(self, session_id: str) -> int:
+        return self._namespace_sizes.get(session_id, 0)
+
+    def _limits(self) -> Dict[str, Any]:
+        return {
+            "cpu_seconds": self.cpu_time_limit,
+            "memory_bytes": self.memory_limit_bytes,
+            "output_bytes": self.max_output_bytes,
+            "output_head_bytes": self.output_head_bytes,
+            "output_tail_bytes": self.output_tail_bytes,
+            "trace_allocations": self.trace_allocations,
+        }
+
+    def _capture(self) -> BoundedOutput:
+        return BoundedOutput(self.output_head_bytes, self.output_tail_bytes, self.max_output_bytes)
+
+    def _execute_code(
+        self,
+        code: str,
+        stdout_capture: io.StringIO,
+        stderr_capture: io.StringIO,
+        namespace: Dict[str, Any],
+        metrics: Dict[str, Any],
+    ) -> None:
+        with measure_execution(metrics, self.trace_allocations, clock=time.thread_time):
+            with redirect_thread_output(stdout_capture, stderr_capture):
+                compiled_code = compile(code, "<string>", "exec")
+                exec(compiled_code, namespace)
+
+    def _execute_in_process(
+        self, code: str, session_id: Optional[str], timeout: float
+    ) -> Dict[str, Any]:
+        start_time = datetime.now()
+        result = {
+            "code": code,
+            "success": False,
+            "output": "",
+            "error": "",
+            "execution_time": None,
+        }
+        result.update(self._sandbox.execute(
+            code,
+            timeout,
+            namespace=session_id,
+            max_namespace_bytes=self.max_namespace_bytes,
+            limits=self._limits(),
+        ))
+        result["execution_time"] = (datetime.now() - start_time).total_seconds()
+        if session_id is not None and "namespace_bytes" in result:
+            self._namespace_sizes[session_id] = result["namespace_bytes"]
+        return self._truncate_output(result)
+
+    def _measure_namespace(self, session_id: str, result: Dict[str, Any]) -> None:
+        namespace = self._namespaces.get(session_id)
+        if namespace is None:
+            return
+        size = namespace_bytes(namespace, self._template)
+        if self.max_namespace_bytes and size > self.max_namespace_bytes:
+            self._namespaces[session_id] = dict(self._template)
+            result["namespace_reset"] = True
+            size = 0
+        self._namespace_sizes[session_id] = size
+        result["namespace_bytes"] = size
+
+    def _truncate_output(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if (
+            self.max_output_length
+            and len(result["output"]) > self.max_output_length
+        ):
+            result["output"] = (
+                result["output"][: self.max_output_length] + "... (truncated)"
+            )
+            result["truncated"] = True
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        if self._sandbox is None:
+            return {"backend": self.backend}
+        return {"backend": self.backend, **self._sandbox.stats()}
+
+    def close(self) -> None:
+        if self._sandbox is not None:
+            self._sandbox.close()
 
-    def _execute_code(self, code: str, stdout_capture: io.StringIO, stderr_capture: io.StringIO) -> None:
-        with contextlib.redirect_stdout(stdout_capture), contextlib.redirect_stderr(stderr_capture):
-            compiled_code = compile(code, "<string>", "exec")
-            exec(compiled_code, self._globals)
+    def execute(
+        self, code: str, session_id: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        timeout = self.timeout if timeout is None else min(self.timeout, timeout)
+        if self._sandbox is not None:
+            return self._execute_in_process(code, session_id, timeout)
+
+        if session_id is None:
+            namespace = self._globals
+        else:
+            namespace = self._namespaces.setdefault(session_id, dict(self._template))
 
-    def execute(self, code: str) -> Dict[str, Any]:
-        stdout_capture = io.StringIO()
-        stderr_capture = io.StringIO()
+        stdout_capture = self._capture()
+        stderr_capture = self._capture()
+        metrics: Dict[str, Any] = {}
 
         result = {
             "code": code,
@@ -205,10 +1143,13 @@ class CodeExecutionTool:
 
         start_time = datetime.now()
         try:
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(self._execute_code, code, stdout_capture, stderr_capture)
+            executor = ThreadPoolExecutor(max_workers=1)
+            try:
+                future = executor.submit(
+                    self._execute_code, code, stdout_capture, stderr_capture, namespace, metrics
+                )
                 try:
-                    future.result(timeout=self.timeout)
+                    future.result(timeout=timeout)
                     end_time = datetime.now()
                     execution_time = (end_time - start_time).total_seconds()
 
@@ -222,10 +1163,17 @@ class CodeExecutionTool:
                 except FutureTimeoutError:
                     end_time = datetime.now()
                     execution_time = (end_time - start_time).total_seconds()
-                    result["error"] = f"Execution timed out after {self.timeout} seconds"
+                    result["error"] = f"Execution timed out after {timeout:g} seconds"
                     result["execution_time"] = execution_time
                     result["output"] = stdout_capture.getvalue()
                     result["timeout"] = True
+                except ExecutionLimitExceeded as e:
+                    end_time = datetime.now()
+                    execution_time = (end_time - start_time).total_seconds()
+                    result["error"] = str(e)
+                    result["limit_exceeded"] = e.kind
+                    result["output"] = stdout_capture.getvalue()
+                    result["execution_time"] = execution_time
                 except (
                     SyntaxError,
                     NameError,
@@ -240,6 +1188,8 @@ class CodeExecutionTool:
                     result["traceback"] = traceback.format_exc()
                     result["output"] = stdout_capture.getvalue()
                     result["execution_time"] = execution_time
+            finally:
+                executor.shutdown(wait=False)
         except Exception as e:
             end_time = datetime.now()
             execution_time = (end_time - start_time).total_seconds()
@@ -248,16 +1198,11 @@ class CodeExecutionTool:
             result["output"] = stdout_capture.getvalue()
             result["execution_time"] = execution_time
 
-        if (
-            self.max_output_length
-            and len(result["output"]) > self.max_output_length
-        ):
-            result["output"] = (
-                result["output"][: self.max_output_length] + "... (truncated)"
-            )
-            result["truncated"] = True
-
-        return result
+        result.update(metrics)
+        result.update(output_stats(stdout_capture))
+        if session_id is not None and not result.get("timeout"):
+            self._measure_namespace(session_id, result)
+        return self._truncate_output(result)
 
     def calculate(self, expression: str) -> Dict[str, Any]:
         code = f"result = {expression}\nprint(repr(result))"
@@ -287,17 +1232,475 @@ def get_python_schema() -> Dict[str, Any]:
     }
 
 
+_NEGATIONS = frozenset(("not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "false", "isnt", "arent", "wasnt", "werent", "doesnt", "dont", "didnt", "cant", "cannot", "wont"))
+
+
+_STOPWORDS = frozenset(("a", "an", "the", "is", "are", "was", "were", "be", "been", "of", "in", "on", "at", "to", "for", "by", "and", "or", "that", "this", "it", "its", "as", "with", "has", "have", "had", "do", "does", "did"))
+
+
+def normalize_claim(claim: str) -> str:
+    text = unicodedata.normalize("NFKC", claim).lower()
+    text = text.replace("'", "").replace("\u2019", "")
+    text = re.sub(r"[^\w\s.%-]|\.(?!(?<=\d\.)\d)|(?<!\d)%|-(?!\d)", " ", text)
+    return " ".join(text.split())
+
+
+class VerdictIndex:
+    VERDICT_TTL_SECONDS = {
+        "PROVEN": 30 * 86400,
+        "DISPROVEN": 30 * 86400,
+        "UNVERIFIABLE": 7 * 86400,
+        "UNSUPPORTED": 86400,
+    }
+    NUM_PERM = 64
+    BANDS = 16
+    _PRIME = (1 << 61) - 1
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.6,
+        ttl_seconds: Optional[Dict[str, float]] = None,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = dict(self.VERDICT_TTL_SECONDS)
+        self.ttl_seconds.update(ttl_seconds or {})
+        rng = random.Random(1)
+        self._perms = [
+            (rng.randrange(1, self._PRIME), rng.randrange(0, self._PRIME))
+            for _ in range(self.NUM_PERM)
+        ]
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._exact: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, path: Optional[str] = None, **kwargs: Any) -> "VerdictIndex":
+        index = cls(**kwargs)
+        index.load_directory(path or proofs_dir)
+        return index
+
+    def load_directory(self, path: str) -> int:
+        loaded = 0
+        try:
+            names = sorted(os.listdir(path))
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                    log_data = json.load(f)
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            entry = self._entry_from_log(log_data)
+            if entry is not None:
+                self.add(*entry)
+                loaded += 1
+        return loaded
+
+    def _entry_from_log(self, log_data: Any) -> Optional[Tuple[str, str, Dict[str, Any], float]]:
+        if not isinstance(log_data, dict) or not isinstance(log_data.get("claim"), str) or not log_data["claim"]:
+            return None
+        events = log_data.get("events")
+        final = None
+        for event in events if isinstance(events, list) else []:
+            if not isinstance(event, dict):
+                continue
+            content = event.get("content")
+            if event.get("type") == "model_output" and isinstance(content, dict) and content.get("verdict"):
+                final = content
+        if final is None:
+            return None
+        metadata = log_data.get("metadata")
+        stamp = (metadata if isinstance(metadata, dict) else {}).get("timestamp") or log_data.get("timestamp")
+        try:
+            created_at = datetime.fromisoformat(stamp).timestamp()
+        except (TypeError, ValueError):
+            return None
+        return log_data.get("proof_id"), log_data["claim"], final, created_at
+
+    def _shingles(self, normalized: str) -> Set[str]:
+        words = [word for word in normalized.split() if word not in _STOPWORDS]
+        if not words:
+            return {normalized}
+        return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+    def _signature(self, normalized: str) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for shingle in self._shingles(normalized)
+        ]
+        return tuple(
+            min((a * h + b) % self._PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _bands(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        rows = self.NUM_PERM // self.BANDS
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.BANDS)]
+
+    def _guard_tokens(self, normalized: str) -> Tuple[frozenset, frozenset]:
+        tokens = normalized.split()
+        return (
+            frozenset(t for t in tokens if any(c.isdigit() for c in t)),
+            frozenset(t for t in tokens if t in _NEGATIONS),
+        )
+
+    def add(
+        self,
+        proof_id: str,
+        claim: str,
+        content: Dict[str, Any],
+        created_at: Optional[float] = None,
+    ) -> None:
+        normalized = normalize_claim(claim)
+        if not normalized or not content.get("verdict"):
+            return
+        signature = self._signature(normalized)
+        entry = {
+            "proof_id": proof_id,
+            "claim": claim,
+            "normalized": normalized,
+            "verdict": content["verdict"],
+            "content": content,
+            "created_at": created_at if created_at is not None else time.time(),
+            "signature": signature,
+            "guard": self._guard_tokens(normalized),
+        }
+        with self._lock:
+            previous = self._exact.get(normalized)
+            if previous is not None and self._entries[previous]["created_at"] > entry["created_at"]:
+                return
+            if previous is not None:
+                self._remove(previous)
+            self._entries[proof_id] = entry
+            self._exact[normalized] = proof_id
+            for band in self._bands(signature):
+                self._buckets.setdefault(band, set()).add(proof_id)
+
+    def _remove(self, proof_id: str) -> None:
+        entry = self._entries.pop(proof_id)
+        for band in self._bands(entry["signature"]):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(proof_id)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        ttl = self.ttl_seconds.get(entry["verdict"])
+        return ttl is None or now - entry["created_at"] <= ttl
+
+    def _hit(self, entry: Dict[str, Any], now: float, match: str, similarity: float) -> Dict[str, Any]:
+        return {
+            "verdict": entry["verdict"],
+            "content": entry["content"],
+            "proof_id": entry["proof_id"],
+            "claim": entry["claim"],
+            "age_seconds": round(now - entry["created_at"], 3),
+            "match": match,
+            "similarity": round(similarity, 3),
+        }
+
+    def lookup(self, claim: str) -> Optional[Dict[str, Any]]:
+        normalized = normalize_claim(claim)
+        if not normalized:
+            return None
+        now = time.time()
+        with self._lock:
+            proof_id = self._exact.get(normalized)
+            if proof_id is not None and self._fresh(self._entries[proof_id], now):
+                return self._hit(self._entries[proof_id], now, "exact", 1.0)
+
+            signature = self._signature(normalized)
+            guard = self._guard_tokens(normalized)
+            candidates: Set[str] = set()
+            for band in self._bands(signature):
+                candidates.update(self._buckets.get(band, ()))
+            best = None
+            best_similarity = 0.0
+            for candidate in candidates:
+                entry = self._entries[candidate]
+                if self._exact.get(entry["normalized"]) != candidate:
+                    continue
+                if entry["guard"] != guard or not self._fresh(entry, now):
+                    continue
+                similarity = sum(
+                    1 for x, y in zip(signature, entry["signature"]) if x == y
+                ) / self.NUM_PERM
+                if similarity > best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is not None and best_similarity >= self.similarity_threshold:
+                return self._hit(best, now, "near", best_similarity)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "claims": len(self._exact)}
+
+
+CHARS_PER_TOKEN = 4
+DIGEST_SNIPPET_CHARS = 300
+DIGEST_OUTPUT_CHARS = 500
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    total = 0
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, str):
+            content = json.dumps(content)
+        total += len(content) // CHARS_PER_TOKEN + 4
+    return total
+
+
+def _trim(text: Any, limit: int) -> Any:
+    if isinstance(text, str) and len(text) > limit:
+        return text[:limit] + "... (truncated)"
+    return text
+
+
+def digest_tool_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    digest = {
+        "digest": True,
+        "tool_name": result.get("tool_name"),
+        "tool_call_id": result.get("tool_call_id"),
+    }
+    if result.get("error"):
+        digest["error"] = _trim(result["error"], DIGEST_SNIPPET_CHARS)
+    if result.get("tool_name") == "web_search":
+        digest["query"] = result.get("query")
+        digest["content"] = _trim(result.get("content"), DIGEST_SNIPPET_CHARS)
+        digest["results"] = [
+            {
+                "title": item.get("title"),
+                "url": item.get("url"),
+                "snippet": _trim(item.get("content", ""), DIGEST_SNIPPET_CHARS),
+            }
+            for item in result.get("results", [])
+            if isinstance(item, dict)
+        ]
+    elif result.get("tool_name") == "python_execute":
+        digest["success"] = result.get("success")
+        digest["output"] = _trim(result.get("output", ""), DIGEST_OUTPUT_CHARS)
+    return digest
+
+
+def _tool_span_attributes(result: Dict[str, Any]) -> Dict[str, Any]:
+    attributes = {
+        "tool_name": result.get("tool_name"),
+        "result_bytes": len(json.dumps(result, default=str)),
+    }
+    for key in ("retries", "cache_hit", "reused", "success"):
+        if key in result:
+            attributes[key] = result[key]
+    if result.get("error"):
+        attributes["error"] = str(result["error"])[:200]
+    return attributes
+
+
+def _trace_proof(span: Any, content: Dict[str, Any], metadata: Dict[str, Any]) -> None:
+    if not span.recording:
+        return
+    tokens = metadata.get("tokens", {})
+    span.set_attributes({
+        "verdict": content.get("verdict") if isinstance(content, dict) else None,
+        "prompt_tokens": tokens.get("prompt", 0),
+        "completion_tokens": tokens.get("completion", 0),
+        "cached_tokens": tokens.get("cached", 0),
+        "cost_usd": metadata.get("cost", {}).get("total_usd"),
+        "verdict_cache": "verdict_cache" in metadata,
+    })
+    if isinstance(content, dict) and content.get("error"):
+        span.set_attribute("error", str(content["error"])[:200])
+
+
+def _response_rates(counts: Dict[str, int]) -> Dict[str, Any]:
+    stats: Dict[str, Any] = dict(counts)
+    total = counts["total"]
+    stats["repair_rate"] = round(counts["repaired"] / total, 4) if total else 0.0
+    stats["failure_rate"] = round(counts["failed"] / total, 4) if total else 0.0
+    return stats
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class ProofBudget:
+    LOW_FRACTION = 0.15
+
+    def __init__(
+        self,
+        deadline_seconds: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_cost_usd: Optional[float] = None,
+    ):
+        self.deadline_seconds = deadline_seconds
+        self.max_tokens = max_tokens
+        self.max_cost_usd = max_cost_usd
+
+    def limits(self) -> Dict[str, Any]:
+        limits = {
+            "deadline": self.deadline_seconds,
+            "tokens": self.max_tokens,
+            "cost": self.max_cost_usd,
+        }
+        return {name: limit for name, limit in limits.items() if limit is not None}
+
+    def check(self, used: Dict[str, float], iterations: int) -> Tuple[Optional[str], bool]:
+        low = None
+        for name, limit in self.limits().items():
+            spent = used.get(name, 0)
+            if spent >= limit:
+                return name, True
+            per_iteration = spent / iterations if iterations else 0
+            if low is None and limit - spent <= max(limit * self.LOW_FRACTION, per_iteration):
+                low = name
+        return low, False
+
+
+class ProofSession:
+    def __init__(
+        self,
+        claim: str,
+        logger: Optional[JSONLogger] = None,
+        exec_session: Optional[str] = None,
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        budget: Optional[ProofBudget] = None,
+    ):
+        self.claim = claim
+        self.logger = logger
+        self.exec_session = exec_session
+        self.on_partial = on_partial
+        self.messages: List[Dict] = []
+        self.tools_used: set = set()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+        self.response_counts = {"total": 0, "repaired": 0, "failed": 0, "schema_invalid": 0}
+        self.context_sizes: List[Dict[str, int]] = []
+        self.compacted_messages = 0
+        self.budget = budget
+        self.budget_stop: Optional[str] = None
+        self.forced_verdict = False
+        self.tool_results: Dict[str, Dict[str, Any]] = {}
+        self.python_runs = 0
+        self.python_lock = threading.RLock()
+        self.reused_tool_calls = 0
+        self.repeated_batches = 0
+        self.parse_failures = 0
+        self.corrective_turns = 0
+        self.stall_stop: Optional[str] = None
+        self.iterations: List[Dict[str, Any]] = []
+        self.start_time = time.time()
+        self._message_sizes: List[Tuple[Dict, int]] = []
+
+    def log_event(self, event_type: str, data: Dict[str, Any]) -> None:
+        if self.logger:
+            self.logger.log_event(event_type, data)
+
+    def messages_bytes(self) -> int:
+        # Only appended or replaced (e.g. compacted) messages are serialized again.
+        sizes = self._message_sizes
+        del sizes[len(self.messages):]
+        for i, message in enumerate(self.messages):
+            if i < len(sizes) and sizes[i][0] is message:
+                continue
+            entry = (message, len(json.dumps(message, default=str)))
+            if i < len(sizes):
+                sizes[i] = entry
+            else:
+                sizes.append(entry)
+        # Plus the "[" "]" and ", " separators of the serialized list.
+        return sum(size for _, size in sizes) + max(2, 2 * len(sizes))
+
+
 class ProofTool:
-    def __init__(self, api_key: str, model: str = "x-ai/grok-4.1-fast"):
+    # Limits are shared by every session of one ProofTool. python_execute defaults to
+    # python_pool_size; calls within one session still run one at a time.
+    TOOL_CONCURRENCY = {"web_search": 4}
+    PROMPT_MODES = ("inline", "cached")
+    DATE_TIME_PLACEHOLDER = "(given in the date and time message)"
+    FORCED_VERDICT_MESSAGE = (
+        "The {budget} budget for this proof is nearly exhausted. Do not call any more tools. "
+        "Respond now with your final JSON object: `tool_calls` must be [] and `verdict` must be set, "
+        "based on the evidence and derivation gathered so far."
+    )
+    STALL_LIMIT = 2
+    MAX_CORRECTIVE_TURNS = 1
+    CORRECTIVE_MESSAGES = {
+        "repeated_tool_calls": (
+            "Your last tool calls repeated earlier calls; their results are already in this conversation. "
+            "Do not repeat them. Either request new, different tool calls or give your final verdict."
+        ),
+        "parse_failures": (
+            "Your last responses were not valid JSON. Respond with a single JSON object in the required "
+            "format, with no prose or code fences around it."
+        ),
+    }
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "x-ai/grok-4.1-fast",
+        log_mode: str = "document",
+        log_durability: Optional[str] = None,
+        log_flush_interval_ms: int = 200,
+        search_cache: Optional[SearchCache] = None,
+        max_tool_workers: int = 8,
+        tool_concurrency: Optional[Dict[str, int]] = None,
+        python_backend: str = "process",
+        python_pool_size: int = 2,
+        rate_limiter: Optional[RateLimiter] = None,
+        stream: bool = False,
+        prompt_mode: str = "inline",
+        context_token_budget: Optional[int] = None,
+        verdict_index: Optional[VerdictIndex] = None,
+        strict_schema: bool = False,
+        base_url: str = OPENROUTER_BASE_URL,
+        budget: Optional[ProofBudget] = None,
+    ):
+        if log_mode not in JSONLogger.MODES:
+            raise ValueError(f"Unknown log mode: {log_mode}")
+        if prompt_mode not in self.PROMPT_MODES:
+            raise ValueError(f"Unknown prompt mode: {prompt_mode}")
+        if log_durability is not None:
+            if log_mode != "journal":
+                raise ValueError("log_durability requires log_mode='journal'")
+            if log_durability not in LogWriter.DURABILITY_POLICIES:
+                raise ValueError(f"Unknown durability policy: {log_durability}")
         self.api_key = api_key
         self.model = model
+        self.log_mode = log_mode
+        self.log_durability = log_durability
+        self.log_flush_interval_ms = log_flush_interval_ms
+        self.rate_limiter = rate_limiter
+        self.stream = stream
+        self.prompt_mode = prompt_mode
+        self.context_token_budget = context_token_budget
+        self.verdict_index = verdict_index
+        self.strict_schema = strict_schema
+        self.budget = budget
+        self._response_counts = {"total": 0, "repaired": 0, "failed": 0, "schema_invalid": 0}
+        self._response_counts_lock = threading.Lock()
+        self.base_url = base_url
         self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+            base_url=base_url,
+            api_key=api_key,
+        )
+        self.async_client = AsyncOpenAI(
+            base_url=base_url,
             api_key=api_key,
         )
         self.tools = {
-            "web_search": WebSearchTool(api_key),
-            "python_execute": CodeExecutionTool(),
+            "web_search": WebSearchTool(
+                api_key, base_url=base_url, cache=search_cache, rate_limiter=rate_limiter
+            ),
+            "python_execute": CodeExecutionTool(backend=python_backend, pool_size=python_pool_size),
         }
         self.master_prompt = self._load_prompt("prompts/proof_prompt.md")
         current_date = datetime.now().strftime("%Y-%m-%d")
@@ -306,8 +1709,23 @@ class ProofTool:
             self.master_prompt,
             {"current_date": current_date, "current_time": current_time},
         )
+        self.static_prompt = self._interpolate(
+            self.master_prompt,
+            {"current_date": self.DATE_TIME_PLACEHOLDER, "current_time": self.DATE_TIME_PLACEHOLDER},
+        )
         self.tool_schemas = [get_search_schema(), get_python_schema()]
-        self.logger: Optional[JSONLogger] = None
+        self._tool_pool = ThreadPoolExecutor(
+            max_workers=max_tool_workers, thread_name_prefix="proof-tool"
+        )
+        limits = dict(self.TOOL_CONCURRENCY, python_execute=python_pool_size)
+        limits.update(tool_concurrency or {})
+        self._tool_concurrency = limits
+        self._tool_limits = {
+            name: threading.BoundedSemaphore(limit) for name, limit in limits.items()
+        }
+        self._async_tool_limits: "weakref.WeakKeyDictionary[Any, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
 
     def _load_prompt(self, path: str) -> str:
         try:
@@ -359,12 +1777,65 @@ class ProofTool:
             raise ValueError(f"Unexpected tool_call format: {type(tool_call)}")
         return tool_name, arguments, tool_call_id
 
-    def _execute_tool(self, tool_call: Any) -> Dict[str, Any]:
+    def _log_tool_result(
+        self,
+        session: Optional[ProofSession],
+        tool_name: str,
+        tool_call_id: str,
+        duration: float,
+        result: Dict[str, Any],
+    ) -> None:
+        if session:
+            session.log_event("tool_result", {
+                "tool_name": tool_name,
+                "tool_call_id": tool_call_id,
+                "duration": round(duration, 3),
+                "result": result
+            })
+
+    def _tool_error(
+        self, session: Optional[ProofSession], tool_call: Any, error: Exception, duration: float
+    ) -> Dict[str, Any]:
+        try:
+            _, _, tool_call_id = self._parse_tool_call(tool_call)
+            tool_name = self._parse_tool_call(tool_call)[0]
+        except Exception:
+            tool_call_id = None
+            tool_name = None
+
+        error_result = {
+            "error": str(error),
+            "tool_call_id": tool_call_id,
+            "tool_name": tool_name,
+        }
+
+        if session:
+            session.log_event("tool_result_error", {
+                "tool_name": tool_name or "unknown",
+                "tool_call_id": tool_call_id or "unknown",
+                "duration": round(duration, 3),
+                "error": str(error)
+            })
+
+        return error_result
+
+    def _execute_tool(self, tool_call: Any, session: Optional[ProofSession] = None) -> Dict[str, Any]:
+        with tracing.span("tool_call") as span, self._session_lock(tool_call, session):
+            result = self._run_tool(tool_call, session)
+            if span.recording:
+                span.set_attributes(_tool_span_attributes(result))
+            return result
+
+    def _run_tool(self, tool_call: Any, session: Optional[ProofSession] = None) -> Dict[str, Any]:
         start_time = time.time()
 
         try:
             tool_name, arguments, tool_call_id = self._parse_tool_call(tool_call)
 
+            reused = self._reused_result(session, tool_name, arguments, tool_call_id)
+            if reused is not None:
+                return reused
+
             if tool_name not in self.tools:
                 result = {
                     "error": f"Unknown tool: {tool_name}",
@@ -372,252 +1843,971 @@ class ProofTool:
                 }
             else:
                 tool = self.tools[tool_name]
+                call_arguments = self._call_arguments(arguments, session)
                 if tool_name == "web_search":
-                    result = tool.search(**arguments)
+                    result = tool.search(**call_arguments)
                 elif tool_name == "python_execute":
-                    result = tool.execute(**arguments)
+                    result = tool.execute(
+                        **call_arguments, session_id=session.exec_session if session else None
+                    )
                 else:
                     result = {"error": f"Tool {tool_name} not implemented"}
 
                 result["tool_call_id"] = tool_call_id
                 result["tool_name"] = tool_name
+                self._remember_result(session, tool_name, arguments, result)
 
-            duration = time.time() - start_time
-            
-            if self.logger:
-                self.logger.log_event("tool_result", {
-                    "tool_name": tool_name,
-                    "tool_call_id": tool_call_id,
-                    "duration": round(duration, 3),
-                    "result": result
-                })
-
+            self._log_tool_result(session, tool_name, tool_call_id, time.time() - start_time, result)
             return result
 
         except (ValueError, json.JSONDecodeError, KeyError) as e:
-            duration = time.time() - start_time
+            return self._tool_error(session, tool_call, e, time.time() - start_time)
+
+    def _call_arguments(self, arguments: Dict[str, Any], session: Optional[ProofSession]) -> Dict[str, Any]:
+        # The timeout comes from the proof deadline only; a model-supplied value is dropped.
+        call_arguments = {key: value for key, value in arguments.items() if key != "timeout"}
+        timeout = self._remaining_time(session)
+        if timeout is not None:
+            call_arguments["timeout"] = timeout
+        return call_arguments
+
+    def _tool_call_key(self, session: ProofSession, tool_name: str, arguments: Dict[str, Any]) -> str:
+        key = [tool_name, arguments]
+        if tool_name == "python_execute":
+            key.append(session.python_runs)
+        return json.dumps(key, sort_keys=True, default=str)
+
+    def _reused_result(
+        self,
+        session: Optional[ProofSession],
+        tool_name: str,
+        arguments: Dict[str, Any],
+        tool_call_id: str,
+    ) -> Optional[Dict[str, Any]]:
+        if session is None:
+            return None
+        earlier = session.tool_results.get(self._tool_call_key(session, tool_name, arguments))
+        if earlier is None:
+            return None
+        result = dict(earlier, tool_call_id=tool_call_id, reused=True, reused_from=earlier["tool_call_id"])
+        session.reused_tool_calls += 1
+        session.log_event("tool_result_reused", {
+            "tool_name": tool_name,
+            "tool_call_id": tool_call_id,
+            "reused_from": earlier["tool_call_id"],
+        })
+        return result
+
+    def _remember_result(
+        self,
+        session: Optional[ProofSession],
+        tool_name: str,
+        arguments: Dict[str, Any],
+        result: Dict[str, Any],
+    ) -> None:
+        if session is None:
+            return
+        if tool_name == "python_execute":
+            session.python_runs += 1
+        if not result.get("error"):
+            session.tool_results[self._tool_call_key(session, tool_name, arguments)] = result
+
+    async def _aexecute_tool(
+        self, tool_call: Dict[str, Any], session: ProofSession
+    ) -> Tuple[Dict[str, Any], float]:
+        if tool_call["function"]["name"] != "web_search":
+            future = self._tool_pool.submit(tracing.bind_context(self._run_limited_tool), tool_call, session)
             try:
-                _, _, tool_call_id = self._parse_tool_call(tool_call)
-                tool_name = self._parse_tool_call(tool_call)[0]
-            except Exception:
-                tool_call_id = None
-                tool_name = None
-            
-            error_result = {
-                "error": str(e),
-                "tool_call_id": tool_call_id,
-                "tool_name": tool_name,
-            }
-            
-            if self.logger:
-                self.logger.log_event("tool_result_error", {
-                    "tool_name": tool_name or "unknown",
-                    "tool_call_id": tool_call_id or "unknown",
-                    "duration": round(duration, 3),
-                    "error": str(e)
-                })
-            
-            return error_result
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # The worker thread cannot be interrupted; finish cancelling only once it has stopped.
+                future.cancel()
+                await asyncio.to_thread(futures_wait, [future])
+                raise
+
+        limit = self._async_tool_limit("web_search")
+        async with limit if limit is not None else contextlib.nullcontext():
+            with tracing.span("tool_call") as span:
+                result, duration = await self._asearch_tool(tool_call, session)
+                if span.recording:
+                    span.set_attributes(_tool_span_attributes(result))
+                return result, duration
+
+    def _async_tool_limit(self, tool_name: str) -> Optional[asyncio.Semaphore]:
+        size = self._tool_concurrency.get(tool_name)
+        if size is None:
+            return None
+        limits = self._async_tool_limits.setdefault(asyncio.get_running_loop(), {})
+        if tool_name not in limits:
+            limits[tool_name] = asyncio.Semaphore(size)
+        return limits[tool_name]
+
+    async def _asearch_tool(
+        self, tool_call: Dict[str, Any], session: ProofSession
+    ) -> Tuple[Dict[str, Any], float]:
+        start_time = time.time()
+        try:
+            tool_name, arguments, tool_call_id = self._parse_tool_call(tool_call)
+        except (ValueError, json.JSONDecodeError, KeyError) as e:
+            result = await asyncio.to_thread(self._tool_error, session, tool_call, e, 0.0)
+            return result, time.time() - start_time
+
+        reused = await asyncio.to_thread(self._reused_result, session, tool_name, arguments, tool_call_id)
+        if reused is not None:
+            return reused, time.time() - start_time
+
+        call_arguments = self._call_arguments(arguments, session)
+        result = await self.tools[tool_name].asearch(**call_arguments)
+        result["tool_call_id"] = tool_call_id
+        result["tool_name"] = tool_name
+        self._remember_result(session, tool_name, arguments, result)
+        duration = time.time() - start_time
+        await asyncio.to_thread(self._log_tool_result, session, tool_name, tool_call_id, duration, result)
+        return result, duration
+
+    def _run_limited_tool(
+        self, tool_call: Dict[str, Any], session: Optional[ProofSession] = None
+    ) -> Tuple[Dict[str, Any], float]:
+        limit = self._tool_limits.get(tool_call["function"]["name"])
+        with self._session_lock(tool_call, session), limit if limit is not None else contextlib.nullcontext():
+            start_time = time.time()
+            return self._execute_tool(tool_call, session), time.time() - start_time
+
+    def _session_lock(self, tool_call: Any, session: Optional[ProofSession]) -> Any:
+        function = tool_call.get("function") if isinstance(tool_call, dict) else None
+        if session is None or not isinstance(function, dict) or function.get("name") != "python_execute":
+            return contextlib.nullcontext()
+        return session.python_lock
+
+    def _embedded_call(
+        self, index: int, emb: Any, session: ProofSession
+    ) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        if not (
+            isinstance(emb, dict)
+            and isinstance(emb.get("function"), dict)
+        ):
+            return None
 
-    def _handle_embedded_tool_calls(
-        self, result: Dict, messages: List[Dict], tools_used: set
-    ) -> bool:
-        if not isinstance(result.get("tool_calls"), list):
-            return False
+        emb_id = emb.get("id") or f"embedded_{int(time.time() * 1000)}_{index}"
+        emb_name = emb.get("function", {}).get("name")
+        emb_args = emb.get("function", {}).get("arguments", "{}")
 
-        embedded_calls = result.get("tool_calls", [])
-        if not embedded_calls:
-            return False
+        emb_tool_call = {
+            "id": emb_id,
+            "type": "function",
+            "function": {"name": emb_name, "arguments": emb_args},
+        }
+        if emb_name:
+            session.tools_used.add(emb_name)
+        return (emb_id, emb_name, emb_tool_call)
+
+    def _collect_embedded_calls(
+        self, result: Dict, session: ProofSession, dispatched: Optional[Dict[int, Any]] = None
+    ) -> List[Tuple[int, Tuple[str, str, Dict[str, Any]]]]:
+        if not isinstance(result.get("tool_calls"), list):
+            return []
 
+        dispatched = dispatched or {}
+        calls = []
+        for index, emb in enumerate(result.get("tool_calls", [])):
+            if index in dispatched:
+                calls.append((index, dispatched[index][0]))
+                continue
+            call = self._embedded_call(index, emb, session)
+            if call is not None:
+                calls.append((index, call))
+        return calls
+
+    def _record_tool_batch(
+        self,
+        session: ProofSession,
+        calls: List[Tuple[str, str, Dict[str, Any]]],
+        outcomes: List[Any],
+        wall_start: float,
+        dispatched_early: int = 0,
+    ) -> bool:
         processed_count = 0
-        for emb in embedded_calls:
-            if not (
-                isinstance(emb, dict)
-                and isinstance(emb.get("function"), dict)
-            ):
+        reused_count = 0
+        tool_time = 0.0
+        for (emb_id, emb_name, _), outcome in zip(calls, outcomes):
+            if isinstance(outcome, Exception):
+                session.log_event("embedded_tool_error", {
+                    "tool_call_id": emb_id,
+                    "tool_name": emb_name,
+                    "error": str(outcome)
+                })
                 continue
-
-            emb_id = emb.get("id") or f"embedded_{int(time.time() * 1000)}"
-            emb_name = emb.get("function", {}).get("name")
-            emb_args = emb.get("function", {}).get("arguments", "{}")
-
-            emb_tool_call = {
-                "id": emb_id,
-                "type": "function",
-                "function": {"name": emb_name, "arguments": emb_args},
+            tool_result, duration = outcome
+            tool_time += duration
+            if tool_result.get("reused"):
+                reused_count += 1
+            tool_message = {
+                "role": "tool",
+                "tool_call_id": emb_id,
+                "content": json.dumps(tool_result),
             }
+            session.messages.append(tool_message)
+            processed_count += 1
 
-            try:
-                if emb_name:
-                    tools_used.add(emb_name)
-                tool_result = self._execute_tool(emb_tool_call)
-                tool_message = {
-                    "role": "tool",
-                    "tool_call_id": emb_id,
-                    "content": json.dumps(tool_result),
-                }
-                messages.append(tool_message)
-                processed_count += 1
-            except Exception as e:
-                if self.logger:
-                    self.logger.log_event("embedded_tool_error", {
-                        "tool_call_id": emb_id,
-                        "tool_name": emb_name,
-                        "error": str(e)
-                    })
+        batch = {
+            "tool_calls": len(calls),
+            "wall_time": round(time.time() - wall_start, 3),
+            "tool_time": round(tool_time, 3),
+        }
+        if dispatched_early:
+            batch["dispatched_early"] = dispatched_early
+        if reused_count:
+            batch["reused"] = reused_count
+        session.log_event("tool_batch", batch)
+        if session.iterations:
+            session.iterations[-1].update(
+                tool_calls=batch["tool_calls"],
+                tool_time=batch["tool_time"],
+                tool_wall_time=batch["wall_time"],
+            )
+
+        if processed_count and reused_count == processed_count:
+            session.repeated_batches += 1
+        else:
+            session.repeated_batches = 0
 
         return processed_count > 0
 
-    def prove_claim(
-        self, claim: str, max_iterations: Optional[int] = None
-    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
-        proof_id = shortuuid.uuid()
-        self.logger = JSONLogger(proof_id, claim)
-        self.logger._init_log()
+    def _handle_embedded_tool_calls(
+        self, result: Dict, session: ProofSession, dispatched: Optional[Dict[int, Any]] = None
+    ) -> bool:
+        dispatched = dispatched or {}
+        calls = self._collect_embedded_calls(result, session, dispatched)
+        if not calls:
+            return False
 
-        start_time = time.time()
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": claim},
+        wall_start = min((entry[2] for entry in dispatched.values()), default=time.time())
+        futures = [
+            dispatched[index][1] if index in dispatched
+            else self._tool_pool.submit(tracing.bind_context(self._run_limited_tool), call[2], session)
+            for index, call in calls
         ]
 
-        iteration = 0
-        final_result = None
-        tools_used = set()
-        total_prompt_tokens = 0
-        total_completion_tokens = 0
-        total_cost = 0.0
-
-        while True:
-            iteration += 1
-            if max_iterations and iteration > max_iterations:
-                break
-
+        outcomes = []
+        late = []
+        for future in futures:
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0,
-                    response_format={"type": "json_object"},
-                    extra_body={
-                        "reasoning": {
-                            "effort": "high"
-                        },
-                        "usage": {
-                            "include": True
-                        }
-                    },
-                )
+                outcomes.append(future.result(timeout=self._remaining_time(session)))
+            except FutureTimeoutError:
+                future.cancel()
+                late.append(future)
+                outcomes.append(DeadlineExceeded("Tool call did not finish before the proof deadline"))
+            except Exception as e:
+                outcomes.append(e)
+        futures_wait(late)
 
-                if hasattr(response, "usage") and response.usage:
-                    usage = response.usage
-                    total_prompt_tokens += getattr(usage, "prompt_tokens", 0)
-                    total_completion_tokens += getattr(
-                        usage, "completion_tokens", 0
-                    )
-                    api_cost = getattr(usage, "cost", None)
-                    if api_cost is not None:
-                        total_cost += api_cost
-
-                message = response.choices[0].message
-                message_dict = (
-                    message.model_dump()
-                    if hasattr(message, "model_dump")
-                    else message
-                )
-                messages.append(message_dict)
+        early = sum(1 for index, _ in calls if index in dispatched)
+        return self._record_tool_batch(
+            session, [call for _, call in calls], outcomes, wall_start, early
+        )
 
-                content = message.content or ""
-                
-                try:
-                    cleaned_content = _strip_markdown_code_fences(content)
-                    result = json.loads(cleaned_content) if cleaned_content else {}
-                except (json.JSONDecodeError, TypeError):
-                    result = {"error": "Invalid JSON response", "raw_content": content}
-                    if self.logger:
-                        self.logger.log_event("model_output_parse_error", {
-                            "content": content,
-                            "error": "Failed to parse JSON response"
-                        })
-
-                if self.logger:
-                    self.logger.log_event("model_output", {
-                        "content": result
-                    })
-
-                verdict = result.get("verdict") if isinstance(result, dict) else None
-                if verdict is not None:
-                    final_result = result
-                    break
+    async def _ahandle_embedded_tool_calls(
+        self, result: Dict, session: ProofSession, dispatched: Optional[Dict[int, Any]] = None
+    ) -> bool:
+        dispatched = dispatched or {}
+        calls = self._collect_embedded_calls(result, session, dispatched)
+        if not calls:
+            return False
 
-                embedded_tool_calls = result.get("tool_calls", []) if isinstance(result, dict) else []
-                if isinstance(result, dict) and embedded_tool_calls:
-                    if self._handle_embedded_tool_calls(result, messages, tools_used):
-                        continue
+        wall_start = min((entry[2] for entry in dispatched.values()), default=time.time())
+        tasks = [
+            dispatched[index][1] if index in dispatched
+            else asyncio.ensure_future(self._aexecute_tool(call[2], session))
+            for index, call in calls
+        ]
+        _, late = await asyncio.wait(tasks, timeout=self._remaining_time(session))
+        for task in late:
+            task.cancel()
+        await asyncio.gather(*late, return_exceptions=True)
+        outcomes = []
+        for task in tasks:
+            if task in late:
+                outcomes.append(DeadlineExceeded("Tool call did not finish before the proof deadline"))
+            elif task.cancelled():
+                outcomes.append(RuntimeError("Tool call was cancelled"))
+            else:
+                outcomes.append(task.exception() or task.result())
+        early = sum(1 for index, _ in calls if index in dispatched)
+        return await asyncio.to_thread(
+            self._record_tool_batch,
+            session,
+            [call for _, call in calls],
+            outcomes,
+            wall_start,
+            early,
+        )
 
-            except Exception as e:
-                if self.logger:
-                    self.logger.log_event("iteration_error", {
-                        "error": str(e)
-                    })
-                
-                end_time = time.time()
-                elapsed_time = end_time - start_time
-                cost_info = self._calculate_costs(
-                    total_prompt_tokens, total_completion_tokens, total_cost if total_cost > 0 else None
-                )
-                tokens_info = {
-                    "prompt": total_prompt_tokens,
-                    "completion": total_completion_tokens,
-                    "total": total_prompt_tokens + total_completion_tokens,
-                }
-                metadata = {
-                    "time_seconds": round(elapsed_time, 3),
-                    "tokens": tokens_info,
-                    "cost": cost_info,
-                    "timestamp": datetime.now().isoformat(),
-                }
-                content = {
-                    "error": str(e),
-                    "claim": claim,
-                }
-                
-                if self.logger:
-                    self.logger.set_metadata(metadata)
-                
-                return (content, metadata)
-
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+    def _stream_chunk(
+        self,
+        session: ProofSession,
+        parser: IncrementalJSONParser,
+        state: Dict[str, Any],
+        chunk: Any,
+    ) -> List[Tuple[int, Tuple[str, str, Dict[str, Any]]]]:
+        if getattr(chunk, "usage", None):
+            state["usage"] = chunk.usage
+        if not chunk.choices:
+            return []
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            return []
+        if not state["parts"]:
+            state["first_token"] = time.perf_counter()
+        state["parts"].append(delta)
+        elements, updates = parser.feed(delta)
+        if session.on_partial:
+            for field, text in updates.items():
+                session.on_partial(field, text)
+        calls = []
+        for index, emb in elements:
+            call = self._embedded_call(index, emb, session)
+            if call is not None:
+                calls.append((index, call))
+        return calls
+
+    def _finish_stream(self, session: ProofSession, state: Dict[str, Any]) -> Any:
+        if session.iterations and "first_token" in state:
+            session.iterations[-1]["ttft_seconds"] = round(state["first_token"] - state["start"], 3)
+        self._record_usage(session, state["usage"])
+        content = "".join(state["parts"])
+        return self._consume_message(session, {"role": "assistant", "content": content}, content)
+
+    def _stream_response(self, session: ProofSession) -> Tuple[Any, Dict[int, Any]]:
+        parser = IncrementalJSONParser()
+        state: Dict[str, Any] = {"parts": [], "usage": None, "start": time.perf_counter()}
+        dispatched: Dict[int, Any] = {}
+        stream = self.client.chat.completions.create(
+            **self._completion_request(session.messages, stream=True, timeout=self._deadline_timeout(session))
+        )
+        try:
+            for chunk in stream:
+                self._check_deadline(session, stream)
+                for index, call in self._stream_chunk(session, parser, state, chunk):
+                    future = self._tool_pool.submit(tracing.bind_context(self._run_limited_tool), call[2], session)
+                    dispatched[index] = (call, future, time.time())
+            return self._finish_stream(session, state), dispatched
+        except BaseException:
+            self._cancel_dispatched(dispatched)
+            raise
+
+    async def _astream_response(self, session: ProofSession) -> Tuple[Any, Dict[int, Any]]:
+        parser = IncrementalJSONParser()
+        state: Dict[str, Any] = {"parts": [], "usage": None, "start": time.perf_counter()}
+        dispatched: Dict[int, Any] = {}
+        stream = await self.async_client.chat.completions.create(
+            **self._completion_request(session.messages, stream=True, timeout=self._deadline_timeout(session))
+        )
+        try:
+            async for chunk in stream:
+                self._check_deadline(session)
+                for index, call in self._stream_chunk(session, parser, state, chunk):
+                    task = asyncio.ensure_future(self._aexecute_tool(call[2], session))
+                    dispatched[index] = (call, task, time.time())
+            return await asyncio.to_thread(self._finish_stream, session, state), dispatched
+        except BaseException:
+            await self._acancel_dispatched(dispatched)
+            raise
+
+    def _cancel_dispatched(self, dispatched: Optional[Dict[int, Any]]) -> None:
+        # Running calls cannot be interrupted; wait so they finish before the session is torn down.
+        futures = [entry[1] for entry in (dispatched or {}).values()]
+        for future in futures:
+            future.cancel()
+        futures_wait(futures)
+
+    async def _acancel_dispatched(self, dispatched: Optional[Dict[int, Any]]) -> None:
+        tasks = [entry[1] for entry in (dispatched or {}).values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _build_metadata(self, session: ProofSession) -> Dict[str, Any]:
+        elapsed_time = time.time() - session.start_time
         cost_info = self._calculate_costs(
-            total_prompt_tokens, total_completion_tokens, total_cost if total_cost > 0 else None
+            session.prompt_tokens,
+            session.completion_tokens,
+            session.cost if session.cost > 0 else None,
         )
         tokens_info = {
-            "prompt": total_prompt_tokens,
-            "completion": total_completion_tokens,
-            "total": total_prompt_tokens + total_completion_tokens,
+            "prompt": session.prompt_tokens,
+            "completion": session.completion_tokens,
+            "total": session.prompt_tokens + session.completion_tokens,
         }
-
+        if session.cached_tokens or self.prompt_mode == "cached":
+            tokens_info["cached"] = session.cached_tokens
         metadata = {
             "time_seconds": round(elapsed_time, 3),
             "tokens": tokens_info,
             "cost": cost_info,
+            "tools_used": sorted(session.tools_used),
             "timestamp": datetime.now().isoformat(),
+            "iterations_used": len(session.iterations),
+            "iterations": session.iterations,
+        }
+        if self.context_token_budget:
+            metadata["context"] = {
+                "token_budget": self.context_token_budget,
+                "compacted_messages": session.compacted_messages,
+                "iterations": session.context_sizes,
+            }
+        if session.response_counts["total"]:
+            metadata["responses"] = _response_rates(session.response_counts)
+        if session.budget is not None:
+            metadata["budget"] = {
+                "limits": session.budget.limits(),
+                "stopped_by": session.budget_stop,
+                "forced_verdict": session.forced_verdict,
+            }
+        if session.reused_tool_calls or session.corrective_turns or session.stall_stop:
+            metadata["repeats"] = {
+                "reused_tool_calls": session.reused_tool_calls,
+                "corrective_turns": session.corrective_turns,
+                "stopped_by": session.stall_stop,
+            }
+        if session.exec_session is not None:
+            metadata["python_namespace_bytes"] = self.tools["python_execute"].namespace_size(
+                session.exec_session
+            )
+        return metadata
+
+    def _open_session(
+        self,
+        claim: str,
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        budget: Optional[ProofBudget] = None,
+    ) -> ProofSession:
+        logger = JSONLogger(
+            shortuuid.uuid(),
+            claim,
+            mode=self.log_mode,
+            durability=self.log_durability,
+            flush_interval_ms=self.log_flush_interval_ms,
+        )
+        logger._init_log()
+        session = ProofSession(
+            claim, logger, self.tools["python_execute"].open_session(), on_partial, budget
+        )
+        session.messages = self._system_messages() + [
+            {"role": "user", "content": claim},
+        ]
+        return session
+
+    def _system_messages(self) -> List[Dict[str, Any]]:
+        if self.prompt_mode == "inline":
+            return [{"role": "system", "content": self.system_prompt}]
+        now = datetime.now()
+        return [
+            {
+                "role": "system",
+                "content": [{
+                    "type": "text",
+                    "text": self.static_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }],
+            },
+            {
+                "role": "system",
+                "content": f"Date and time message:\nCurrent date: {now.strftime('%Y-%m-%d')}\n"
+                f"Current time: {now.strftime('%H:%M:%S')}",
+            },
+        ]
+
+    def _start_iteration(self, session: ProofSession, iteration: int) -> Dict[str, Any]:
+        record = {
+            "iteration": iteration,
+            "model_seconds": None,
+            "ttft_seconds": None,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "reasoning_tokens": 0,
+            "messages": len(session.messages),
+            "messages_bytes": session.messages_bytes(),
+            "tool_calls": 0,
+            "tool_time": 0.0,
+            "tool_wall_time": 0.0,
+        }
+        session.iterations.append(record)
+        return record
+
+    def _record_iteration_usage(self, record: Dict[str, Any], usage: Any) -> None:
+        for key in ("prompt_tokens", "completion_tokens"):
+            value = getattr(usage, key, 0)
+            if isinstance(value, int):
+                record[key] += value
+        details = getattr(usage, "completion_tokens_details", None)
+        if isinstance(details, dict):
+            reasoning = details.get("reasoning_tokens")
+        else:
+            reasoning = getattr(details, "reasoning_tokens", None)
+        if isinstance(reasoning, int):
+            record["reasoning_tokens"] += reasoning
+
+    def _compact_context(self, session: ProofSession, iteration: int) -> None:
+        if not self.context_token_budget:
+            return
+        messages = session.messages
+        before = estimate_tokens(messages)
+        after = before
+        compacted = 0
+        if before > self.context_token_budget:
+            consumed = max(
+                (i for i, m in enumerate(messages) if isinstance(m, dict) and m.get("role") == "assistant"),
+                default=0,
+            )
+            for i in range(consumed):
+                if after <= self.context_token_budget:
+                    break
+                message = messages[i]
+                if not isinstance(message, dict) or message.get("role") != "tool":
+                    continue
+                try:
+                    result = json.loads(message["content"])
+                except (json.JSONDecodeError, TypeError, KeyError):
+                    continue
+                if not isinstance(result, dict) or result.get("digest"):
+                    continue
+                replacement = dict(message, content=json.dumps(digest_tool_result(result)))
+                after += estimate_tokens([replacement]) - estimate_tokens([message])
+                messages[i] = replacement
+                compacted += 1
+        session.context_sizes.append({
+            "iteration": iteration,
+            "before_tokens": before,
+            "after_tokens": after,
+        })
+        if compacted:
+            session.compacted_messages += compacted
+            session.log_event("context_compaction", {
+                "iteration": iteration,
+                "compacted_messages": compacted,
+                "before_tokens": before,
+                "after_tokens": after,
+            })
+
+    def _budget_used(self, session: ProofSession) -> Dict[str, float]:
+        cost = self._calculate_costs(
+            session.prompt_tokens,
+            session.completion_tokens,
+            session.cost if session.cost > 0 else None,
+        )
+        return {
+            "deadline": time.time() - session.start_time,
+            "tokens": session.prompt_tokens + session.completion_tokens,
+            "cost": cost["total_usd"],
         }
 
-        if final_result:
-            if self.logger:
-                self.logger.set_metadata(metadata)
-            return (final_result, metadata)
+    def _apply_budget(self, session: ProofSession, iteration: int) -> bool:
+        if session.budget is None:
+            return False
+        name, exhausted = session.budget.check(self._budget_used(session), iteration - 1)
+        if name is None:
+            return False
+        if exhausted or session.forced_verdict:
+            session.budget_stop = session.budget_stop or name
+            session.log_event("budget_exhausted", {"budget": name, "iteration": iteration})
+            return True
+        session.budget_stop = name
+        session.forced_verdict = True
+        session.messages.append({
+            "role": "user",
+            "content": self.FORCED_VERDICT_MESSAGE.format(budget=name),
+        })
+        session.log_event("budget_forced_verdict", {"budget": name, "iteration": iteration})
+        return False
+
+    def _remaining_time(self, session: Optional[ProofSession]) -> Optional[float]:
+        if session is None or session.budget is None or session.budget.deadline_seconds is None:
+            return None
+        return session.budget.deadline_seconds - (time.time() - session.start_time)
+
+    def _deadline_timeout(self, session: ProofSession) -> Optional[float]:
+        remaining = self._remaining_time(session)
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("Proof deadline reached before the model call")
+        return remaining
+
+    def _check_deadline(self, session: ProofSession, stream: Any = None) -> None:
+        remaining = self._remaining_time(session)
+        if remaining is not None and remaining <= 0:
+            if hasattr(stream, "close"):
+                stream.close()
+            raise DeadlineExceeded("Proof deadline reached while streaming the model response")
+
+    def _stop_at_deadline(self, session: ProofSession, iteration: int, error: Exception) -> bool:
+        remaining = self._remaining_time(session)
+        if remaining is None:
+            return False
+        if not isinstance(error, (DeadlineExceeded, APITimeoutError)) and remaining > 0:
+            return False
+        session.budget_stop = "deadline"
+        session.log_event("budget_exhausted", {
+            "budget": "deadline",
+            "iteration": iteration,
+            "error": str(error),
+        })
+        return True
+
+    def _check_stall(self, session: ProofSession, iteration: int) -> bool:
+        if session.repeated_batches >= self.STALL_LIMIT:
+            reason = "repeated_tool_calls"
+        elif session.parse_failures >= self.STALL_LIMIT:
+            reason = "parse_failures"
+        else:
+            return False
+        if session.corrective_turns >= self.MAX_CORRECTIVE_TURNS:
+            session.stall_stop = reason
+            session.log_event("stall_stop", {"reason": reason, "iteration": iteration})
+            return True
+        session.corrective_turns += 1
+        session.repeated_batches = 0
+        session.parse_failures = 0
+        session.messages.append({"role": "user", "content": self.CORRECTIVE_MESSAGES[reason]})
+        session.log_event("stall_corrective_turn", {"reason": reason, "iteration": iteration})
+        return False
+
+    def _close_session(self, session: ProofSession) -> None:
+        self.tools["python_execute"].close_session(session.exec_session)
+
+    def _completion_request(
+        self, messages: List[Dict], stream: bool = False, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        request = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0,
+            "response_format": response_format(self.strict_schema),
+            "extra_body": {
+                "reasoning": {
+                    "effort": "high"
+                },
+                "usage": {
+                    "include": True
+                }
+            },
+        }
+        if stream:
+            request["stream"] = True
+            request["stream_options"] = {"include_usage": True}
+        if timeout is not None:
+            request["timeout"] = timeout
+        return request
+
+    def _consume_response(self, session: ProofSession, response: Any) -> Any:
+        if hasattr(response, "usage") and response.usage:
+            self._record_usage(session, response.usage)
+
+        message = response.choices[0].message
+        message_dict = (
+            message.model_dump()
+            if hasattr(message, "model_dump")
+            else message
+        )
+        return self._consume_message(session, message_dict, message.content or "")
+
+    def _record_usage(self, session: ProofSession, usage: Any) -> None:
+        if usage:
+            session.prompt_tokens += getattr(usage, "prompt_tokens", 0)
+            session.completion_tokens += getattr(
+                usage, "completion_tokens", 0
+            )
+            api_cost = getattr(usage, "cost", None)
+            if api_cost is not None:
+                session.cost += api_cost
+            details = getattr(usage, "prompt_tokens_details", None)
+            if isinstance(details, dict):
+                cached = details.get("cached_tokens")
+            else:
+                cached = getattr(details, "cached_tokens", None)
+            if isinstance(cached, int):
+                session.cached_tokens += cached
+            if session.iterations:
+                self._record_iteration_usage(session.iterations[-1], usage)
+            tracing.current_span().set_attributes({
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(usage, "completion_tokens", 0),
+                "cached_tokens": cached if isinstance(cached, int) else 0,
+            })
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(
+                    self.model,
+                    getattr(usage, "prompt_tokens", 0) + getattr(usage, "completion_tokens", 0),
+                )
+
+    def _consume_message(self, session: ProofSession, message_dict: Any, content: str) -> Any:
+        session.messages.append(message_dict)
+        tracing.current_span().set_attribute("response_chars", len(content))
+        result = self._parse_model_output(session, content)
+
+        session.log_event("model_output", {
+            "content": result
+        })
+        return result
+
+    def _parse_model_output(self, session: ProofSession, content: str) -> Any:
+        counts = ["total"]
+        try:
+            cleaned_content = _strip_markdown_code_fences(content)
+            result = json.loads(cleaned_content) if cleaned_content else {}
+        except (json.JSONDecodeError, TypeError):
+            cleaned_content = content
+            result = repair_json(content, RESPONSE_SCHEMA) if isinstance(content, str) else None
+            counts.append("repaired" if result is not None else "failed")
+
+        if result is None:
+            result = {"error": "Invalid JSON response", "raw_content": content}
+            session.parse_failures += 1
+            session.log_event("model_output_parse_error", {
+                "content": content,
+                "error": "Failed to parse JSON response"
+            })
+        else:
+            session.parse_failures = 0
+            if "repaired" in counts:
+                session.log_event("model_output_repaired", {"content": content})
+            errors = validate(result) if cleaned_content else []
+            if errors:
+                counts.append("schema_invalid")
+                session.log_event("model_output_schema_error", {"errors": errors[:10]})
+
+        for name in counts:
+            session.response_counts[name] += 1
+        with self._response_counts_lock:
+            for name in counts:
+                self._response_counts[name] += 1
+        return result
+
+    def response_stats(self) -> Dict[str, Any]:
+        with self._response_counts_lock:
+            counts = dict(self._response_counts)
+        return _response_rates(counts)
+
+    def _finish_claim(
+        self,
+        session: ProofSession,
+        final_result: Optional[Dict[str, Any]],
+        result: Any,
+        error: Optional[Exception] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        if error is not None:
+            session.log_event("iteration_error", {
+                "error": str(error)
+            })
+        metadata = self._build_metadata(session)
+        if error is not None:
+            content = {
+                "error": str(error),
+                "claim": session.claim,
+            }
+        elif final_result:
+            content = final_result
         else:
             content = {
                 "error": "No verdict reached",
-                "claim": claim,
-                "partial_result": result if "result" in locals() else None,
+                "claim": session.claim,
+                "partial_result": result,
             }
-            if self.logger:
-                self.logger.set_metadata(metadata)
-            return (content, metadata)
+        if session.logger:
+            session.logger.set_metadata(metadata)
+            if final_result and self.verdict_index is not None:
+                self.verdict_index.add(session.logger.proof_id, session.claim, final_result)
+        return (content, metadata)
+
+    def _cached_verdict(self, claim: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        if self.verdict_index is None:
+            return None
+        start_time = time.time()
+        hit = self.verdict_index.lookup(claim)
+        if hit is None:
+            return None
+        metadata = {
+            "time_seconds": round(time.time() - start_time, 3),
+            "tokens": {"prompt": 0, "completion": 0, "total": 0},
+            "cost": self._calculate_costs(0, 0),
+            "timestamp": datetime.now().isoformat(),
+            "verdict_cache": {
+                "proof_id": hit["proof_id"],
+                "claim": hit["claim"],
+                "match": hit["match"],
+                "similarity": hit["similarity"],
+                "age_seconds": hit["age_seconds"],
+            },
+        }
+        return hit["content"], metadata
+
+    def _budget(
+        self, deadline_seconds: Optional[float], max_tokens: Optional[int], max_cost_usd: Optional[float]
+    ) -> Optional[ProofBudget]:
+        if deadline_seconds is None and max_tokens is None and max_cost_usd is None:
+            return self.budget
+        return ProofBudget(deadline_seconds, max_tokens, max_cost_usd)
+
+    def prove_claim(
+        self,
+        claim: str,
+        max_iterations: Optional[int] = None,
+        stream: Optional[bool] = None,
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        use_verdict_cache: bool = True,
+        deadline_seconds: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_cost_usd: Optional[float] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        with tracing.span("prove_claim", model=self.model) as span:
+            cached = self._cached_verdict(claim) if use_verdict_cache else None
+            if cached is not None:
+                _trace_proof(span, *cached)
+                return cached
+            budget = self._budget(deadline_seconds, max_tokens, max_cost_usd)
+            session = self._open_session(claim, on_partial, budget)
+            try:
+                proof = self._prove_claim(session, max_iterations, self.stream if stream is None else stream)
+            finally:
+                self._close_session(session)
+            _trace_proof(span, *proof)
+            return proof
+
+    def _prove_claim(
+        self, session: ProofSession, max_iterations: Optional[int] = None, stream: bool = False
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        iteration = 0
+        final_result = None
+        result = None
+        dispatched = None
+
+        while True:
+            iteration += 1
+            if max_iterations and iteration > max_iterations:
+                break
+
+            with tracing.span("iteration", iteration=iteration):
+                try:
+                    if self._apply_budget(session, iteration) or self._check_stall(session, iteration):
+                        break
+                    self._compact_context(session, iteration)
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.wait(self.model)
+                    dispatched = None
+                    record = self._start_iteration(session, iteration)
+                    model_start = time.perf_counter()
+                    with tracing.span("model_call", model=self.model, stream=stream):
+                        if stream:
+                            result, dispatched = self._stream_response(session)
+                            record["model_seconds"] = round(time.perf_counter() - model_start, 3)
+                        else:
+                            response = self.client.chat.completions.create(
+                                **self._completion_request(session.messages, timeout=self._deadline_timeout(session))
+                            )
+                            record["model_seconds"] = round(time.perf_counter() - model_start, 3)
+                            result = self._consume_response(session, response)
+
+                    verdict = result.get("verdict") if isinstance(result, dict) else None
+                    if verdict in VERDICTS:
+                        final_result = result
+                        break
+                    if session.forced_verdict:
+                        break
+
+                    embedded_tool_calls = result.get("tool_calls", []) if isinstance(result, dict) else []
+                    if isinstance(result, dict) and embedded_tool_calls:
+                        if self._handle_embedded_tool_calls(result, session, dispatched):
+                            continue
+
+                except Exception as e:
+                    self._cancel_dispatched(dispatched)
+                    if self._stop_at_deadline(session, iteration, e):
+                        break
+                    return self._finish_claim(session, None, None, e)
+
+        self._cancel_dispatched(dispatched)
+        return self._finish_claim(session, final_result, result)
+
+    async def aprove_claim(
+        self,
+        claim: str,
+        max_iterations: Optional[int] = None,
+        stream: Optional[bool] = None,
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        use_verdict_cache: bool = True,
+        deadline_seconds: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_cost_usd: Optional[float] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        with tracing.span("prove_claim", model=self.model) as span:
+            cached = self._cached_verdict(claim) if use_verdict_cache else None
+            if cached is not None:
+                _trace_proof(span, *cached)
+                return cached
+            budget = self._budget(deadline_seconds, max_tokens, max_cost_usd)
+            session = await asyncio.to_thread(self._open_session, claim, on_partial, budget)
+            try:
+                proof = await self._aprove_claim(
+                    session, max_iterations, self.stream if stream is None else stream
+                )
+            finally:
+                await asyncio.to_thread(self._close_session, session)
+            _trace_proof(span, *proof)
+            return proof
+
+    async def _aprove_claim(
+        self, session: ProofSession, max_iterations: Optional[int] = None, stream: bool = False
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        iteration = 0
+        final_result = None
+        result = None
+        dispatched = None
+
+        while True:
+            iteration += 1
+            if max_iterations and iteration > max_iterations:
+                break
+
+            with tracing.span("iteration", iteration=iteration):
+                try:
+                    if self._apply_budget(session, iteration) or self._check_stall(session, iteration):
+                        break
+                    if self.context_token_budget:
+                        await asyncio.to_thread(self._compact_context, session, iteration)
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.await_slot(self.model)
+                    dispatched = None
+                    record = self._start_iteration(session, iteration)
+                    model_start = time.perf_counter()
+                    with tracing.span("model_call", model=self.model, stream=stream):
+                        if stream:
+                            result, dispatched = await self._astream_response(session)
+                            record["model_seconds"] = round(time.perf_counter() - model_start, 3)
+                        else:
+                            response = await self.async_client.chat.completions.create(
+                                **self._completion_request(session.messages, timeout=self._deadline_timeout(session))
+                            )
+                            record["model_seconds"] = round(time.perf_counter() - model_start, 3)
+                            result = await asyncio.to_thread(self._consume_response, session, response)
+
+                    verdict = result.get("verdict") if isinstance(result, dict) else None
+                    if verdict in VERDICTS:
+                        final_result = result
+                        break
+                    if session.forced_verdict:
+                        break
+
+                    embedded_tool_calls = result.get("tool_calls", []) if isinstance(result, dict) else []
+                    if isinstance(result, dict) and embedded_tool_calls:
+                        if await self._ahandle_embedded_tool_calls(result, session, dispatched):
+                            continue
+
+                except Exception as e:
+                    await self._acancel_dispatched(dispatched)
+                    if self._stop_at_deadline(session, iteration, e):
+                        break
+                    return await asyncio.to_thread(self._finish_claim, session, None, None, e)
+
+        await self._acancel_dispatched(dispatched)
+        return await asyncio.to_thread(self._finish_claim, session, final_result, result)
 
 
 def get_tool_schema() -> Dict[str, Any]:
@@ -645,6 +2835,183 @@ def get_tool_schema() -> Dict[str, Any]:
     }
 
 
+def read_claims(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = line
+        if isinstance(record, str):
+            record = {"claim": record}
+        if not isinstance(record, dict):
+            continue
+        claim = record.get("claim")
+        if claim is None:
+            claim = "\n\n".join(
+                str(record[key]) for key in ("title", "body") if record.get(key)
+            )
+        record_id = record.get("id") or record.get("request_id") or str(index)
+        yield {
+            "index": index,
+            "id": str(record_id),
+            "claim": claim,
+            "max_iterations": record.get("max_iterations"),
+        }
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    completed = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                # Records without a verdict (errors, exhausted iterations) are retried on resume.
+                if (
+                    isinstance(record, dict)
+                    and "id" in record
+                    and isinstance(record.get("content"), dict)
+                    and record["content"].get("verdict") is not None
+                ):
+                    completed.add(str(record["id"]))
+    except OSError:
+        pass
+    return completed
+
+
+def _ends_mid_line(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except OSError:
+        return False
+
+
+async def aprove_batch(
+    tool: ProofTool,
+    claims: Iterable[Dict[str, Any]],
+    concurrency: int = 8,
+    max_iterations: Optional[int] = None,
+    skip_ids: Optional[Set[str]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    skip_ids = skip_ids or set()
+    claims = iter(claims)
+    pending = set()
+    exhausted = False
+
+    async def run(item: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"index": item["index"], "id": item["id"], "claim": item["claim"]}
+        try:
+            content, metadata = await tool.aprove_claim(
+                item["claim"], item.get("max_iterations") or max_iterations
+            )
+            record["content"] = content
+            record["metadata"] = metadata
+        except Exception as e:
+            record["content"] = {"error": str(e), "claim": item["claim"]}
+            record["metadata"] = {}
+        return record
+
+    while pending or not exhausted:
+        while not exhausted and len(pending) < concurrency:
+            item = await asyncio.to_thread(next, claims, None)
+            if item is None:
+                exhausted = True
+            elif item["id"] not in skip_ids:
+                pending.add(asyncio.ensure_future(run(item)))
+        if not pending:
+            break
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result()
+
+
+async def arun_batch(
+    tool: ProofTool,
+    lines: Iterable[str],
+    output_path: str,
+    concurrency: int = 8,
+    max_iterations: Optional[int] = None,
+    resume: bool = True,
+) -> Dict[str, Any]:
+    skip_ids = load_completed_ids(output_path) if resume else set()
+    start_time = time.time()
+    completed = 0
+    failed = 0
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as f:
+        if f.tell() > 0 and _ends_mid_line(output_path):
+            f.write("\n")
+        async for record in aprove_batch(
+            tool, read_claims(lines), concurrency, max_iterations, skip_ids
+        ):
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            completed += 1
+            if record["content"].get("verdict") is None:
+                failed += 1
+    summary = {
+        "completed": completed,
+        "previously_completed": len(skip_ids),
+        "without_verdict": failed,
+        "time_seconds": round(time.time() - start_time, 3),
+    }
+    if tool.rate_limiter is not None:
+        summary["rate_limiter"] = tool.rate_limiter.stats()
+    return summary
+
+
+def run_batch(
+    tool: ProofTool,
+    lines: Iterable[str],
+    output_path: str,
+    concurrency: int = 8,
+    max_iterations: Optional[int] = None,
+    resume: bool = True,
+) -> Dict[str, Any]:
+    return asyncio.run(arun_batch(tool, lines, output_path, concurrency, max_iterations, resume))
+
+
+def _batch_main(argv: List[str], api_key: str) -> None:
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(prog="proof_tool.py batch", description="Prove a JSONL feed of claims")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL input file, or - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="JSONL output file (appended to on resume)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=None, help="Model requests per minute")
+    parser.add_argument("--tpm", type=int, default=None, help="Model tokens per minute")
+    parser.add_argument("--max-iterations", type=int, default=None)
+    parser.add_argument("--model", default="x-ai/grok-4.1-fast")
+    parser.add_argument("--base-url", default=OPENROUTER_BASE_URL, help="OpenAI-compatible endpoint, e.g. replay_server.py")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite output instead of skipping IDs that already have a verdict")
+    parser.add_argument("--verdict-cache", action="store_true", help="Reuse fresh verdicts from past proofs")
+    args = parser.parse_args(argv)
+
+    rate_limiter = RateLimiter(args.rpm, args.tpm) if args.rpm or args.tpm else None
+    verdict_index = VerdictIndex.from_directory() if args.verdict_cache else None
+    tool = ProofTool(
+        api_key, args.model, rate_limiter=rate_limiter, verdict_index=verdict_index, base_url=args.base_url
+    )
+
+    if args.input == "-":
+        summary = run_batch(
+            tool, sys.stdin, args.output, args.concurrency, args.max_iterations, not args.no_resume
+        )
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            summary = run_batch(
+                tool, f, args.output, args.concurrency, args.max_iterations, not args.no_resume
+            )
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+
+
 if __name__ == "__main__":
     import argparse
     import logging
@@ -658,6 +3025,10 @@ if __name__ == "__main__":
         print("OPENROUTER_API_KEY not set. Skipping live test.")
         sys.exit(0)
 
+    if sys.argv[1:2] == ["batch"]:
+        _batch_main(sys.argv[2:], api_key)
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description="Inline ProofAgent tool-call verifier")
     parser.add_argument("claim", nargs="*", help="Claim text to analyze")
     args = parser.parse_args()
@@ -676,7 +3047,7 @@ if __name__ == "__main__":
     tool_events = []
     _original_execute_tool = agent._execute_tool
 
-    def _wrapper_execute_tool(tool_call, _orig=_original_execute_tool):
+    def _wrapper_execute_tool(tool_call, session=None, _orig=_original_execute_tool):
         try:
             if hasattr(tool_call, "function"):
                 tool_name = getattr(tool_call.function, "name", "unknown")
@@ -715,7 +3086,7 @@ if __name__ == "__main__":
             )
             print(f"  code_preview='{preview}'")
 
-        result = _orig(tool_call)
+        result = _orig(tool_call, session)
         try:
             keys = list(result.keys()) if isinstance(result, dict) else []
         except Exception:
@@ -759,13 +3130,3 @@ if __name__ == "__main__":
             print(metadata)
         
         print(f"\n{'='*80}\n")
-
-
-
-
-
-
-
-
-
-
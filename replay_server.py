@@ -0,0 +1,377 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+SEARCH_PREFIX = "Return Search Results for: "
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _annotations(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "type": "url_citation",
+            "url_citation": {
+                "title": item.get("title", "Untitled"),
+                "url": item["url"],
+                "content": item.get("content", ""),
+            },
+        }
+        for item in results
+        if isinstance(item, dict) and item.get("url")
+    ]
+
+
+def load_recordings(path: str = "proofs") -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    recordings = []
+    searches = {}
+    try:
+        names = sorted(os.listdir(path))
+    except OSError:
+        return recordings, searches
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                log_data = json.load(f)
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if not isinstance(log_data, dict) or not log_data.get("claim"):
+            continue
+        turns = []
+        for event in log_data.get("events", []):
+            if not isinstance(event, dict):
+                continue
+            if event.get("type") == "model_output" and isinstance(event.get("content"), dict):
+                turns.append(event["content"])
+            elif event.get("type") == "tool_result" and event.get("tool_name") == "web_search":
+                result = event.get("result") or {}
+                if result.get("query") and "error" not in result:
+                    searches[_normalize(result["query"])] = {
+                        "content": result.get("content", ""),
+                        "annotations": _annotations(result.get("results", [])),
+                    }
+        if turns:
+            recordings.append({
+                "proof_id": log_data.get("proof_id", name[:-5]),
+                "claim": log_data["claim"],
+                "turns": turns,
+            })
+    return recordings, searches
+
+
+class ReplayServer:
+    STREAM_CHUNK_CHARS = 64
+
+    def __init__(
+        self,
+        recordings: Optional[List[Dict[str, Any]]] = None,
+        searches: Optional[Dict[str, Dict[str, Any]]] = None,
+        proofs_path: str = "proofs",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        latency_jitter: float = 0.0,
+        search_latency_seconds: Optional[float] = None,
+        chunk_delay_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        usage: Optional[Dict[str, int]] = None,
+        seed: Optional[int] = None,
+    ):
+        if recordings is None:
+            recordings, loaded = load_recordings(proofs_path)
+            searches = loaded if searches is None else searches
+        self.recordings = recordings
+        self.searches = searches or {}
+        self._by_claim = {_normalize(r["claim"]): r for r in recordings}
+        self.latency_seconds = latency_seconds
+        self.latency_jitter = latency_jitter
+        self.search_latency_seconds = search_latency_seconds
+        self.chunk_delay_seconds = chunk_delay_seconds
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.usage = usage
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = collections.Counter()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _roll(self) -> Tuple[bool, float]:
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+            jitter = self._random.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0
+        return failed, jitter
+
+    def _recording(self, claim: str) -> Optional[Dict[str, Any]]:
+        recording = self._by_claim.get(_normalize(claim))
+        if recording is None and self.recordings:
+            digest = hashlib.blake2b(claim.encode("utf-8"), digest_size=8).digest()
+            recording = self.recordings[int.from_bytes(digest, "big") % len(self.recordings)]
+        return recording
+
+    def _usage(self, request_body: bytes, content: str) -> Dict[str, int]:
+        if self.usage is not None:
+            usage = dict(self.usage)
+        else:
+            usage = {
+                "prompt_tokens": len(request_body) // 4,
+                "completion_tokens": len(content) // 4,
+            }
+        usage.setdefault("prompt_tokens", 0)
+        usage.setdefault("completion_tokens", 0)
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return usage
+
+    def _search_reply(self, query: str) -> Dict[str, Any]:
+        recorded = self.searches.get(_normalize(query))
+        if recorded is None:
+            self._count("search_misses")
+            return {"role": "assistant", "content": f"No recorded results for: {query}", "annotations": []}
+        return {"role": "assistant", "content": recorded["content"], "annotations": recorded["annotations"]}
+
+    def _chat_reply(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        last = messages[-1] if messages else {}
+        if last.get("role") == "tool":
+            try:
+                result = json.loads(last.get("content") or "{}")
+            except json.JSONDecodeError:
+                result = {}
+            verdict = result.get("verdict") if isinstance(result, dict) else None
+            reasoning = result.get("reasoning", "") if isinstance(result, dict) else ""
+            return {"role": "assistant", "content": f"Verdict: {verdict}. {reasoning}".strip()}
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": f"call_{len(messages)}",
+                "type": "function",
+                "function": {
+                    "name": "prove_claim",
+                    "arguments": json.dumps({"claim": last.get("content") or ""}),
+                },
+            }],
+        }
+
+    def _proof_reply(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        claim = next(
+            (m.get("content") for m in messages if m.get("role") == "user" and isinstance(m.get("content"), str)),
+            "",
+        )
+        recording = self._recording(claim)
+        if recording is None:
+            self._count("proof_misses")
+            turn = {"claim": claim, "tool_calls": [], "verdict": "UNVERIFIABLE", "reasoning": "No recording available."}
+        else:
+            turns = recording["turns"]
+            index = sum(1 for m in messages if m.get("role") == "assistant")
+            turn = dict(turns[min(index, len(turns) - 1)], claim=claim)
+        return {"role": "assistant", "content": json.dumps(turn)}
+
+    def reply(self, request: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        messages = [m for m in request.get("messages", []) if isinstance(m, dict)]
+        last = messages[-1] if messages else {}
+        last_content = last.get("content")
+        if last.get("role") == "user" and isinstance(last_content, str) and last_content.startswith(SEARCH_PREFIX):
+            return "search", self._search_reply(last_content[len(SEARCH_PREFIX):])
+        if request.get("tools"):
+            return "chat", self._chat_reply(messages)
+        return "proof", self._proof_reply(messages)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429 or status >= 500:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/").endswith("/stats"):
+                    self._send_json(200, server.stats())
+                else:
+                    self._send_json(404, {"error": {"message": "Not found"}})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "Not found"}})
+                    return
+                try:
+                    request = json.loads(raw or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+                    return
+
+                kind, message = server.reply(request)
+                server._count("requests")
+                server._count(f"{kind}_requests")
+                failed, jitter = server._roll()
+                latency = server.latency_seconds
+                if kind == "search" and server.search_latency_seconds is not None:
+                    latency = server.search_latency_seconds
+                if latency + jitter > 0:
+                    time.sleep(latency + jitter)
+                if failed:
+                    server._count("failures")
+                    self._send_json(server.failure_status, {
+                        "error": {"message": "Injected failure", "code": server.failure_status},
+                    })
+                    return
+
+                content = message.get("content") or ""
+                usage = server._usage(raw, content)
+                completion_id = f"replay-{time.time_ns()}"
+                model = request.get("model", "replay")
+                if request.get("stream"):
+                    self._stream(completion_id, model, message, usage)
+                    return
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                    }],
+                    "usage": usage,
+                })
+
+            def _event(self, body: Any) -> None:
+                data = body if isinstance(body, str) else json.dumps(body)
+                self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _stream(self, completion_id: str, model: str, message: Dict[str, Any], usage: Dict[str, int]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+                    return {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    }
+
+                content = message.get("content") or ""
+                step = server.STREAM_CHUNK_CHARS
+                for start in range(0, len(content), step):
+                    if start and server.chunk_delay_seconds:
+                        time.sleep(server.chunk_delay_seconds)
+                    self._event(chunk({"content": content[start:start + step]}))
+                self._event(chunk({}, "stop"))
+                self._event({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                })
+                self._event("[DONE]")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve recorded proofs as an OpenAI-compatible endpoint")
+    parser.add_argument("--proofs", default="proofs", help="Directory of recorded proof logs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency in seconds")
+    parser.add_argument("--search-latency", type=float, default=None, help="Latency override for web searches")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Delay between streamed chunks")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--failure-status", type=int, default=503)
+    parser.add_argument("--prompt-tokens", type=int, default=None, help="Fixed prompt tokens per response")
+    parser.add_argument("--completion-tokens", type=int, default=None, help="Fixed completion tokens per response")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    usage = None
+    if args.prompt_tokens is not None or args.completion_tokens is not None:
+        usage = {"prompt_tokens": args.prompt_tokens or 0, "completion_tokens": args.completion_tokens or 0}
+    server = ReplayServer(
+        proofs_path=args.proofs,
+        host=args.host,
+        port=args.port,
+        latency_seconds=args.latency,
+        latency_jitter=args.jitter,
+        search_latency_seconds=args.search_latency,
+        chunk_delay_seconds=args.chunk_delay,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        usage=usage,
+        seed=args.seed,
+    )
+    print(f"Replaying {len(server.recordings)} proofs and {len(server.searches)} searches at {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
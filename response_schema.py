@@ -0,0 +1,281 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+VERDICTS = ["PROVEN", "DISPROVEN", "UNSUPPORTED", "UNVERIFIABLE"]
+
+NULLABLE_STRING = {"type": ["string", "null"]}
+
+TOOL_CALL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "type": {"type": "string", "enum": ["function"]},
+        "function": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "enum": ["web_search", "python_execute"]},
+                "arguments": {"type": "string"},
+            },
+            "required": ["name", "arguments"],
+            "additionalProperties": False,
+        },
+    },
+    "required": ["id", "type", "function"],
+    "additionalProperties": False,
+}
+
+EVIDENCE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "source": {"type": "string"},
+        "content": {"type": "string"},
+        "quality_indicators": {
+            "type": ["object", "null"],
+            "properties": {
+                "source_reliability": NULLABLE_STRING,
+                "data_volume": NULLABLE_STRING,
+                "recency": NULLABLE_STRING,
+                "corroboration": NULLABLE_STRING,
+                "statistical_measures": NULLABLE_STRING,
+            },
+            "additionalProperties": False,
+        },
+        "urls": {"type": ["array", "null"], "items": {"type": "string"}},
+    },
+    "required": ["source", "content"],
+    "additionalProperties": False,
+}
+
+DERIVATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "step": {"type": "integer"},
+        "principle": {"type": "string"},
+        "calculation": {"type": "string"},
+        "evidence_used": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["step", "principle", "calculation", "evidence_used"],
+    "additionalProperties": False,
+}
+
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "claim": {"type": "string"},
+        "current_step": {"type": "string"},
+        "assumptions": {"type": "array", "items": {"type": "string"}},
+        "tool_calls": {"type": "array", "items": TOOL_CALL_SCHEMA},
+        "evidence": {"type": "array", "items": EVIDENCE_SCHEMA},
+        "derivation": {"type": "array", "items": DERIVATION_SCHEMA},
+        "falsifiable_test": NULLABLE_STRING,
+        "verdict": {"type": ["string", "null"], "enum": VERDICTS + [None]},
+        "reasoning": {"type": "string"},
+    },
+    "required": [
+        "claim",
+        "current_step",
+        "assumptions",
+        "tool_calls",
+        "evidence",
+        "derivation",
+        "falsifiable_test",
+        "verdict",
+        "reasoning",
+    ],
+    "additionalProperties": False,
+}
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+MAX_REPAIR_ATTEMPTS = 20
+
+
+def strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    strict = dict(schema)
+    if "properties" in schema:
+        required = set(schema.get("required", []))
+        properties = {}
+        for key, value in schema["properties"].items():
+            value = strict_schema(value)
+            types = value.get("type")
+            if key not in required and isinstance(types, list) and "null" not in types:
+                value["type"] = types + ["null"]
+            elif key not in required and isinstance(types, str):
+                value["type"] = [types, "null"]
+            properties[key] = value
+        strict["properties"] = properties
+        strict["required"] = list(properties)
+    if "items" in schema:
+        strict["items"] = strict_schema(schema["items"])
+    return strict
+
+
+STRICT_RESPONSE_SCHEMA = strict_schema(RESPONSE_SCHEMA)
+
+
+def response_format(strict: bool = True) -> Dict[str, Any]:
+    if not strict:
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "proof_response",
+            "strict": True,
+            "schema": STRICT_RESPONSE_SCHEMA,
+        },
+    }
+
+
+def _is_type(instance: Any, name: str) -> bool:
+    if isinstance(instance, bool) and name in ("integer", "number"):
+        return False
+    return isinstance(instance, JSON_TYPES[name])
+
+
+def validate(instance: Any, schema: Dict[str, Any] = RESPONSE_SCHEMA, path: str = "$") -> List[str]:
+    types = schema.get("type")
+    if types is not None:
+        types = types if isinstance(types, list) else [types]
+        if not any(_is_type(instance, name) for name in types):
+            return [f"{path}: expected {' or '.join(types)}, got {type(instance).__name__}"]
+    if "enum" in schema and instance not in schema["enum"]:
+        return [f"{path}: {instance!r} is not one of {schema['enum']}"]
+
+    errors = []
+    if isinstance(instance, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in instance:
+                errors.append(f"{path}: missing required field '{key}'")
+        for key, value in instance.items():
+            if key in properties:
+                errors.extend(validate(value, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unexpected field '{key}'")
+    elif isinstance(instance, list) and "items" in schema:
+        for index, item in enumerate(instance):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+
+    if path == "$" and isinstance(instance, dict):
+        if instance.get("verdict") is not None and instance.get("tool_calls"):
+            errors.append("$: tool_calls must be empty when verdict is set")
+    return errors
+
+
+def _remove_trailing_commas(text: str) -> str:
+    out = []
+    in_string = False
+    escape = False
+    pending_comma = None
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if pending_comma is not None:
+            if ch.isspace():
+                pending_comma.append(ch)
+                continue
+            if ch not in "}]":
+                out.append(",")
+            out.extend(pending_comma[1:])
+            pending_comma = None
+        if ch == ",":
+            pending_comma = [","]
+            continue
+        out.append(ch)
+        if ch == '"':
+            in_string = True
+    if pending_comma is not None:
+        out.extend(pending_comma)
+    return "".join(out)
+
+
+def _scan(text: str) -> Tuple[List[str], bool, bool, Optional[int], List[Tuple[int, List[str]]]]:
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    end = None
+    commas = []
+    for pos, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = pos
+                break
+        elif ch == ",":
+            commas.append((pos, list(stack)))
+    return stack, in_string, escape, end, commas
+
+
+def _close(text: str, stack: List[str], in_string: bool, escape: bool) -> str:
+    if in_string:
+        text = (text[:-1] if escape else text) + '"'
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+def _acceptable(result: Any, schema: Optional[Dict[str, Any]]) -> bool:
+    if schema is None:
+        return True
+    return all("missing required field" in error for error in validate(result, schema))
+
+
+def repair_json(content: str, schema: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    if not content:
+        return None
+    start = content.find("{")
+    if start < 0:
+        return None
+    text = _remove_trailing_commas(content[start:])
+    stack, in_string, escape, end, commas = _scan(text)
+    if end is not None:
+        return _loads(text[:end + 1])
+
+    candidates = [_close(text, stack, in_string, escape)]
+    candidates.extend(
+        _close(text[:pos], comma_stack, False, False)
+        for pos, comma_stack in reversed(commas[-MAX_REPAIR_ATTEMPTS:])
+    )
+    for candidate in candidates:
+        result = _loads(candidate)
+        if result is not None and _acceptable(result, schema):
+            return result
+    return None
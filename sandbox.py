@@ -0,0 +1,765 @@
+import io
+import os
+import sys
+import math
+import time
+import types
+import signal
+import builtins
+import tracemalloc
+import itertools
+import collections
+import threading
+import contextlib
+import traceback
+import multiprocessing
+from typing import Dict, Any, Deque, Iterator, List, Optional, Set, Tuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_MODULES: Tuple[str, ...] = ("math", "statistics", "datetime", "json")
+OPTIONAL_MODULES: Tuple[str, ...] = ("fractions", "decimal", "numpy", "sympy")
+
+_SIZE_SAMPLE = 1000
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return _max_rss_bytes()
+
+
+def _max_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def _vm_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return _max_rss_bytes()
+
+
+class ExecutionLimitExceeded(BaseException):
+    kind = "limit"
+
+
+class CPUTimeLimitExceeded(ExecutionLimitExceeded):
+    kind = "cpu"
+
+
+class OutputLimitExceeded(ExecutionLimitExceeded):
+    kind = "output"
+
+
+def _nbytes(s: str) -> int:
+    return len(s) if s.isascii() else len(s.encode("utf-8", "replace"))
+
+
+def _head_bytes(s: str, size: int) -> str:
+    if s.isascii():
+        return s[:size]
+    return s.encode("utf-8", "replace")[:size].decode("utf-8", "ignore")
+
+
+def _tail_bytes(s: str, size: int) -> str:
+    if size <= 0:
+        return ""
+    if s.isascii():
+        return s[-size:]
+    return s.encode("utf-8", "replace")[-size:].decode("utf-8", "ignore")
+
+
+class BoundedOutput(io.TextIOBase):
+    def __init__(
+        self,
+        head_bytes: Optional[int] = None,
+        tail_bytes: int = 0,
+        abort_bytes: Optional[int] = None,
+    ):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.abort_bytes = abort_bytes
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+        self._head: List[str] = []
+        self._head_size = 0
+        self._tail: Deque[str] = collections.deque()
+        self._tail_size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        size = _nbytes(s)
+        if self.abort_bytes and self.total_bytes + size > self.abort_bytes:
+            allowed = self.abort_bytes - self.total_bytes
+            if allowed > 0:
+                self._store(_head_bytes(s, allowed))
+            raise OutputLimitExceeded(f"Output limit exceeded ({self.abort_bytes} bytes)")
+        self._store(s, size)
+        return len(s)
+
+    def _store(self, s: str, size: Optional[int] = None) -> None:
+        if size is None:
+            size = _nbytes(s)
+        self.total_bytes += size
+        if self.head_bytes is None:
+            self._head.append(s)
+            self._head_size += size
+            return
+        room = self.head_bytes - self._head_size
+        if room > 0:
+            head = s if size <= room else _head_bytes(s, room)
+            head_size = size if size <= room else _nbytes(head)
+            self._head.append(head)
+            self._head_size += head_size
+            if head_size == size:
+                return
+            s = s[len(head):]
+            size -= head_size
+        self._tail.append(s)
+        self._tail_size += size
+        while self._tail_size > self.tail_bytes:
+            first = self._tail[0]
+            first_size = _nbytes(first)
+            excess = self._tail_size - self.tail_bytes
+            if first_size <= excess:
+                self._tail.popleft()
+                self._tail_size -= first_size
+                self.dropped_bytes += first_size
+            else:
+                kept = _tail_bytes(first, first_size - excess)
+                kept_size = _nbytes(kept)
+                self._tail[0] = kept
+                self._tail_size -= first_size - kept_size
+                self.dropped_bytes += first_size - kept_size
+
+    def getvalue(self) -> str:
+        head = "".join(self._head)
+        if not self.dropped_bytes:
+            return head + "".join(self._tail)
+        return f"{head}\n... ({self.dropped_bytes} bytes truncated) ...\n{''.join(self._tail)}"
+
+
+def output_stats(capture: BoundedOutput) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"output_bytes": capture.total_bytes}
+    if capture.dropped_bytes:
+        stats["output_dropped_bytes"] = capture.dropped_bytes
+        stats["truncated"] = True
+    return stats
+
+
+_thread_targets = threading.local()
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    def __init__(self, default: Any, name: str):
+        self.default = default
+        self.name = name
+
+    def _target(self) -> Any:
+        return getattr(_thread_targets, self.name, None) or self.default
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        return self._target().write(s)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+
+_redirect_lock = threading.Lock()
+_redirect_depth = 0
+
+
+@contextlib.contextmanager
+def redirect_thread_output(stdout: Any, stderr: Any) -> Iterator[None]:
+    global _redirect_depth
+    with _redirect_lock:
+        if not isinstance(sys.stdout, _ThreadLocalStream):
+            sys.stdout = _ThreadLocalStream(sys.stdout, "stdout")
+        if not isinstance(sys.stderr, _ThreadLocalStream):
+            sys.stderr = _ThreadLocalStream(sys.stderr, "stderr")
+        _redirect_depth += 1
+    _thread_targets.stdout = stdout
+    _thread_targets.stderr = stderr
+    try:
+        yield
+    finally:
+        _thread_targets.stdout = None
+        _thread_targets.stderr = None
+        with _redirect_lock:
+            _redirect_depth -= 1
+            if _redirect_depth == 0:
+                if isinstance(sys.stdout, _ThreadLocalStream):
+                    sys.stdout = sys.stdout.default
+                if isinstance(sys.stderr, _ThreadLocalStream):
+                    sys.stderr = sys.stderr.default
+
+
+def _raise_cpu_limit(signum: int, frame: Any) -> None:
+    raise CPUTimeLimitExceeded("CPU time limit exceeded")
+
+
+@contextlib.contextmanager
+def resource_limits(cpu_seconds: Optional[float] = None, memory_bytes: Optional[int] = None) -> Iterator[None]:
+    restore = []
+    previous_handler = None
+    if resource is not None and cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        limit = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        previous_handler = signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+        resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+        restore.append((resource.RLIMIT_CPU, soft, hard))
+    vm_bytes = _vm_bytes() if memory_bytes else None
+    if resource is not None and vm_bytes is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = vm_bytes + memory_bytes
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        restore.append((resource.RLIMIT_AS, soft, hard))
+    try:
+        yield
+    finally:
+        for kind, soft, hard in restore:
+            resource.setrlimit(kind, (soft, hard))
+        if previous_handler is not None:
+            signal.signal(signal.SIGXCPU, previous_handler)
+
+
+@contextlib.contextmanager
+def measure_execution(
+    metrics: Dict[str, Any],
+    trace_allocations: bool = False,
+    clock: Any = time.process_time,
+    own_process: bool = False,
+) -> Iterator[None]:
+    if own_process:
+        _reset_peak_rss()
+        blocks = sys.getallocatedblocks()
+    tracing = trace_allocations and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    cpu_start = clock()
+    try:
+        yield
+    finally:
+        metrics["cpu_seconds"] = round(clock() - cpu_start, 6)
+        if own_process:
+            metrics["allocated_blocks"] = sys.getallocatedblocks() - blocks
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            metrics["allocated_bytes"] = current
+            metrics["peak_allocated_bytes"] = peak
+        if own_process:
+            metrics["peak_rss_bytes"] = _peak_rss_bytes()
+        else:
+            metrics["process_peak_rss_bytes"] = _peak_rss_bytes()
+
+
+def _sizeof(value: Any, seen: Set[int], depth: int) -> int:
+    if id(value) in seen or isinstance(value, (types.ModuleType, type)):
+        return 0
+    seen.add(id(value))
+    try:
+        size = sys.getsizeof(value)
+    except TypeError:
+        return 0
+    if depth <= 0:
+        return size
+
+    if isinstance(value, dict):
+        items = [item for pair in itertools.islice(value.items(), _SIZE_SAMPLE) for item in pair]
+        count = 2 * len(value)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(itertools.islice(value, _SIZE_SAMPLE))
+        count = len(value)
+    else:
+        return size
+    if not items:
+        return size
+
+    sampled = sum(_sizeof(item, seen, depth - 1) for item in items)
+    return size + sampled * count // len(items)
+
+
+def namespace_bytes(namespace: Dict[str, Any], template: Dict[str, Any]) -> int:
+    seen: Set[int] = set()
+    total = 0
+    for name, value in namespace.items():
+        if template.get(name) is value:
+            continue
+        total += _sizeof(value, seen, depth=3)
+    return total
+
+
+def make_template(modules: Tuple[str, ...]) -> Dict[str, Any]:
+    template = {"__builtins__": builtins}
+    for name in modules:
+        template[name] = __import__(name)
+    return template
+
+
+def _run_code(code: str, namespace: Dict[str, Any], limits: Dict[str, Any]) -> Dict[str, Any]:
+    stdout_capture = BoundedOutput(
+        limits.get("output_head_bytes"), limits.get("output_tail_bytes") or 0, limits.get("output_bytes")
+    )
+    stderr_capture = BoundedOutput(
+        limits.get("output_head_bytes"), limits.get("output_tail_bytes") or 0, limits.get("output_bytes")
+    )
+    result = {
+        "success": False,
+        "output": "",
+        "error": "",
+    }
+    metrics: Dict[str, Any] = {}
+    try:
+        with measure_execution(metrics, limits.get("trace_allocations", False), own_process=True):
+            with resource_limits(limits.get("cpu_seconds"), limits.get("memory_bytes")):
+                with contextlib.redirect_stdout(stdout_capture), contextlib.redirect_stderr(stderr_capture):
+                    compiled_code = compile(code, "<string>", "exec")
+                    exec(compiled_code, namespace)
+        result["success"] = True
+    except CPUTimeLimitExceeded:
+        result["error"] = f"CPU time limit exceeded ({limits['cpu_seconds']} seconds)"
+        result["limit_exceeded"] = "cpu"
+    except ExecutionLimitExceeded as e:
+        result["error"] = str(e)
+        result["limit_exceeded"] = e.kind
+    except MemoryError:
+        result["traceback"] = traceback.format_exc()
+        if limits.get("memory_bytes"):
+            result["error"] = f"Memory limit exceeded ({limits['memory_bytes']} bytes)"
+            result["limit_exceeded"] = "memory"
+        else:
+            result["error"] = "MemoryError"
+    except (Exception, SystemExit) as e:
+        result["error"] = str(e)
+        result["traceback"] = traceback.format_exc()
+    result.update(metrics)
+
+    result["output"] = stdout_capture.getvalue()
+    result.update(output_stats(stdout_capture))
+    stderr_output = stderr_capture.getvalue()
+    if stderr_output and result["success"]:
+        result["warnings"] = stderr_output
+    return result
+
+
+def _worker_main(conn: Any, modules: Tuple[str, ...], preload: Tuple[str, ...]) -> None:
+    start_time = time.monotonic()
+    template = make_template(modules)
+    preloaded = []
+    for name in preload:
+        try:
+            __import__(name)
+            preloaded.append(name)
+        except ImportError:
+            pass
+    conn.send({
+        "warmup_seconds": time.monotonic() - start_time,
+        "preloaded": preloaded,
+    })
+
+    default_namespace = dict(template)
+    namespaces: Dict[str, Dict[str, Any]] = {}
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        for namespace_id in request.get("release", ()):
+            namespaces.pop(namespace_id, None)
+        if "code" not in request:
+            continue
+
+        namespace_id = request.get("namespace")
+        if namespace_id is None:
+            namespace = default_namespace
+        else:
+            namespace = namespaces.setdefault(namespace_id, dict(template))
+        result = _run_code(request["code"], namespace, request.get("limits") or {})
+
+        if namespace_id is not None:
+            size = namespace_bytes(namespace, template)
+            limit = request.get("max_namespace_bytes")
+            if limit and size > limit:
+                namespaces[namespace_id] = dict(template)
+                result["namespace_reset"] = True
+                size = 0
+            result["namespace_bytes"] = size
+        conn.send((result, {"rss_bytes": _rss_bytes()}))
+    conn.close()
+
+
+class SandboxWorker:
+    def __init__(
+        self,
+        context: Any,
+        modules: Tuple[str, ...],
+        preload: Tuple[str, ...],
+        startup_timeout: float,
+    ):
+        start_time = time.monotonic()
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, modules, preload), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        if not parent_conn.poll(startup_timeout):
+            self.kill()
+            raise RuntimeError("Sandbox worker failed to start")
+        try:
+            ready = parent_conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            raise RuntimeError("Sandbox worker failed to start")
+        self.warmup_seconds = time.monotonic() - start_time
+        self.import_seconds = ready["warmup_seconds"]
+        self.preloaded: List[str] = ready["preloaded"]
+        self.executions = 0
+        self.rss_bytes: Optional[int] = None
+        self.healthy = True
+        self.namespaces: Set[str] = set()
+        self.pending_release: List[str] = []
+
+    def _exited(self) -> Dict[str, Any]:
+        exitcode = self.kill()
+        return {
+            "success": False,
+            "output": "",
+            "error": f"Sandbox worker exited unexpectedly (exit code {exitcode})",
+        }
+
+    def run(self, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self.executions += 1
+        if self.pending_release:
+            request = {**request, "release": self.pending_release}
+            self.pending_release = []
+        try:
+            self.conn.send(request)
+        except (OSError, ValueError):
+            return self._exited()
+        if self.conn.poll(timeout):
+            try:
+                result, info = self.conn.recv()
+            except (EOFError, OSError):
+                return self._exited()
+            self.rss_bytes = info["rss_bytes"]
+            return result
+
+        self.kill()
+        return {
+            "success": False,
+            "output": "",
+            "error": f"Execution timed out after {timeout} seconds",
+            "timeout": True,
+        }
+
+    def release(self, namespace_ids: List[str]) -> None:
+        try:
+            self.conn.send({"release": namespace_ids})
+        except (OSError, ValueError):
+            self.kill()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1.0)
+        self.kill()
+
+    def kill(self) -> Optional[int]:
+        self.healthy = False
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        return self.process.exitcode
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        size: int = 2,
+        modules: Tuple[str, ...] = DEFAULT_MODULES,
+        preload: Tuple[str, ...] = OPTIONAL_MODULES,
+        max_executions: int = 100,
+        max_rss_bytes: Optional[int] = 512 * 1024 * 1024,
+        start_method: str = "spawn",
+        startup_timeout: float = 30.0,
+    ):
+        if size < 1:
+            raise ValueError("Sandbox pool size must be at least 1")
+        self.size = size
+        self.modules = tuple(modules)
+        self.preload = tuple(preload)
+        self.max_executions = max_executions
+        self.max_rss_bytes = max_rss_bytes
+        self.startup_timeout = startup_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: List[SandboxWorker] = []
+        self._affinity: Dict[str, SandboxWorker] = {}
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._closed = False
+        self._workers = 0
+        self._stats = {
+            "executions": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "recycled": 0,
+            "spawn_failures": 0,
+            "namespace_resets": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "warmup_seconds": [],
+        }
+
+        start_time = time.monotonic()
+        threads = [
+            threading.Thread(target=self._spawn, daemon=True)
+            for _ in range(size)
+            if self._reserve_slot()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.pool_warmup_seconds = time.monotonic() - start_time
+        if not self._idle:
+            raise RuntimeError("Sandbox pool failed to start any worker")
+
+    def _reserve_slot(self) -> bool:
+        with self._lock:
+            if self._closed or self._workers >= self.size:
+                return False
+            self._workers += 1
+            return True
+
+    def _spawn(self) -> bool:
+        try:
+            worker = SandboxWorker(self._context, self.modules, self.preload, self.startup_timeout)
+        except (RuntimeError, OSError):
+            with self._lock:
+                self._workers -= 1
+                self._stats["spawn_failures"] += 1
+            return False
+        with self._available:
+            self._stats["warmup_seconds"].append(worker.warmup_seconds)
+            closed = self._closed
+            if closed:
+                self._workers -= 1
+            else:
+                self._idle.append(worker)
+                self._available.notify_all()
+        if closed:
+            worker.stop()
+            return False
+        return True
+
+    def _needs_recycle(self, worker: SandboxWorker) -> bool:
+        if self.max_rss_bytes and worker.rss_bytes is not None and worker.rss_bytes > self.max_rss_bytes:
+            return True
+        return bool(
+            self.max_executions
+            and worker.executions >= self.max_executions
+            and not worker.namespaces
+        )
+
+    def _take_idle(self, namespace: Optional[str]) -> Tuple[Optional[SandboxWorker], bool]:
+        pinned = self._affinity.get(namespace) if namespace is not None else None
+        reset = False
+        if pinned is not None and not pinned.healthy:
+            del self._affinity[namespace]
+            pinned = None
+            reset = True
+        if pinned is not None:
+            if pinned in self._idle:
+                self._idle.remove(pinned)
+                return pinned, False
+            return None, False
+        if not self._idle:
+            return None, reset
+        worker = self._idle.pop()
+        if namespace is not None:
+            self._affinity[namespace] = worker
+            worker.namespaces.add(namespace)
+        return worker, reset
+
+    def _acquire(self, namespace: Optional[str]) -> Tuple[Optional[SandboxWorker], bool]:
+        reset = False
+        while True:
+            with self._available:
+                if self._closed:
+                    return None, False
+                worker, lost = self._take_idle(namespace)
+                reset = reset or lost
+                if worker is None:
+                    self._available.wait(timeout=1.0)
+                    worker, lost = self._take_idle(namespace)
+                    reset = reset or lost
+                if worker is not None:
+                    return worker, reset
+                spawn = self._workers < self.size
+                if spawn:
+                    self._workers += 1
+            if spawn and not self._spawn():
+                return None, False
+
+    def _release(self, worker: SandboxWorker) -> None:
+        with self._available:
+            if not self._closed and worker.healthy and not self._needs_recycle(worker):
+                self._idle.append(worker)
+                self._available.notify_all()
+                return
+        if worker.healthy:
+            worker.stop()
+        with self._available:
+            self._workers -= 1
+            if not self._closed:
+                self._stats["recycled"] += 1
+            self._available.notify_all()
+        if self._reserve_slot():
+            threading.Thread(target=self._spawn, daemon=True).start()
+
+    def execute(
+        self,
+        code: str,
+        timeout: float,
+        namespace: Optional[str] = None,
+        max_namespace_bytes: Optional[int] = None,
+        limits: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        wait_start = time.monotonic()
+        worker, reset = self._acquire(namespace)
+        queue_wait = time.monotonic() - wait_start
+        if worker is None:
+            return {
+                "success": False,
+                "output": "",
+                "error": "No sandbox worker available",
+            }
+        try:
+            result = worker.run(
+                {
+                    "code": code,
+                    "namespace": namespace,
+                    "max_namespace_bytes": max_namespace_bytes,
+                    "limits": limits,
+                },
+                timeout,
+            )
+            crashed = not worker.healthy and not result.get("timeout")
+        finally:
+            self._release(worker)
+
+        if reset:
+            result["namespace_reset"] = True
+        with self._lock:
+            self._stats["executions"] += 1
+            self._stats["queue_wait_total"] += queue_wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], queue_wait)
+            if result.get("timeout"):
+                self._stats["timeouts"] += 1
+            elif crashed:
+                self._stats["crashes"] += 1
+            if result.get("namespace_reset"):
+                self._stats["namespace_resets"] += 1
+        result["queue_wait"] = round(queue_wait, 6)
+        return result
+
+    def release_namespace(self, namespace: str) -> None:
+        with self._available:
+            worker = self._affinity.pop(namespace, None)
+            if worker is None:
+                return
+            worker.namespaces.discard(namespace)
+            if not worker.healthy:
+                return
+            if worker not in self._idle:
+                worker.pending_release.append(namespace)
+                return
+            self._idle.remove(worker)
+        worker.release([namespace])
+        self._release(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            warmups = list(self._stats["warmup_seconds"])
+            executions = self._stats["executions"]
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "namespaces": len(self._affinity),
+                "executions": executions,
+                "timeouts": self._stats["timeouts"],
+                "crashes": self._stats["crashes"],
+                "recycled": self._stats["recycled"],
+                "spawn_failures": self._stats["spawn_failures"],
+                "namespace_resets": self._stats["namespace_resets"],
+                "pool_warmup_seconds": round(self.pool_warmup_seconds, 3),
+                "worker_warmup_seconds_avg": round(sum(warmups) / len(warmups), 3) if warmups else None,
+                "worker_warmup_seconds_max": round(max(warmups), 3) if warmups else None,
+                "queue_wait_avg": round(self._stats["queue_wait_total"] / executions, 6) if executions else 0.0,
+                "queue_wait_max": round(self._stats["queue_wait_max"], 6),
+            }
+
+    def close(self) -> None:
+        with self._available:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._affinity.clear()
+            self._available.notify_all()
+        for worker in idle:
+            worker.stop()
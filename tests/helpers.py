@@ -0,0 +1,23 @@
+import unittest
+import tempfile
+from unittest.mock import Mock, patch
+
+import proof_tool
+
+
+def mock_completion(content, usage=None):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = content
+    response.choices[0].message.model_dump = Mock(return_value={"role": "assistant", "content": content})
+    response.usage = usage
+    return response
+
+
+class ProofsDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = patch.object(proof_tool, "proofs_dir", self.tmpdir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+import json
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from proof_tool import ProofTool, RateLimiter, read_claims, load_completed_ids, run_batch
+
+
+class TestReadClaims(unittest.TestCase):
+    def test_formats(self):
+        lines = [
+            json.dumps({"id": "a", "claim": "Water boils at 100C"}),
+            "",
+            json.dumps({"request_id": "user-001", "title": "Title", "body": "Body text"}),
+            json.dumps("A bare JSON string"),
+            "Plain text claim",
+        ]
+        claims = list(read_claims(lines))
+        self.assertEqual([c["id"] for c in claims], ["a", "user-001", "3", "4"])
+        self.assertEqual([c["index"] for c in claims], [0, 2, 3, 4])
+        self.assertEqual(claims[1]["claim"], "Title\n\nBody text")
+        self.assertEqual(claims[2]["claim"], "A bare JSON string")
+        self.assertEqual(claims[3]["claim"], "Plain text claim")
+
+    def test_load_completed_ids_tolerates_partial_line(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write(json.dumps({"id": "a", "content": {"verdict": "PROVEN"}}) + "\n" + '{"id": "b", "cont')
+        self.addCleanup(os.remove, f.name)
+        self.assertEqual(load_completed_ids(f.name), {"a"})
+        self.assertEqual(load_completed_ids(f.name + ".missing"), set())
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_per_minute(self):
+        limiter = RateLimiter(requests_per_minute=2)
+        self.assertEqual(limiter.reserve("m"), 0)
+        self.assertEqual(limiter.reserve("m"), 0)
+        self.assertAlmostEqual(limiter.reserve("m"), 60, delta=1)
+        self.assertAlmostEqual(limiter.reserve("m"), 60, delta=1)
+        self.assertAlmostEqual(limiter.reserve("m"), 120, delta=1)
+        self.assertEqual(limiter.reserve("other"), 0)
+
+    def test_tokens_per_minute(self):
+        limiter = RateLimiter(tokens_per_minute=1000)
+        self.assertEqual(limiter.reserve("m"), 0)
+        limiter.record("m", 600)
+        self.assertEqual(limiter.reserve("m"), 0)
+        limiter.record("m", 600)
+        self.assertAlmostEqual(limiter.reserve("m"), 60, delta=1)
+
+
+class TestRunBatch(unittest.TestCase):
+    def setUp(self):
+        self.tool = ProofTool("test_key")
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+
+        async def fake_aprove_claim(claim, max_iterations=None):
+            self.calls.append(claim)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(float(claim.split()[-1]))
+            self.active -= 1
+            return {"verdict": "PROVEN", "claim": claim}, {"tokens": {"total": 1}}
+
+        self.tool.aprove_claim = fake_aprove_claim
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.output = os.path.join(self.tmpdir.name, "out.jsonl")
+
+    def _lines(self, delays):
+        return [json.dumps({"id": f"c{i}", "claim": f"claim {delay}"}) for i, delay in enumerate(delays)]
+
+    def _read(self):
+        with open(self.output, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_completion_order_with_index(self):
+        summary = run_batch(self.tool, self._lines([0.3, 0.1, 0.2, 0.0]), self.output, concurrency=4)
+        records = self._read()
+        self.assertEqual([r["id"] for r in records], ["c3", "c1", "c2", "c0"])
+        self.assertEqual([r["index"] for r in records], [3, 1, 2, 0])
+        self.assertEqual(records[0]["content"]["verdict"], "PROVEN")
+        self.assertEqual(summary["completed"], 4)
+
+    def test_concurrency_is_bounded(self):
+        run_batch(self.tool, self._lines([0.02] * 10), self.output, concurrency=3)
+        self.assertEqual(self.peak, 3)
+        self.assertEqual(len(self._read()), 10)
+
+    def test_resume_skips_completed_ids(self):
+        with open(self.output, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "c0", "index": 0, "content": {"verdict": "PROVEN"}}) + "\n" + '{"id": "c1", "ind')
+        summary = run_batch(self.tool, self._lines([0, 0, 0]), self.output)
+        self.assertEqual(sorted(self.calls), ["claim 0", "claim 0"])
+        self.assertEqual(summary["previously_completed"], 1)
+        self.assertEqual(load_completed_ids(self.output), {"c0", "c1", "c2"})
+
+    def test_resume_retries_claims_without_verdict(self):
+        with open(self.output, "w", encoding="utf-8") as f:
+            for i, content in enumerate([
+                {"verdict": "PROVEN"},
+                {"error": "Connection error.", "claim": "claim 0"},
+                {"verdict": None},
+            ]):
+                f.write(json.dumps({"id": f"c{i}", "index": i, "content": content}) + "\n")
+        self.assertEqual(load_completed_ids(self.output), {"c0"})
+
+        summary = run_batch(self.tool, self._lines([0, 0, 0]), self.output)
+        self.assertEqual(self.calls, ["claim 0", "claim 0"])
+        self.assertEqual(summary["completed"], 2)
+        self.assertEqual(load_completed_ids(self.output), {"c0", "c1", "c2"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import proof_tool
+from benchmarks import e2e, micro
+
+
+class TestE2EBenchmark(unittest.TestCase):
+    def test_corpus_covers_tests_and_stored_proofs(self):
+        corpus, searches = e2e.build_corpus()
+        sources = {item["source"] for item in corpus}
+        self.assertEqual(sources, {"proofs", "test_code_execution", "fixture"})
+        claims = {item["claim"]: item for item in corpus}
+        python_call = claims["2025 is prime"]["turns"][0]["tool_calls"][0]
+        self.assertEqual(python_call["function"]["name"], "python_execute")
+        self.assertIn("is_prime", json.loads(python_call["function"]["arguments"])["code"])
+        self.assertNotIn("tool does not record execution metadata", claims)
+        self.assertEqual(claims["6 * 7 = 42"]["turns"][-1]["verdict"], "PROVEN")
+        self.assertIn("the earth is flat", searches)
+        self.assertIn("boiling point of water at sea level", searches)
+
+    def test_percentile_and_compare(self):
+        self.assertEqual(e2e.percentile([1.0, 2.0, 3.0, 4.0, 5.0], 0.5), 3.0)
+        self.assertAlmostEqual(e2e.percentile([1.0, 2.0], 0.95), 1.95)
+        self.assertEqual(e2e.percentile([], 0.5), 0.0)
+
+        def results(wall_p95, throughput):
+            return {"levels": {"8": {
+                "throughput_per_second": throughput,
+                "latency": {"wall": {"p50": 1.0, "p95": wall_p95}, "overhead": {"p50": 0.001, "p95": 0.002}},
+            }}}
+
+        baseline = results(1.0, 10.0)
+        self.assertEqual(e2e.compare(results(1.1, 9.0), baseline), [])
+        regressions = e2e.compare(results(1.5, 5.0), baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("concurrency 8: latency.wall.p95 1.0 -> 1.5"))
+
+    def test_run_benchmark(self):
+        results = e2e.run_benchmark(levels=(1, 4), latency_seconds=0.0, search_latency_seconds=0.0, max_claims=4)
+        self.assertEqual(proof_tool.proofs_dir, "proofs")
+        level = results["levels"]["4"]
+        self.assertEqual(level["proofs"], 8)
+        self.assertEqual(level["errors"], 0)
+        self.assertGreater(level["peak_rss_bytes"], 0)
+        self.assertEqual(set(level["latency"]), {"wall", "model", "tool_search", "tool_python", "logging", "overhead"})
+        self.assertGreater(level["latency"]["model"]["p50"], 0)
+        self.assertGreater(level["latency"]["tool_search"]["p50"], 0)
+
+
+class TestMicroBenchmarks(unittest.TestCase):
+    def test_benchmarks_report_rates_and_allocations(self):
+        stats = micro.bench_execute(5)
+        self.assertGreater(stats["calls_per_second"], 0)
+        self.assertGreater(stats["peak_bytes"], 0)
+
+        stats = micro.bench_parse(2)
+        self.assertGreater(stats["content_bytes"], 100000)
+
+        with tempfile.TemporaryDirectory() as logs_dir, patch.object(proof_tool, "proofs_dir", logs_dir):
+            stats = micro.bench_log_events(20, "document", traced_events=5)
+        self.assertGreater(stats["events_per_second"], 0)
+        self.assertEqual(stats["traced_events"], 5)
+
+    def test_baseline_is_committed_and_compare_gates(self):
+        with open(micro.BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        self.assertIn("log_event_document_1000", baseline["benchmarks"])
+        self.assertEqual(micro.compare(baseline, baseline), [])
+
+        slower = json.loads(json.dumps(baseline))
+        slower["benchmarks"]["execute_trivial"]["calls_per_second"] /= 3
+        slower["benchmarks"]["parse_large_output"]["peak_bytes"] *= 2
+        regressions = micro.compare(slower, baseline)
+        self.assertEqual([line.split(":")[0] for line in regressions], ["execute_trivial", "parse_large_output"])
+
+
+if __name__ == '__main__':
+    unittest.main()
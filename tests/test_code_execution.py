@@ -1,11 +1,13 @@
 import unittest
 import sys
 import os
+import threading
 
 # Ensure tools are importable when running from tests directory
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from proof_tool import CodeExecutionTool
+from proof_tool import CodeExecutionTool, ProofTool
+from sandbox import SandboxPool, BoundedOutput, OutputLimitExceeded
 
 
 class TestCodeExecutionClaims(unittest.TestCase):
@@ -127,5 +129,312 @@ class TestCodeExecutionClaims(unittest.TestCase):
         self.assertIsNotNone(result["execution_time"])
         self.assertGreater(result["execution_time"], 0)
 
+class TestProcessBackend(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tool = CodeExecutionTool(backend="process", pool_size=1)
+        cls.tool.timeout = 2
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tool.close()
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            CodeExecutionTool(backend="gpu")
+
+    def test_result_contract(self):
+        result = self.tool.execute("print(math.sqrt(16))")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["output"], "4.0\n")
+        self.assertEqual(result["error"], "")
+        self.assertEqual(result["code"], "print(math.sqrt(16))")
+        self.assertGreater(result["execution_time"], 0)
+
+    def test_error_reports_traceback(self):
+        result = self.tool.execute("print('before')\n1/0")
+        self.assertFalse(result["success"])
+        self.assertIn("division by zero", result["error"])
+        self.assertIn("ZeroDivisionError", result["traceback"])
+        self.assertEqual(result["output"], "before\n")
+
+    def test_runaway_code_is_killed(self):
+        result = self.tool.execute("while True:\n    pass")
+        self.assertFalse(result["success"])
+        self.assertTrue(result["timeout"])
+        self.assertIn("timed out", result["error"])
+        self.assertLess(result["execution_time"], 10)
+
+        result = self.tool.execute("print('alive')")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["output"], "alive\n")
+
+    def test_worker_crash_is_reported(self):
+        result = self.tool.execute("import os\nos._exit(3)")
+        self.assertFalse(result["success"])
+        self.assertIn("exit code 3", result["error"])
+        self.assertTrue(self.tool.execute("print(1)")["success"])
+
+    def test_system_exit_does_not_kill_worker(self):
+        result = self.tool.execute("raise SystemExit('bye')")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "bye")
+
+
+class TestSandboxPool(unittest.TestCase):
+    def _pool(self, **kwargs):
+        pool = SandboxPool(**kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_workers_are_warm(self):
+        pool = self._pool(size=2, preload=("fractions", "decimal", "not_a_real_module"))
+        stats = pool.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["idle"], 2)
+        self.assertIsNotNone(stats["worker_warmup_seconds_avg"])
+        self.assertGreater(stats["pool_warmup_seconds"], 0)
+
+        result = pool.execute("import sys\nprint('fractions' in sys.modules, 'decimal' in sys.modules)", 5)
+        self.assertEqual(result["output"], "True True\n")
+        self.assertIn("queue_wait", result)
+
+    def test_recycles_after_max_executions(self):
+        pool = self._pool(size=1, preload=(), max_executions=2)
+        pids = [pool.execute("import os\nprint(os.getpid())", 5)["output"] for _ in range(4)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertGreaterEqual(pool.stats()["recycled"], 1)
+
+    def test_recycles_above_rss_threshold(self):
+        pool = self._pool(size=1, preload=(), max_rss_bytes=1)
+        first = pool.execute("import os\nprint(os.getpid())", 5)["output"]
+        second = pool.execute("import os\nprint(os.getpid())", 5)["output"]
+        self.assertNotEqual(first, second)
+
+    def test_queue_wait_is_recorded(self):
+        pool = self._pool(size=1, preload=())
+        tool = CodeExecutionTool(backend="process", sandbox=pool)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(tool.execute("import time\ntime.sleep(0.3)")))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertGreater(max(r["queue_wait"] for r in results), 0.2)
+        stats = tool.stats()
+        self.assertEqual(stats["backend"], "process")
+        self.assertEqual(stats["executions"], 2)
+        self.assertGreater(stats["queue_wait_max"], 0.2)
+
+
+class TestSessionNamespaces(unittest.TestCase):
+    def setUp(self):
+        self.tool = CodeExecutionTool()
+
+    def test_sessions_are_isolated(self):
+        a = self.tool.open_session()
+        b = self.tool.open_session()
+        self.assertTrue(self.tool.execute("x = 1", session_id=a)["success"])
+        result = self.tool.execute("print(x)", session_id=b)
+        self.assertFalse(result["success"])
+        self.assertIn("'x' is not defined", result["error"])
+        self.assertEqual(self.tool.execute("print(x)", session_id=a)["output"], "1\n")
+        self.assertNotIn("x", self.tool._globals)
+
+    def test_session_starts_from_pristine_template(self):
+        session_id = self.tool.open_session()
+        self.tool.execute("math = None", session_id=session_id)
+        self.tool.close_session(session_id)
+        fresh = self.tool.open_session()
+        self.assertEqual(self.tool.execute("print(math.floor(2.5))", session_id=fresh)["output"], "2\n")
+
+    def test_close_session_frees_namespace(self):
+        session_id = self.tool.open_session()
+        self.tool.execute("data = list(range(1000))", session_id=session_id)
+        self.assertGreater(self.tool.namespace_size(session_id), 8000)
+        self.tool.close_session(session_id)
+        self.assertNotIn(session_id, self.tool._namespaces)
+        self.assertEqual(self.tool.namespace_size(session_id), 0)
+
+    def test_namespace_size_is_reported(self):
+        session_id = self.tool.open_session()
+        small = self.tool.execute("x = 1", session_id=session_id)["namespace_bytes"]
+        large = self.tool.execute("big = [0.5] * 100000", session_id=session_id)["namespace_bytes"]
+        self.assertGreater(large, small + 100000 * 8)
+
+    def test_namespace_cap_resets_session(self):
+        self.tool.max_namespace_bytes = 100000
+        session_id = self.tool.open_session()
+        result = self.tool.execute("big = list(range(100000))", session_id=session_id)
+        self.assertTrue(result["success"])
+        self.assertTrue(result["namespace_reset"])
+        self.assertEqual(result["namespace_bytes"], 0)
+        self.assertFalse(self.tool.execute("print(big)", session_id=session_id)["success"])
+
+
+class TestProcessSessionNamespaces(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tool = CodeExecutionTool(backend="process", pool_size=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tool.close()
+
+    def test_sessions_are_pinned_and_isolated(self):
+        a = self.tool.open_session()
+        b = self.tool.open_session()
+        for i in range(3):
+            self.tool.execute(f"x = {i}", session_id=a)
+            self.tool.execute(f"y = {i}", session_id=b)
+        self.assertEqual(self.tool.execute("print(x)", session_id=a)["output"], "2\n")
+        self.assertFalse(self.tool.execute("print(x)", session_id=b)["success"])
+        self.assertGreater(self.tool.namespace_size(a), 0)
+
+        self.tool.close_session(a)
+        self.assertFalse(self.tool.execute("print(x)", session_id=a)["success"])
+        self.tool.close_session(a)
+        self.tool.close_session(b)
+
+    def test_killed_worker_resets_session(self):
+        session_id = self.tool.open_session()
+        self.tool.execute("x = 1", session_id=session_id)
+        self.tool.execute("import os\nos._exit(1)", session_id=session_id)
+        result = self.tool.execute("print('x' in globals())", session_id=session_id)
+        self.assertTrue(result["namespace_reset"])
+        self.assertEqual(result["output"], "False\n")
+        self.tool.close_session(session_id)
+
+
+class TestExecutionLimits(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tool = CodeExecutionTool(
+            backend="process",
+            pool_size=1,
+            cpu_time_limit=1,
+            memory_limit_bytes=64 * 1024 * 1024,
+            max_output_bytes=1024,
+            trace_allocations=True,
+        )
+        cls.tool.timeout = 10
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tool.close()
+
+    def test_cpu_limit(self):
+        result = self.tool.execute("while True: pass")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["limit_exceeded"], "cpu")
+        self.assertNotIn("timeout", result)
+        self.assertTrue(self.tool.execute("print(1)")["success"])
+
+    def test_memory_limit(self):
+        result = self.tool.execute("data = bytearray(256 * 1024 * 1024)")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["limit_exceeded"], "memory")
+        self.assertTrue(self.tool.execute("data = bytearray(1024)")["success"])
+
+    def test_output_limit(self):
+        result = self.tool.execute("for i in range(10000): print(i)")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["limit_exceeded"], "output")
+
+    def test_metrics_reported(self):
+        result = self.tool.execute("values = [i * i for i in range(100000)]")
+        self.assertTrue(result["success"])
+        self.assertGreaterEqual(result["cpu_seconds"], 0)
+        self.assertGreater(result["peak_rss_bytes"], 0)
+        self.assertGreater(result["peak_allocated_bytes"], 100000)
+
+    def test_default_proof_tool_enforces_limits(self):
+        tool = ProofTool("test_key").tools["python_execute"]
+        self.addCleanup(tool.close)
+        self.assertEqual(tool.backend, "process")
+        result = tool.execute("data = bytearray(3 * 1024 ** 3)")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["limit_exceeded"], "memory")
+
+    def test_thread_backend_output_limit_and_metrics(self):
+        tool = CodeExecutionTool(max_output_bytes=100)
+        result = tool.execute("print('x' * 1000)")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["limit_exceeded"], "output")
+
+        result = tool.execute("print('ok')")
+        self.assertTrue(result["success"])
+        self.assertIn("cpu_seconds", result)
+        self.assertGreater(result["process_peak_rss_bytes"], 0)
+        self.assertNotIn("peak_rss_bytes", result)
+        self.assertNotIn("allocated_blocks", result)
+
+    @unittest.skipUnless(os.path.exists("/proc/self/status"), "requires procfs")
+    def test_thread_backend_keeps_host_peak_rss(self):
+        def peak():
+            with open("/proc/self/status", "r") as f:
+                return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+
+        ballast = bytearray(64 * 1024 * 1024)
+        for i in range(0, len(ballast), 4096):
+            ballast[i] = 1
+        del ballast
+        before = peak()
+        self.assertTrue(CodeExecutionTool().execute("x = 1")["success"])
+        self.assertGreaterEqual(peak(), before)
+
+
+class TestBoundedOutput(unittest.TestCase):
+    def test_keeps_head_and_tail(self):
+        capture = BoundedOutput(head_bytes=10, tail_bytes=5)
+        for i in range(100):
+            capture.write(f"{i}\n")
+        self.assertEqual(capture.total_bytes, 290)
+        self.assertEqual(capture.dropped_bytes, 275)
+        self.assertEqual(capture.getvalue(), "0\n1\n2\n3\n4\n\n... (275 bytes truncated) ...\n8\n99\n")
+
+    def test_counts_utf8_bytes(self):
+        capture = BoundedOutput(head_bytes=4, tail_bytes=4)
+        capture.write("h\u00e9llo w\u00f6rld \u00fcn\u00efcode")
+        self.assertEqual(capture.total_bytes, 23)
+        self.assertEqual(capture.dropped_bytes, 15)
+        self.assertTrue(capture.getvalue().startswith("h\u00e9l\n"))
+        self.assertTrue(capture.getvalue().endswith("\ncode"))
+
+    def test_unbounded_by_default(self):
+        capture = BoundedOutput()
+        capture.write("x" * 100000)
+        self.assertEqual(capture.getvalue(), "x" * 100000)
+        self.assertEqual(capture.dropped_bytes, 0)
+
+    def test_abort_on_flood(self):
+        capture = BoundedOutput(head_bytes=10, tail_bytes=10, abort_bytes=50)
+        with self.assertRaises(OutputLimitExceeded):
+            for _ in range(100):
+                capture.write("0123456789")
+        self.assertEqual(capture.total_bytes, 50)
+
+    def test_execute_reports_dropped_bytes(self):
+        for backend in ("thread", "process"):
+            tool = CodeExecutionTool(backend=backend, pool_size=1, output_head_bytes=100, output_tail_bytes=50)
+            try:
+                result = tool.execute("for i in range(100000): print(i)")
+            finally:
+                tool.close()
+            self.assertTrue(result["success"], backend)
+            self.assertTrue(result["truncated"])
+            self.assertEqual(result["output_bytes"], 588890)
+            self.assertEqual(result["output_dropped_bytes"], 588740)
+            self.assertTrue(result["output"].startswith("0\n1\n"))
+            self.assertTrue(result["output"].endswith("99999\n"))
+            self.assertLess(len(result["output"]), 300)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from proof_tool import JSONLogger, LogWriter, recover_journal
+from tests.helpers import ProofsDirTestCase
+
+
+class TestJSONLoggerJournal(ProofsDirTestCase):
+    def _read_lines(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            JSONLogger("p1", "claim", mode="bogus")
+
+    def test_journal_appends_one_line_per_event(self):
+        logger = JSONLogger("p1", "claim", mode="journal")
+        logger._init_log()
+        logger.log_event("model_output", {"content": {"step": 1}})
+        logger.log_event("tool_result", {"tool_name": "web_search"})
+
+        lines = self._read_lines(logger.journal_file)
+        self.assertEqual(lines[0]["proof_id"], "p1")
+        self.assertEqual([l["type"] for l in lines[1:]], ["model_output", "tool_result"])
+
+        with open(logger.log_file, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["events"], [])
+
+    def test_set_metadata_compacts_to_document(self):
+        logger = JSONLogger("p2", "claim", mode="journal")
+        logger._init_log()
+        logger.log_event("model_output", {"content": {"verdict": "PROVEN"}})
+        logger.set_metadata({"time_seconds": 1.0})
+
+        self.assertFalse(os.path.exists(logger.journal_file))
+        with open(logger.log_file, "r", encoding="utf-8") as f:
+            log_data = json.load(f)
+        self.assertEqual(log_data["proof_id"], "p2")
+        self.assertEqual(log_data["claim"], "claim")
+        self.assertEqual(log_data["events"], [{"type": "model_output", "content": {"verdict": "PROVEN"}}])
+        self.assertEqual(log_data["metadata"], {"time_seconds": 1.0})
+
+    def test_document_and_journal_produce_same_document(self):
+        outputs = []
+        for mode in JSONLogger.MODES:
+            logger = JSONLogger(f"p_{mode}", "claim", mode=mode)
+            logger._init_log()
+            logger.log_event("tool_result", {"duration": 0.1})
+            logger.set_metadata({"cost": 0})
+            with open(logger.log_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            outputs.append((data["events"], data["metadata"]))
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_recover_journal(self):
+        logger = JSONLogger("p3", "claim", mode="journal")
+        logger._init_log()
+        logger.log_event("model_output", {"content": {}})
+        logger._journal.close()
+
+        log_file = recover_journal(logger.journal_file)
+        self.assertEqual(log_file, logger.log_file)
+        with open(log_file, "r", encoding="utf-8") as f:
+            log_data = json.load(f)
+        self.assertEqual(len(log_data["events"]), 1)
+        self.assertIsNone(log_data["metadata"])
+
+    def test_recover_journal_with_torn_header(self):
+        logger = JSONLogger("p4", "claim", mode="journal")
+        with open(logger.journal_file, "w", encoding="utf-8") as f:
+            f.write('{"proof_id": "p4", "cla')
+
+        log_file = recover_journal(logger.journal_file)
+        self.assertEqual(log_file, logger.log_file)
+        self.assertFalse(os.path.exists(logger.journal_file))
+        with open(log_file, "r", encoding="utf-8") as f:
+            log_data = json.load(f)
+        self.assertEqual(log_data["proof_id"], "p4")
+        self.assertEqual(log_data["events"], [])
+
+
+class TestLogWriter(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmpdir.name, "writer.jsonl")
+
+    def _read_lines(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_invalid_durability(self):
+        with self.assertRaises(ValueError):
+            LogWriter(self.path, durability="sometimes")
+        with self.assertRaises(ValueError):
+            JSONLogger("p1", "claim", durability="event")
+
+    def test_all_policies_drain_on_close(self):
+        for durability in LogWriter.DURABILITY_POLICIES:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            writer = LogWriter(self.path, durability=durability, flush_interval_ms=10)
+            for i in range(50):
+                self.assertTrue(writer.write({"i": i}))
+            writer.close()
+            self.assertEqual([r["i"] for r in self._read_lines()], list(range(50)))
+            self.assertEqual(writer.stats()["written_events"], 50)
+
+    def test_late_events_are_counted(self):
+        writer = LogWriter(self.path, durability="event")
+        writer.write({"i": 0})
+        writer.close()
+        self.assertFalse(writer.write({"i": 1}))
+        self.assertEqual(writer.stats()["late_events"], 1)
+        self.assertEqual(len(self._read_lines()), 1)
+
+    def test_full_queue_drops_events(self):
+        writer = LogWriter(self.path, durability="completion", max_queue=1)
+        accepted = sum(writer.write({"i": i}) for i in range(1000))
+        writer.close()
+        stats = writer.stats()
+        self.assertEqual(stats["dropped_events"], 1000 - accepted)
+        self.assertEqual(stats["written_events"], accepted)
+
+    def test_buffered_logger_compacts_with_writer_stats(self):
+        logger = JSONLogger("p4", "claim", mode="journal", durability="interval")
+        logger._init_log()
+        for i in range(20):
+            logger.log_event("tool_result", {"i": i})
+        logger.set_metadata({"time_seconds": 2.0})
+
+        self.assertFalse(os.path.exists(logger.journal_file))
+        with open(logger.log_file, "r", encoding="utf-8") as f:
+            log_data = json.load(f)
+        self.assertEqual(len(log_data["events"]), 20)
+        self.assertEqual(log_data["metadata"]["time_seconds"], 2.0)
+        self.assertEqual(log_data["metadata"]["log_writer"]["written_events"], 21)
+        self.assertEqual(log_data["metadata"]["log_writer"]["dropped_events"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
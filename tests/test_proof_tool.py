@@ -3,19 +3,39 @@ import sys
 import os
 import json
 import logging
-from unittest.mock import Mock
+import threading
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import Mock, AsyncMock, patch
+from openai import APITimeoutError
 from typing import Dict, Any
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from proof_tool import ProofTool, _strip_markdown_code_fences
+import proof_tool
+from proof_tool import (
+    ProofTool,
+    ProofSession,
+    ProofBudget,
+    IncrementalJSONParser,
+    digest_tool_result,
+    estimate_tokens,
+    get_tool_schema,
+    _strip_markdown_code_fences,
+)
+from tests.helpers import ProofsDirTestCase, mock_completion
+
+USAGE = SimpleNamespace(prompt_tokens=10, completion_tokens=5, cost=None, prompt_tokens_details=None)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class TestProofAgentUnit(unittest.TestCase):
+class TestProofAgentUnit(ProofsDirTestCase):
     def setUp(self):
+        super().setUp()
         api_key = os.getenv("OPENROUTER_API_KEY", "test_key")
         self.agent = ProofTool(api_key)
 
@@ -167,33 +187,31 @@ class TestProofAgentUnit(unittest.TestCase):
                 }
             ]
         }
-        messages = []
-        tools_used = set()
-        handled = self.agent._handle_embedded_tool_calls(result, messages, tools_used)
+        session = ProofSession("Test claim")
+        handled = self.agent._handle_embedded_tool_calls(result, session)
         self.assertTrue(handled)
-        self.assertIn("python_execute", tools_used)
-        self.assertGreater(len(messages), 0)
+        self.assertIn("python_execute", session.tools_used)
+        self.assertGreater(len(session.messages), 0)
 
     def test_handle_embedded_tool_calls_invalid_structure(self):
         result = {
             "tool_calls": ["invalid"]
         }
-        messages = []
-        tools_used = set()
-        handled = self.agent._handle_embedded_tool_calls(result, messages, tools_used)
+        session = ProofSession("Test claim")
+        handled = self.agent._handle_embedded_tool_calls(result, session)
         self.assertTrue(handled)
         logger.info("Invalid embedded tool call structure handled")
 
     def test_handle_embedded_tool_calls_no_tool_calls(self):
         result = {}
-        messages = []
-        tools_used = set()
-        handled = self.agent._handle_embedded_tool_calls(result, messages, tools_used)
+        session = ProofSession("Test claim")
+        handled = self.agent._handle_embedded_tool_calls(result, session)
         self.assertFalse(handled)
 
 
-class TestProofAgentEdgeCases(unittest.TestCase):
+class TestProofAgentEdgeCases(ProofsDirTestCase):
     def setUp(self):
+        super().setUp()
         api_key = os.getenv("OPENROUTER_API_KEY", "test_key")
         self.agent = ProofTool(api_key)
 
@@ -299,6 +317,835 @@ class TestProofAgentEdgeCases(unittest.TestCase):
         logger.info(f"Tool calls handled: {metadata.get('tools_used')}")
 
 
+class TestConcurrentToolCalls(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key", tool_concurrency={"web_search": 4, "python_execute": 1})
+        self.active = {"web_search": 0, "python_execute": 0}
+        self.peak = {"web_search": 0, "python_execute": 0}
+        self.lock = threading.Lock()
+
+        def fake_execute_tool(tool_call, session=None):
+            name = tool_call["function"]["name"]
+            with self.lock:
+                self.active[name] += 1
+                self.peak[name] = max(self.peak[name], self.active[name])
+            delay = json.loads(tool_call["function"]["arguments"])["delay"]
+            time.sleep(delay)
+            with self.lock:
+                self.active[name] -= 1
+            return {"tool_call_id": tool_call["id"], "tool_name": name}
+
+        self.agent._execute_tool = fake_execute_tool
+        self.session = ProofSession("Test claim", logger=Mock())
+
+    def _call(self, call_id, name, delay):
+        return {
+            "id": call_id,
+            "function": {"name": name, "arguments": json.dumps({"delay": delay})},
+        }
+
+    def test_fan_out_preserves_order(self):
+        result = {"tool_calls": [
+            self._call("slow", "web_search", 0.3),
+            self._call("fast", "web_search", 0.05),
+            self._call("mid", "web_search", 0.15),
+        ]}
+        start = time.time()
+        handled = self.agent._handle_embedded_tool_calls(result, self.session)
+        elapsed = time.time() - start
+
+        self.assertTrue(handled)
+        self.assertEqual([m["tool_call_id"] for m in self.session.messages], ["slow", "fast", "mid"])
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(self.peak["web_search"], 3)
+
+        batch = [c for c in self.session.logger.log_event.call_args_list if c.args[0] == "tool_batch"]
+        self.assertEqual(len(batch), 1)
+        data = batch[0].args[1]
+        self.assertEqual(data["tool_calls"], 3)
+        self.assertGreaterEqual(data["tool_time"], 0.5)
+        self.assertLess(data["wall_time"], data["tool_time"])
+
+    def test_per_tool_concurrency_limit(self):
+        result = {"tool_calls": [
+            self._call("a", "python_execute", 0.05),
+            self._call("b", "python_execute", 0.05),
+            self._call("c", "python_execute", 0.05),
+        ]}
+        self.agent._handle_embedded_tool_calls(result, self.session)
+        self.assertEqual(self.peak["python_execute"], 1)
+        self.assertEqual([m["tool_call_id"] for m in self.session.messages], ["a", "b", "c"])
+
+
+class TestProofSessionNamespace(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key")
+
+    def test_namespace_is_scoped_to_proof(self):
+        tool_turn = json.dumps({"tool_calls": [{
+            "id": "c1",
+            "function": {"name": "python_execute", "arguments": json.dumps({"code": "secret = 42"})},
+        }]})
+        probe_turn = json.dumps({"tool_calls": [{
+            "id": "c2",
+            "function": {"name": "python_execute", "arguments": json.dumps({"code": "print(secret)"})},
+        }]})
+        verdict = json.dumps({"verdict": "PROVEN"})
+        self.agent.client.chat.completions.create = Mock(side_effect=[
+            mock_completion(tool_turn), mock_completion(verdict),
+            mock_completion(probe_turn), mock_completion(verdict),
+        ])
+
+        _, metadata = self.agent.prove_claim("first")
+        self.assertIn("python_namespace_bytes", metadata)
+        self.assertGreater(metadata["python_namespace_bytes"], 0)
+        self.assertEqual(self.agent.tools["python_execute"]._namespaces, {})
+
+        self.agent.prove_claim("second")
+        messages = self.agent.client.chat.completions.create.call_args.kwargs["messages"]
+        probe = json.loads([m for m in messages if m["role"] == "tool"][-1]["content"])
+        self.assertFalse(probe["success"])
+        self.assertIn("secret", probe["error"])
+
+
+class TestAsyncProveClaim(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key")
+
+    def _turns(self, claim):
+        tool_turn = json.dumps({"tool_calls": [
+            {"id": "s1", "function": {"name": "web_search", "arguments": json.dumps({"query": claim})}},
+            {"id": "p1", "function": {"name": "python_execute", "arguments": json.dumps({"code": f"print({claim!r})"})}},
+        ]})
+        return [mock_completion(tool_turn, USAGE), mock_completion(json.dumps({"verdict": "PROVEN", "claim": claim}), USAGE)]
+
+    def test_aprove_claim_matches_sync_shape(self):
+        self.agent.async_client.chat.completions.create = AsyncMock(side_effect=self._turns("one"))
+        self.agent.tools["web_search"].asearch = AsyncMock(return_value={"query": "one", "results": []})
+
+        content, metadata = asyncio.run(self.agent.aprove_claim("one"))
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual(metadata["tokens"], {"prompt": 20, "completion": 10, "total": 30})
+        self.assertIn("python_namespace_bytes", metadata)
+        self.assertEqual(metadata["tools_used"], ["python_execute", "web_search"])
+
+        messages = self.agent.async_client.chat.completions.create.call_args.kwargs["messages"]
+        tool_messages = [json.loads(m["content"]) for m in messages if m["role"] == "tool"]
+        self.assertEqual([m["tool_call_id"] for m in tool_messages], ["s1", "p1"])
+        self.assertEqual(tool_messages[1]["output"], "one\n")
+        self.assertEqual(self.agent.tools["python_execute"]._namespaces, {})
+
+    def test_concurrent_proofs_keep_separate_logs(self):
+        claims = [f"claim{i}" for i in range(5)]
+        responses = {claim: iter(self._turns(claim)) for claim in claims}
+
+        async def create(**kwargs):
+            await asyncio.sleep(0.01)
+            return next(responses[kwargs["messages"][1]["content"]])
+
+        async def asearch(query, max_results=None):
+            await asyncio.sleep(0.05)
+            return {"query": query, "results": []}
+
+        self.agent.async_client.chat.completions.create = create
+        self.agent.tools["web_search"].asearch = asearch
+
+        async def run_all():
+            return await asyncio.gather(*(self.agent.aprove_claim(claim) for claim in claims))
+
+        for claim, (content, _) in zip(claims, asyncio.run(run_all())):
+            self.assertEqual(content["claim"], claim)
+
+        logs = {}
+        for name in os.listdir(self.tmpdir.name):
+            with open(os.path.join(self.tmpdir.name, name), encoding="utf-8") as f:
+                log = json.load(f)
+            logs[log["claim"]] = log
+        self.assertEqual(len(logs), len(claims))
+
+        for claim in claims:
+            log = logs[claim]
+            results = [e for e in log["events"] if e["type"] == "tool_result"]
+            self.assertEqual({e["tool_name"] for e in results}, {"web_search", "python_execute"})
+            python_result = [e for e in results if e["tool_name"] == "python_execute"][0]
+            self.assertEqual(python_result["result"]["output"], f"{claim}\n")
+
+    def test_concurrent_proofs_respect_search_limit(self):
+        agent = ProofTool("test_key", tool_concurrency={"web_search": 2})
+        claims = [f"claim{i}" for i in range(6)]
+        responses = {claim: iter(self._turns(claim)) for claim in claims}
+        active = [0, 0]
+
+        async def create(**kwargs):
+            return next(responses[kwargs["messages"][1]["content"]])
+
+        async def asearch(query, max_results=None):
+            active[0] += 1
+            active[1] = max(active)
+            await asyncio.sleep(0.02)
+            active[0] -= 1
+            return {"query": query, "results": []}
+
+        agent.async_client.chat.completions.create = create
+        agent.tools["web_search"].asearch = asearch
+
+        async def run_all():
+            return await asyncio.gather(*(agent.aprove_claim(claim) for claim in claims))
+
+        asyncio.run(run_all())
+        self.assertEqual(active[1], 2)
+
+    def test_failed_stream_cancels_dispatched_tools(self):
+        agent = ProofTool("test_key", stream=True)
+        state = {"cancelled": False}
+        tool_turn = json.dumps({"tool_calls": [
+            {"id": "s1", "function": {"name": "web_search", "arguments": json.dumps({"query": "q"})}},
+        ], "evidence": []})
+
+        async def asearch(query, max_results=None):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+            return {"query": query, "results": []}
+
+        async def astream():
+            chunk = Mock(usage=None)
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = tool_turn
+            yield chunk
+            await asyncio.sleep(0.01)
+            raise ConnectionError("stream dropped")
+
+        async def create(**kwargs):
+            return astream()
+
+        agent.async_client.chat.completions.create = create
+        agent.tools["web_search"].asearch = asearch
+
+        async def run():
+            content, _ = await agent.aprove_claim("claim")
+            return content, state["cancelled"]
+
+        content, cancelled = asyncio.run(run())
+        self.assertIn("stream dropped", content["error"])
+        self.assertTrue(cancelled)
+
+
+class TestConcurrentProofSessions(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key", tool_concurrency={"python_execute": 4})
+
+    def test_threads_share_one_instance(self):
+        claims = [f"claim{i}" for i in range(6)]
+        lock = threading.Lock()
+        turns = {}
+        for claim in claims:
+            code = f"import time\nvalue = {claim!r}\nfor _ in range(3):\n    time.sleep(0.01)\n    print(value)"
+            tool_turn = json.dumps({"tool_calls": [
+                {"id": "p1", "function": {"name": "python_execute", "arguments": json.dumps({"code": code})}},
+            ]})
+            turns[claim] = iter([mock_completion(tool_turn, USAGE), mock_completion(json.dumps({"verdict": "PROVEN"}), USAGE)])
+
+        def create(**kwargs):
+            time.sleep(0.01)
+            with lock:
+                return next(turns[kwargs["messages"][1]["content"]])
+
+        self.agent.client.chat.completions.create = create
+        with ThreadPoolExecutor(max_workers=len(claims)) as pool:
+            results = list(pool.map(self.agent.prove_claim, claims))
+
+        for _, metadata in results:
+            self.assertEqual(metadata["tokens"]["total"], 30)
+            self.assertEqual(metadata["tools_used"], ["python_execute"])
+
+        logs = {}
+        for name in os.listdir(self.tmpdir.name):
+            with open(os.path.join(self.tmpdir.name, name), encoding="utf-8") as f:
+                log = json.load(f)
+            logs[log["claim"]] = log
+        self.assertEqual(set(logs), set(claims))
+        for claim, log in logs.items():
+            results = [e for e in log["events"] if e["type"] == "tool_result"]
+            self.assertEqual(len(results), 1)
+            self.assertEqual(results[0]["result"]["output"], f"{claim}\n" * 3)
+
+    def test_python_runs_across_sessions_but_not_within_one(self):
+        agent = ProofTool("test_key")
+        self.assertEqual(agent._tool_concurrency["python_execute"], 2)
+        execute = agent.tools["python_execute"].execute
+        lock = threading.Lock()
+        active = {}
+        peaks = {"total": 0, "session": 0}
+
+        def tracking(code, session_id=None):
+            with lock:
+                active[session_id] = active.get(session_id, 0) + 1
+                peaks["total"] = max(peaks["total"], sum(active.values()))
+                peaks["session"] = max(peaks["session"], active[session_id])
+            try:
+                time.sleep(0.05)
+                return execute(code, session_id=session_id)
+            finally:
+                with lock:
+                    active[session_id] -= 1
+
+        agent.tools["python_execute"].execute = tracking
+        calls = [
+            {"id": f"p{i}", "function": {"name": "python_execute", "arguments": json.dumps({"code": f"x = {i}"})}}
+            for i in range(3)
+        ]
+        tool_turn = json.dumps({"tool_calls": calls})
+        turns = {claim: iter([mock_completion(tool_turn, USAGE), mock_completion(json.dumps({"verdict": "PROVEN"}), USAGE)])
+                 for claim in ("a", "b")}
+
+        def create(**kwargs):
+            with lock:
+                return next(turns[kwargs["messages"][1]["content"]])
+
+        agent.client.chat.completions.create = create
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(agent.prove_claim, ["a", "b"]))
+        self.assertEqual(peaks, {"total": 2, "session": 1})
+
+
+class TestPromptCaching(ProofsDirTestCase):
+    def _usage(self, cached_tokens):
+        return SimpleNamespace(
+            prompt_tokens=1000, completion_tokens=50, cost=None, prompt_tokens_details={"cached_tokens": cached_tokens}
+        )
+
+    def test_invalid_prompt_mode(self):
+        with self.assertRaises(ValueError):
+            ProofTool("test_key", prompt_mode="bogus")
+
+    def test_static_prefix_is_byte_stable(self):
+        first = ProofTool("test_key", prompt_mode="cached")
+        later = proof_tool.datetime(2030, 1, 2, 3, 4, 5)
+        with patch.object(proof_tool, "datetime") as fake_datetime:
+            fake_datetime.now.return_value = later
+            second = ProofTool("test_key", prompt_mode="cached")
+            messages = second._system_messages()
+
+        self.assertEqual(first.static_prompt, second.static_prompt)
+        self.assertNotIn("{current_date}", second.static_prompt)
+        self.assertEqual(messages[0]["content"][0]["text"], first.static_prompt)
+        self.assertEqual(messages[0]["content"][0]["cache_control"], {"type": "ephemeral"})
+        self.assertIn("2030-01-02", messages[1]["content"])
+        self.assertIn("03:04:05", messages[1]["content"])
+        self.assertLess(len(messages[1]["content"]), 100)
+
+    def test_cached_tokens_recorded(self):
+        agent = ProofTool("test_key", prompt_mode="cached")
+        tool_turn = json.dumps({"tool_calls": [{
+            "id": "c1", "function": {"name": "python_execute", "arguments": json.dumps({"code": "x = 1"})},
+        }]})
+        agent.client.chat.completions.create = Mock(side_effect=[
+            mock_completion(tool_turn, self._usage(0)),
+            mock_completion(json.dumps({"verdict": "PROVEN"}), self._usage(900)),
+        ])
+        _, metadata = agent.prove_claim("claim")
+        self.assertEqual(metadata["tokens"]["cached"], 900)
+        messages = agent.client.chat.completions.create.call_args.kwargs["messages"]
+        self.assertEqual([m["role"] for m in messages[:3]], ["system", "system", "user"])
+
+    def test_inline_mode_unchanged(self):
+        agent = ProofTool("test_key")
+        messages = agent._system_messages()
+        self.assertEqual(messages, [{"role": "system", "content": agent.system_prompt}])
+
+
+class TestContextCompaction(ProofsDirTestCase):
+    SEARCH_RESULT = {
+        "tool_name": "web_search",
+        "tool_call_id": "s1",
+        "query": "q",
+        "content": "summary " * 500,
+        "results": [
+            {"title": f"Source {i}", "url": f"https://example.com/{i}", "content": "text " * 400, "type": "citation"}
+            for i in range(5)
+        ],
+        "latency_seconds": 1.2,
+    }
+
+    def test_digest_tool_result(self):
+        digest = digest_tool_result(self.SEARCH_RESULT)
+        self.assertTrue(digest["digest"])
+        self.assertEqual(digest["results"][0]["url"], "https://example.com/0")
+        self.assertLess(len(digest["results"][0]["snippet"]), 350)
+        self.assertLess(len(json.dumps(digest)), len(json.dumps(self.SEARCH_RESULT)) / 4)
+
+        digest = digest_tool_result({
+            "tool_name": "python_execute", "code": "x" * 5000, "success": True, "output": "1\n" * 5000,
+        })
+        self.assertNotIn("code", digest)
+        self.assertTrue(digest["success"])
+        self.assertLess(len(digest["output"]), 600)
+
+    def test_compaction_keeps_latest_results(self):
+        agent = ProofTool("test_key", context_token_budget=3000)
+        agent.tools["web_search"].search = Mock(side_effect=lambda query, max_results=None: dict(self.SEARCH_RESULT))
+        turns = [
+            json.dumps({"tool_calls": [{"id": f"s{i}", "function": {"name": "web_search", "arguments": json.dumps({"query": "q"})}}]})
+            for i in range(3)
+        ] + [json.dumps({"verdict": "PROVEN"})]
+        sent = []
+
+        def create(**kwargs):
+            sent.append(list(kwargs["messages"]))
+            return mock_completion(turns[len(sent) - 1])
+
+        agent.client.chat.completions.create = create
+        _, metadata = agent.prove_claim("claim")
+
+        context = metadata["context"]
+        self.assertEqual(context["token_budget"], 3000)
+        self.assertEqual(len(context["iterations"]), 4)
+        self.assertGreater(context["compacted_messages"], 0)
+        last = context["iterations"][-1]
+        self.assertLess(last["after_tokens"], last["before_tokens"])
+
+        tool_messages = [json.loads(m["content"]) for m in sent[-1] if m["role"] == "tool"]
+        self.assertTrue(tool_messages[0].get("digest"))
+        self.assertNotIn("digest", tool_messages[-1])
+        self.assertLess(estimate_tokens(sent[-1]), last["before_tokens"])
+
+    def test_no_budget_leaves_messages_alone(self):
+        agent = ProofTool("test_key")
+        session = ProofSession("claim")
+        session.messages = [
+            {"role": "tool", "tool_call_id": "s1", "content": json.dumps(self.SEARCH_RESULT)},
+            {"role": "assistant", "content": "{}"},
+        ]
+        agent._compact_context(session, 1)
+        self.assertEqual(json.loads(session.messages[0]["content"]), self.SEARCH_RESULT)
+        self.assertEqual(session.context_sizes, [])
+
+
+class TestProofBudget(ProofsDirTestCase):
+    TOOL_TURN = json.dumps({"tool_calls": [{"id": "s", "function": {"name": "web_search", "arguments": json.dumps({"query": "q"})}}], "verdict": None})
+
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key")
+        self.agent.tools["web_search"].search = Mock(return_value={"results": []})
+        self.sent = []
+
+    def _script(self, turns):
+        def create(**kwargs):
+            self.sent.append(list(kwargs["messages"]))
+            content = turns[min(len(self.sent), len(turns)) - 1]
+            return mock_completion(
+                content, SimpleNamespace(prompt_tokens=400, completion_tokens=100, cost=None, prompt_tokens_details=None)
+            )
+        self.agent.client.chat.completions.create = create
+
+    def test_check(self):
+        budget = ProofBudget(deadline_seconds=10, max_cost_usd=1.0)
+        self.assertEqual(budget.limits(), {"deadline": 10, "cost": 1.0})
+        self.assertEqual(budget.check({"deadline": 1, "cost": 0.1}, 1), (None, False))
+        self.assertEqual(budget.check({"deadline": 9, "cost": 0.1}, 1), ("deadline", False))
+        self.assertEqual(budget.check({"deadline": 6, "cost": 0.1}, 2), (None, False))
+        self.assertEqual(budget.check({"deadline": 6, "cost": 0.1}, 1), ("deadline", False))
+        self.assertEqual(budget.check({"deadline": 1, "cost": 1.5}, 1), ("cost", True))
+
+    def test_token_budget_forces_final_verdict(self):
+        self._script([self.TOOL_TURN, self.TOOL_TURN, json.dumps({"verdict": "UNSUPPORTED", "tool_calls": []})])
+        content, metadata = self.agent.prove_claim("claim", max_tokens=1200)
+
+        self.assertEqual(content["verdict"], "UNSUPPORTED")
+        self.assertEqual(len(self.sent), 3)
+        self.assertEqual(self.sent[-1][-1]["role"], "user")
+        self.assertIn("tokens budget", self.sent[-1][-1]["content"])
+        self.assertEqual(metadata["budget"], {
+            "limits": {"tokens": 1200},
+            "stopped_by": "tokens",
+            "forced_verdict": True,
+        })
+
+    def test_forced_turn_without_verdict_stops(self):
+        self._script([self.TOOL_TURN])
+        content, metadata = self.agent.prove_claim("claim", max_tokens=600)
+
+        self.assertEqual(content["error"], "No verdict reached")
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.agent.tools["web_search"].search.call_count, 1)
+        self.assertEqual(metadata["budget"]["stopped_by"], "tokens")
+
+    def test_async_deadline_exhausted(self):
+        self._script([self.TOOL_TURN])
+        self.agent.async_client.chat.completions.create = AsyncMock(
+            side_effect=lambda **kwargs: self.agent.client.chat.completions.create(**kwargs)
+        )
+        content, metadata = asyncio.run(self.agent.aprove_claim("claim", deadline_seconds=1e-9))
+
+        self.assertEqual(content["error"], "No verdict reached")
+        self.assertEqual(self.sent, [])
+        self.assertEqual(metadata["budget"]["stopped_by"], "deadline")
+        self.assertFalse(metadata["budget"]["forced_verdict"])
+
+    def test_no_budget_no_metadata(self):
+        self._script([json.dumps({"verdict": "PROVEN"})])
+        _, metadata = self.agent.prove_claim("claim")
+        self.assertNotIn("budget", metadata)
+
+    def test_slow_model_call_is_cut_at_deadline(self):
+        def create(**kwargs):
+            timeout = kwargs.get("timeout")
+            time.sleep(5 if timeout is None else min(5, timeout))
+            raise APITimeoutError(request=Mock())
+
+        self.agent.client.chat.completions.create = create
+        start = time.monotonic()
+        content, metadata = self.agent.prove_claim("claim", deadline_seconds=0.3)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(content["error"], "No verdict reached")
+        self.assertEqual(metadata["budget"]["stopped_by"], "deadline")
+
+    def test_slow_tool_is_cut_at_deadline(self):
+        tool_turn = json.dumps({"tool_calls": [
+            {"id": "p1", "function": {"name": "python_execute", "arguments": json.dumps({"code": "import time; time.sleep(3)"})}},
+        ]})
+        self._script([tool_turn, json.dumps({"verdict": "PROVEN"})])
+        start = time.monotonic()
+        content, metadata = self.agent.prove_claim("claim", deadline_seconds=0.5)
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(metadata["budget"]["stopped_by"], "deadline")
+        self.assertEqual(len(self.sent), 1)
+
+    def test_model_supplied_timeout_is_ignored(self):
+        code_call = {"code": "print(1)", "timeout": "forever"}
+        self._script([
+            json.dumps({"tool_calls": [{"id": "p1", "function": {"name": "python_execute", "arguments": json.dumps(code_call)}}]}),
+            json.dumps({"verdict": "PROVEN"}),
+        ])
+        self.agent.prove_claim("claim")
+        tool_result = json.loads([m for m in self.sent[-1] if m["role"] == "tool"][0]["content"])
+        self.assertTrue(tool_result["success"])
+        self.assertEqual(tool_result["output"], "1\n")
+
+    def test_budget_is_operator_config_only(self):
+        properties = get_tool_schema()["function"]["parameters"]["properties"]
+        self.assertNotIn("deadline_seconds", properties)
+        self.assertNotIn("max_cost_usd", properties)
+
+        self.agent = ProofTool("test_key", budget=ProofBudget(deadline_seconds=1e-9))
+        self._script([self.TOOL_TURN])
+        content, metadata = self.agent.prove_claim("claim")
+        self.assertEqual(metadata["budget"]["stopped_by"], "deadline")
+        self.assertEqual(metadata["budget"]["limits"], {"deadline": 1e-9})
+
+
+class TestRepeatedToolCalls(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key")
+        self.agent.tools["web_search"].search = Mock(side_effect=lambda query: {"query": query, "results": []})
+        self.sent = []
+
+    def _turn(self, i, name, **arguments):
+        return json.dumps({
+            "tool_calls": [{"id": f"c{i}", "function": {"name": name, "arguments": json.dumps(arguments)}}],
+            "verdict": None,
+        })
+
+    def _script(self, turns):
+        def create(**kwargs):
+            self.sent.append(list(kwargs["messages"]))
+            content = turns[min(len(self.sent), len(turns)) - 1]
+            return mock_completion(content)
+        self.agent.client.chat.completions.create = create
+
+    def test_identical_search_is_reused(self):
+        self._script([
+            self._turn(1, "web_search", query="q"),
+            self._turn(2, "web_search", query="q"),
+            json.dumps({"verdict": "PROVEN"}),
+        ])
+        content, metadata = self.agent.prove_claim("claim")
+
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual(self.agent.tools["web_search"].search.call_count, 1)
+        tool_results = [json.loads(m["content"]) for m in self.sent[-1] if m["role"] == "tool"]
+        self.assertNotIn("reused", tool_results[0])
+        self.assertTrue(tool_results[1]["reused"])
+        self.assertEqual(tool_results[1]["tool_call_id"], "c2")
+        self.assertEqual(tool_results[1]["reused_from"], "c1")
+        self.assertEqual(metadata["repeats"], {"reused_tool_calls": 1, "corrective_turns": 0, "stopped_by": None})
+
+    def test_iterations_without_streaming_have_no_ttft(self):
+        self._script([
+            self._turn(1, "web_search", query="q"),
+            json.dumps({"verdict": "PROVEN"}),
+        ])
+        content, metadata = self.agent.prove_claim("claim")
+        first, second = metadata["iterations"]
+        self.assertIsNone(first["ttft_seconds"])
+        self.assertIsNotNone(first["model_seconds"])
+        self.assertEqual(first["tool_calls"], 1)
+        self.assertEqual(second["reasoning_tokens"], 0)
+
+    def test_python_reuse_requires_unchanged_namespace(self):
+        self._script([
+            self._turn(1, "python_execute", code="x = 1"),
+            self._turn(2, "python_execute", code="x = 1"),
+            self._turn(3, "python_execute", code="x += 1"),
+            self._turn(4, "python_execute", code="x = 1"),
+            json.dumps({"verdict": "PROVEN"}),
+        ])
+        with patch.object(
+            self.agent.tools["python_execute"], "execute",
+            wraps=self.agent.tools["python_execute"].execute,
+        ) as execute:
+            self.agent.prove_claim("claim")
+        self.assertEqual([c.kwargs["code"] for c in execute.call_args_list], ["x = 1", "x += 1", "x = 1"])
+
+    def test_repeated_calls_get_corrective_turn_then_stop(self):
+        self._script([self._turn(1, "web_search", query="q")])
+        content, metadata = self.agent.prove_claim("claim")
+
+        self.assertEqual(content["error"], "No verdict reached")
+        self.assertEqual(len(self.sent), 5)
+        self.assertEqual(self.sent[3][-1]["role"], "user")
+        self.assertIn("repeated earlier calls", self.sent[3][-1]["content"])
+        self.assertEqual(metadata["repeats"]["corrective_turns"], 1)
+        self.assertEqual(metadata["repeats"]["stopped_by"], "repeated_tool_calls")
+
+    def test_parse_failures_get_corrective_turn(self):
+        self._script(["not json", "still not json", json.dumps({"verdict": "DISPROVEN"})])
+        content, metadata = self.agent.prove_claim("claim")
+
+        self.assertEqual(content["verdict"], "DISPROVEN")
+        self.assertIn("not valid JSON", self.sent[2][-1]["content"])
+        self.assertEqual(metadata["repeats"]["corrective_turns"], 1)
+        self.assertIsNone(metadata["repeats"]["stopped_by"])
+
+
+class TestIncrementalJSONParser(unittest.TestCase):
+    DOC = {
+        "claim": "x",
+        "current_step": "Testing \"quoted\" step \u00e9\n",
+        "tool_calls": [
+            {"id": "a", "function": {"name": "web_search", "arguments": "{\"query\": \"q {[\"}"}},
+            {"id": "b", "function": {"name": "python_execute", "arguments": "{}"}},
+        ],
+        "evidence": [{"k": [1, 2], "tool_calls": [{"id": "nested"}]}],
+        "verdict": None,
+        "reasoning": "because \\ slash",
+    }
+
+    def test_elements_and_partials(self):
+        text = "```json\n" + json.dumps(self.DOC, indent=2) + "\n```"
+        parser = IncrementalJSONParser()
+        elements = []
+        updates = []
+        for i in range(0, len(text), 3):
+            found, changed = parser.feed(text[i:i + 3])
+            elements.extend((index, element["id"], i) for index, element in found)
+            updates.extend(changed.items())
+        self.assertEqual([(index, id_) for index, id_, _ in elements], [(0, "a"), (1, "b")])
+        self.assertLess(elements[-1][2], text.index('"evidence"'))
+        self.assertEqual(parser.partials["current_step"], self.DOC["current_step"])
+        self.assertEqual(parser.partials["reasoning"], self.DOC["reasoning"])
+        steps = [text for field, text in updates if field == "current_step"]
+        self.assertGreater(len(steps), 3)
+        for step in steps:
+            self.assertTrue(self.DOC["current_step"].startswith(step))
+
+    def test_element_index_counts_non_object_items(self):
+        text = json.dumps({"tool_calls": ["junk", [1, 2], {"id": "p1", "function": {"name": "x"}}, 3, {"id": "p2"}]})
+        elements, _ = IncrementalJSONParser().feed(text)
+        self.assertEqual([(index, element["id"]) for index, element in elements], [(2, "p1"), (4, "p2")])
+
+
+class TestStreamingProveClaim(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key", stream=True)
+        self.events = []
+
+    def _chunk(self, content=None, usage=None):
+        chunk = Mock()
+        chunk.usage = usage
+        if content is None:
+            chunk.choices = []
+        else:
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = content
+        return chunk
+
+    def _chunks(self, doc):
+        text = json.dumps(doc)
+        chunks = [self._chunk(text[i:i + 5]) for i in range(0, len(text), 5)]
+        chunks.append(self._chunk(usage=Mock(prompt_tokens=10, completion_tokens=5, cost=None)))
+        return chunks
+
+    def _turns(self):
+        tool_turn = {
+            "current_step": "Checking arithmetic",
+            "tool_calls": [{"id": "p1", "function": {"name": "python_execute", "arguments": json.dumps({"code": "print(6 * 7)"})}}],
+            "evidence": [],
+            "verdict": None,
+            "reasoning": "A long explanation " * 20,
+        }
+        return [self._chunks(tool_turn), self._chunks({"verdict": "PROVEN", "reasoning": "done"})]
+
+    def _stream(self, chunks):
+        for chunk in chunks:
+            self.events.append("chunk")
+            yield chunk
+
+    def test_tool_calls_dispatch_before_stream_ends(self):
+        turns = iter(self._turns())
+        self.agent.client.chat.completions.create = Mock(side_effect=lambda **kwargs: self._stream(next(turns)))
+        original = self.agent._run_limited_tool
+
+        def tracking(tool_call, session=None):
+            self.events.append("tool")
+            return original(tool_call, session)
+
+        self.agent._run_limited_tool = tracking
+        partials = []
+        content, metadata = self.agent.prove_claim("6 * 7 = 42", on_partial=lambda field, text: partials.append((field, text)))
+
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual(metadata["tokens"]["total"], 30)
+        first_tool = self.events.index("tool")
+        self.assertIn("chunk", self.events[first_tool:first_tool + 50])
+        self.assertIn(("current_step", "Checking arithmetic"), partials)
+        self.assertEqual(partials[-1], ("reasoning", "done"))
+
+        kwargs = self.agent.client.chat.completions.create.call_args.kwargs
+        self.assertTrue(kwargs["stream"])
+        tool_message = [m for m in kwargs["messages"] if m["role"] == "tool"][0]
+        self.assertEqual(json.loads(tool_message["content"])["output"], "42\n")
+
+    def test_iterations_record_timing_and_tokens(self):
+        turns = iter(self._turns())
+        self.agent.client.chat.completions.create = Mock(side_effect=lambda **kwargs: self._stream(next(turns)))
+        content, metadata = self.agent.prove_claim("6 * 7 = 42")
+
+        self.assertEqual(metadata["iterations_used"], 2)
+        first, second = metadata["iterations"]
+        self.assertEqual([first["iteration"], second["iteration"]], [1, 2])
+        for record in (first, second):
+            self.assertLessEqual(record["ttft_seconds"], record["model_seconds"])
+            self.assertEqual((record["prompt_tokens"], record["completion_tokens"]), (10, 5))
+        self.assertEqual(first["tool_calls"], 1)
+        self.assertGreater(first["tool_wall_time"], 0)
+        self.assertEqual(second["tool_calls"], 0)
+        self.assertGreater(second["messages"], first["messages"])
+        self.assertGreater(second["messages_bytes"], first["messages_bytes"])
+
+        log_files = [f for f in os.listdir(self.tmpdir.name) if f.endswith(".json")]
+        with open(os.path.join(self.tmpdir.name, log_files[0]), "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["metadata"]["iterations"], metadata["iterations"])
+
+    def test_messages_bytes_reserializes_only_changed_messages(self):
+        session = ProofSession("claim")
+        session.messages = [{"role": "user", "content": "a" * 10}, {"role": "tool", "content": "b" * 100}]
+        self.assertEqual(session.messages_bytes(), len(json.dumps(session.messages)))
+        session.messages[1] = {"role": "tool", "content": "digest"}
+        session.messages.append({"role": "assistant", "content": "c"})
+        expected = len(json.dumps(session.messages))
+        with patch.object(proof_tool.json, "dumps", wraps=json.dumps) as dumps:
+            self.assertEqual(session.messages_bytes(), expected)
+        self.assertEqual(dumps.call_count, 2)
+        session.messages = []
+        self.assertEqual(session.messages_bytes(), len(json.dumps([])))
+
+    def test_async_streaming(self):
+        turns = iter(self._turns())
+
+        async def astream(chunks):
+            for chunk in chunks:
+                await asyncio.sleep(0)
+                yield chunk
+
+        async def create(**kwargs):
+            return astream(next(turns))
+
+        self.agent.async_client.chat.completions.create = create
+        content, metadata = asyncio.run(self.agent.aprove_claim("6 * 7 = 42"))
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual(metadata["tools_used"], ["python_execute"])
+        self.assertEqual(metadata["tokens"]["prompt"], 20)
+        for record in metadata["iterations"]:
+            self.assertLessEqual(record["ttft_seconds"], record["model_seconds"])
+
+    def _track_tools(self):
+        original = self.agent._run_limited_tool
+
+        def tracking(tool_call, session=None):
+            self.events.append(("start", tool_call["id"]))
+            outcome = original(tool_call, session)
+            self.events.append(("done", tool_call["id"]))
+            return outcome
+
+        self.agent._run_limited_tool = tracking
+
+    def _slow_call(self, call_id="p1"):
+        code = "import time\ntime.sleep(0.3)\nprint(1)"
+        return {"id": call_id, "function": {"name": "python_execute", "arguments": json.dumps({"code": code})}}
+
+    def test_failed_stream_joins_dispatched_tools(self):
+        chunks = self._chunks({"tool_calls": [self._slow_call()], "verdict": None, "reasoning": "x" * 200})[:-5]
+
+        def failing(**kwargs):
+            yield from self._stream(chunks)
+            raise RuntimeError("stream dropped")
+
+        self._track_tools()
+        self.agent.client.chat.completions.create = Mock(side_effect=failing)
+        content, metadata = self.agent.prove_claim("claim")
+        self.assertIn("stream dropped", content["error"])
+        self.assertEqual([e for e in self.events if isinstance(e, tuple)], [("start", "p1"), ("done", "p1")])
+
+    def test_verdict_joins_dispatched_tools(self):
+        turn = self._chunks({"tool_calls": [self._slow_call()], "verdict": "PROVEN", "reasoning": "x" * 200})
+        self._track_tools()
+        self.agent.client.chat.completions.create = Mock(return_value=self._stream(turn))
+        content, metadata = self.agent.prove_claim("claim")
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertIn(("done", "p1"), self.events)
+
+    def test_async_verdict_joins_dispatched_tools(self):
+        turn = self._chunks({"tool_calls": [self._slow_call()], "verdict": "PROVEN", "reasoning": "x" * 200})
+        self._track_tools()
+
+        async def astream(chunks):
+            for chunk in chunks:
+                await asyncio.sleep(0)
+                yield chunk
+
+        async def create(**kwargs):
+            return astream(turn)
+
+        self.agent.async_client.chat.completions.create = create
+        content, metadata = asyncio.run(self.agent.aprove_claim("claim"))
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertIn(("done", "p1"), self.events)
+
+    def test_non_object_tool_call_entries_keep_dispatch_aligned(self):
+        turns = iter([
+            self._chunks({"tool_calls": ["junk", {"id": "p1", "function": {
+                "name": "python_execute", "arguments": json.dumps({"code": "print(1)"}),
+            }}], "verdict": None}),
+            self._chunks({"verdict": "PROVEN"}),
+        ])
+        self._track_tools()
+        self.agent.client.chat.completions.create = Mock(side_effect=lambda **kwargs: self._stream(next(turns)))
+        content, metadata = self.agent.prove_claim("claim")
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual([e for e in self.events if isinstance(e, tuple)], [("start", "p1"), ("done", "p1")])
+
+
 class TestStripMarkdownCodeFences(unittest.TestCase):
     def test_strip_simple_fence(self):
         content = "```json\n{\"key\": \"value\"}\n```"
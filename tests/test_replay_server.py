@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from proof_tool import ProofTool, WebSearchTool
+from replay_server import ReplayServer, load_recordings
+from chat import ChatAgent
+from tests.helpers import ProofsDirTestCase
+
+
+CLAIM = "2025 is a perfect square"
+
+
+def _write_recording(directory):
+    search_call = {
+        "id": "s1",
+        "type": "function",
+        "function": {"name": "web_search", "arguments": json.dumps({"query": "is 2025 a square"})},
+    }
+    log_data = {
+        "proof_id": "rec1",
+        "claim": CLAIM,
+        "timestamp": "2025-01-01T00:00:00",
+        "events": [
+            {"type": "model_output", "content": {"claim": CLAIM, "tool_calls": [search_call], "verdict": None}},
+            {"type": "tool_result", "tool_name": "web_search", "tool_call_id": "s1", "duration": 1.0, "result": {
+                "query": "is 2025 a square",
+                "content": "2025 = 45^2",
+                "results": [{"title": "Squares", "url": "https://example.com/squares", "content": "45^2", "type": "citation"}],
+            }},
+            {"type": "model_output", "content": {"claim": CLAIM, "tool_calls": [], "verdict": "PROVEN", "reasoning": "45^2"}},
+        ],
+        "metadata": {},
+    }
+    with open(os.path.join(directory, "rec1.json"), "w", encoding="utf-8") as f:
+        json.dump(log_data, f)
+
+
+class TestReplayServer(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recordings_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.recordings_dir.cleanup)
+        _write_recording(self.recordings_dir.name)
+
+    def _server(self, **kwargs):
+        server = ReplayServer(proofs_path=self.recordings_dir.name, seed=0, **kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_load_recordings(self):
+        recordings, searches = load_recordings(self.recordings_dir.name)
+        self.assertEqual(len(recordings), 1)
+        self.assertEqual(len(recordings[0]["turns"]), 2)
+        self.assertEqual(searches["is 2025 a square"]["annotations"][0]["url_citation"]["url"], "https://example.com/squares")
+        self.assertEqual(load_recordings(os.path.join(self.recordings_dir.name, "missing")), ([], {}))
+
+    def test_prove_claim_replays_recording(self):
+        server = self._server(usage={"prompt_tokens": 100, "completion_tokens": 10})
+        tool = ProofTool("test_key", base_url=server.base_url)
+        content, metadata = tool.prove_claim(CLAIM)
+
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual(metadata["tokens"], {"prompt": 200, "completion": 20, "total": 220})
+        self.assertEqual(server.stats(), {"requests": 3, "proof_requests": 2, "search_requests": 1})
+
+        search = tool.tools["web_search"].search("is 2025 a square")
+        self.assertEqual(search["results"][0]["url"], "https://example.com/squares")
+
+    def test_streaming_and_async(self):
+        server = self._server()
+        tool = ProofTool("test_key", base_url=server.base_url)
+        content, _ = tool.prove_claim(CLAIM, stream=True)
+        self.assertEqual(content["verdict"], "PROVEN")
+        content, _ = asyncio.run(tool.aprove_claim("An unrecorded claim"))
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual(content["claim"], "An unrecorded claim")
+
+    def test_chat_agent(self):
+        server = self._server()
+        agent = ChatAgent("test_key", base_url=server.base_url)
+        result = agent.chat(CLAIM)
+        self.assertTrue(result["response"].startswith("Verdict: PROVEN"))
+        self.assertEqual(server.stats()["chat_requests"], 2)
+
+    def test_injected_latency_and_failures(self):
+        server = self._server(latency_seconds=0.05)
+        start = time.monotonic()
+        WebSearchTool("test_key", base_url=server.base_url).search("anything")
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(server.stats()["search_misses"], 1)
+
+        server = self._server(failure_rate=1.0, failure_status=503)
+        result = WebSearchTool("test_key", base_url=server.base_url, max_retries=1, backoff_base=0.0).search("q")
+        self.assertIn("503", result["error"])
+        self.assertEqual(result["retries"], 1)
+        self.assertEqual(server.stats()["failures"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import unittest
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from proof_tool import ProofTool
+from tests.helpers import ProofsDirTestCase, mock_completion
+from response_schema import (
+    RESPONSE_SCHEMA,
+    STRICT_RESPONSE_SCHEMA,
+    VERDICTS,
+    repair_json,
+    response_format,
+    validate,
+)
+
+PROMPT_PATH = os.path.join(os.path.dirname(__file__), '..', 'prompts', 'proof_prompt.md')
+
+
+FULL_RESPONSE = {
+    "claim": "2025 is a perfect square",
+    "current_step": "Final verdict",
+    "assumptions": [],
+    "tool_calls": [],
+    "evidence": [{
+        "source": "python_execute",
+        "content": "45 * 45 = 2025",
+        "quality_indicators": None,
+        "urls": None,
+    }],
+    "derivation": [{"step": 1, "principle": "Arithmetic", "calculation": "45^2", "evidence_used": ["python_execute"]}],
+    "falsifiable_test": "Compute 45 * 45",
+    "verdict": "PROVEN",
+    "reasoning": "45 squared is 2025",
+}
+
+
+class TestValidate(unittest.TestCase):
+    def test_full_response_is_valid(self):
+        self.assertEqual(validate(FULL_RESPONSE), [])
+
+    def test_errors(self):
+        response = dict(FULL_RESPONSE, verdict="TRUE", extra=1)
+        del response["reasoning"]
+        response["tool_calls"] = [{"id": "x", "type": "function", "name": "web_search"}]
+        errors = validate(response)
+        self.assertIn("$: missing required field 'reasoning'", errors)
+        self.assertIn("$: unexpected field 'extra'", errors)
+        self.assertTrue(any(e.startswith("$.verdict:") for e in errors))
+        self.assertIn("$.tool_calls[0]: missing required field 'function'", errors)
+
+    def test_verdict_excludes_tool_calls(self):
+        call = {"id": "x", "type": "function", "function": {"name": "web_search", "arguments": "{}"}}
+        errors = validate(dict(FULL_RESPONSE, tool_calls=[call]))
+        self.assertEqual(errors, ["$: tool_calls must be empty when verdict is set"])
+
+    def test_response_format(self):
+        self.assertEqual(response_format(False), {"type": "json_object"})
+        strict = response_format()
+        self.assertEqual(strict["type"], "json_schema")
+        self.assertTrue(strict["json_schema"]["strict"])
+        self.assertIs(strict["json_schema"]["schema"], STRICT_RESPONSE_SCHEMA)
+
+    def test_strict_schema_requires_every_field(self):
+        evidence = STRICT_RESPONSE_SCHEMA["properties"]["evidence"]["items"]
+        self.assertEqual(evidence["required"], ["source", "content", "quality_indicators", "urls"])
+        self.assertIn("null", evidence["properties"]["urls"]["type"])
+        indicators = evidence["properties"]["quality_indicators"]
+        self.assertEqual(len(indicators["required"]), 5)
+        self.assertEqual(validate(FULL_RESPONSE, STRICT_RESPONSE_SCHEMA), [])
+
+    def test_prompt_examples_are_valid(self):
+        with open(PROMPT_PATH, "r", encoding="utf-8") as f:
+            blocks = f.read().split("```json")[1:]
+        examples = []
+        for block in blocks:
+            try:
+                example = json.loads(block.split("```")[0])
+            except json.JSONDecodeError:
+                continue
+            if "claim" in example:
+                examples.append(example)
+        self.assertGreaterEqual(len(examples), 6)
+        for example in examples:
+            # The response templates use placeholders for the verdict and tool name.
+            if example["verdict"] not in VERDICTS + [None]:
+                example["verdict"] = VERDICTS[0]
+            for call in example["tool_calls"]:
+                if call["function"]["name"] == "tool_name":
+                    call["function"]["name"] = "web_search"
+            self.assertEqual(validate(example), [], example["current_step"])
+
+
+class TestRepairJSON(unittest.TestCase):
+    def test_stray_prose(self):
+        content = 'Here is my answer:\n{"verdict": "PROVEN", "note": "a } in a string"}\nHope this helps!'
+        self.assertEqual(repair_json(content), {"verdict": "PROVEN", "note": "a } in a string"})
+
+    def test_trailing_commas(self):
+        content = '{"assumptions": ["a", "b",], "evidence": [], "verdict": null,}'
+        self.assertEqual(repair_json(content), {"assumptions": ["a", "b"], "evidence": [], "verdict": None})
+
+    def test_truncated(self):
+        self.assertEqual(
+            repair_json('{"tool_calls": [{"id": "a", "function": {"name": "web_search"'),
+            {"tool_calls": [{"id": "a", "function": {"name": "web_search"}}]},
+        )
+        self.assertEqual(repair_json('{"verdict": null, "reasoning": "We need more'), {"verdict": None, "reasoning": "We need more"})
+        self.assertEqual(repair_json('{"verdict": null, "reasoning":'), {"verdict": None, "reasoning": None})
+        self.assertEqual(repair_json('{"verdict": null, "evidence": [1, 2], "reas'), {"verdict": None, "evidence": [1, 2]})
+
+    def test_truncated_enum_is_dropped_with_schema(self):
+        content = '{"claim": "c", "tool_calls": [], "verdict": "PRO'
+        self.assertEqual(repair_json(content), {"claim": "c", "tool_calls": [], "verdict": "PRO"})
+        self.assertEqual(repair_json(content, RESPONSE_SCHEMA), {"claim": "c", "tool_calls": []})
+        self.assertIsNone(repair_json('{"verdict": "PRO', RESPONSE_SCHEMA))
+
+    def test_unrepairable(self):
+        self.assertIsNone(repair_json("I cannot answer that."))
+        self.assertIsNone(repair_json(""))
+
+
+class TestProofToolStructuredOutput(ProofsDirTestCase):
+    def _script(self, agent, turns):
+        requests = []
+
+        def create(**kwargs):
+            requests.append(kwargs)
+            content = turns[len(requests) - 1]
+            return mock_completion(content)
+
+        agent.client.chat.completions.create = create
+        return requests
+
+    def test_strict_schema_is_opt_in(self):
+        agent = ProofTool("test_key")
+        self.assertFalse(agent.strict_schema)
+        self.assertEqual(agent._completion_request([])["response_format"], {"type": "json_object"})
+        agent = ProofTool("test_key", strict_schema=True)
+        self.assertEqual(agent._completion_request([])["response_format"]["type"], "json_schema")
+
+    def test_repaired_response_skips_reask(self):
+        agent = ProofTool("test_key", strict_schema=True)
+        truncated = json.dumps(FULL_RESPONSE)[:-10]
+        requests = self._script(agent, ["Sure:\n" + truncated])
+        content, metadata = agent.prove_claim("2025 is a perfect square")
+
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0]["response_format"]["type"], "json_schema")
+        self.assertEqual(content["verdict"], "PROVEN")
+        self.assertEqual(metadata["responses"]["repaired"], 1)
+        self.assertEqual(metadata["responses"]["repair_rate"], 1.0)
+        self.assertEqual(metadata["responses"]["failed"], 0)
+
+    def test_invalid_verdict_does_not_end_proof(self):
+        agent = ProofTool("test_key")
+        requests = self._script(agent, [
+            '{"verdict": "PRO', json.dumps({"verdict": "MAYBE"}), json.dumps({"verdict": "PROVEN"}),
+        ])
+        content, _ = agent.prove_claim("claim")
+        self.assertEqual(len(requests), 3)
+        self.assertEqual(content["verdict"], "PROVEN")
+
+    def test_failure_and_schema_counts(self):
+        agent = ProofTool("test_key")
+        self._script(agent, ["no json here", json.dumps({"verdict": "PROVEN"})])
+        _, metadata = agent.prove_claim("claim")
+
+        responses = metadata["responses"]
+        self.assertEqual(responses["total"], 2)
+        self.assertEqual(responses["failed"], 1)
+        self.assertEqual(responses["schema_invalid"], 1)
+        self.assertEqual(responses["failure_rate"], 0.5)
+        self.assertEqual(agent.response_stats()["total"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+import io
+import json
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import Mock, AsyncMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import tracing
+from proof_tool import ProofTool
+from tests.helpers import ProofsDirTestCase, mock_completion
+from tracing import HistogramAggregator, JSONLExporter, RecordingTracer, NOOP_SPAN
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(tracing.set_tracer, tracing.get_tracer())
+
+    def test_default_tracer_is_noop(self):
+        tracing.set_tracer(None)
+        with tracing.span("prove_claim", claim_chars=5) as span:
+            span.set_attribute("verdict", "PROVEN")
+            self.assertIs(span, NOOP_SPAN)
+            self.assertIs(tracing.current_span(), NOOP_SPAN)
+        func = lambda: None
+        self.assertIs(tracing.bind_context(func), func)
+
+    def test_spans_nest_and_record_errors(self):
+        histogram = HistogramAggregator()
+        stream = io.StringIO()
+        tracing.set_tracer(RecordingTracer(histogram, JSONLExporter(stream=stream)))
+
+        with tracing.span("outer") as outer:
+            with tracing.span("inner", size=3) as inner:
+                self.assertIs(tracing.current_span(), inner)
+            with self.assertRaises(ValueError):
+                with tracing.span("inner"):
+                    raise ValueError("boom")
+        self.assertIs(tracing.current_span(), NOOP_SPAN)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([r["name"] for r in records], ["inner", "inner", "outer"])
+        self.assertEqual(records[0]["parent_id"], outer.span_id)
+        self.assertEqual(records[0]["trace_id"], outer.span_id)
+        self.assertEqual(records[0]["attributes"], {"size": 3})
+        self.assertEqual(records[1]["attributes"]["error"], "ValueError: boom")
+        self.assertIsNone(records[2]["parent_id"])
+
+        summary = histogram.summary()
+        self.assertEqual(summary["inner"]["count"], 2)
+        self.assertLessEqual(summary["inner"]["p50"], summary["inner"]["p95"])
+        self.assertEqual(json.loads(histogram.dump())["outer"]["count"], 1)
+
+    def test_jsonl_exporter_appends_to_path(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "spans.jsonl")
+            exporter = JSONLExporter(path)
+            tracing.set_tracer(RecordingTracer(exporter))
+            with tracing.span("a"):
+                pass
+            exporter.close()
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(json.loads(f.readline())["name"], "a")
+
+
+class TestProofToolTracing(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(tracing.set_tracer, tracing.get_tracer())
+        self.spans = []
+        tracing.set_tracer(RecordingTracer(SimpleNamespace(export=self.spans.append)))
+        self.agent = ProofTool("test_key")
+        self.turns = [
+            json.dumps({
+                "tool_calls": [{
+                    "id": "c1",
+                    "function": {"name": "python_execute", "arguments": json.dumps({"code": "print(2 + 2)"})},
+                }],
+                "verdict": None,
+            }),
+            json.dumps({"verdict": "PROVEN"}),
+        ]
+
+    def _response(self, content):
+        return mock_completion(content, SimpleNamespace(
+            prompt_tokens=100, completion_tokens=20, prompt_tokens_details={"cached_tokens": 60}
+        ))
+
+    def _by_name(self, name):
+        return [span for span in self.spans if span.name == name]
+
+    def _assert_tree(self):
+        proof, = self._by_name("prove_claim")
+        iterations = self._by_name("iteration")
+        self.assertEqual([s.attributes["iteration"] for s in iterations], [1, 2])
+        self.assertTrue(all(s.parent_id == proof.span_id for s in iterations))
+
+        model_calls = self._by_name("model_call")
+        self.assertEqual({s.parent_id for s in model_calls}, {s.span_id for s in iterations})
+        self.assertEqual(model_calls[0].attributes["cached_tokens"], 60)
+
+        tool, = self._by_name("tool_call")
+        self.assertEqual(tool.trace_id, proof.span_id)
+        self.assertIn(tool.parent_id, {s.span_id for s in iterations})
+        self.assertEqual(tool.attributes["tool_name"], "python_execute")
+        self.assertGreater(tool.attributes["result_bytes"], 0)
+
+        self.assertTrue(self._by_name("log_write"))
+        self.assertTrue(all(s.trace_id == proof.span_id for s in self.spans))
+        self.assertEqual(proof.attributes["verdict"], "PROVEN")
+        self.assertEqual(proof.attributes["prompt_tokens"], 200)
+        self.assertEqual(proof.attributes["cached_tokens"], 120)
+
+    def test_prove_claim_emits_nested_spans(self):
+        self.agent.client.chat.completions.create = Mock(
+            side_effect=[self._response(turn) for turn in self.turns]
+        )
+        self.agent.prove_claim("2 + 2 = 4")
+        self._assert_tree()
+
+    def test_aprove_claim_emits_nested_spans(self):
+        self.agent.async_client.chat.completions.create = AsyncMock(
+            side_effect=[self._response(turn) for turn in self.turns]
+        )
+        asyncio.run(self.agent.aprove_claim("2 + 2 = 4"))
+        self._assert_tree()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import sys
+import os
+import json
+import time
+import tempfile
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import proof_tool
+from proof_tool import ProofTool, VerdictIndex, normalize_claim
+from tests.helpers import ProofsDirTestCase, mock_completion
+
+
+def _write_proof(directory, proof_id, claim, verdict, timestamp):
+    log_data = {
+        "proof_id": proof_id,
+        "claim": claim,
+        "timestamp": timestamp,
+        "events": [
+            {"type": "model_output", "content": {"tool_calls": [{"id": "x"}], "verdict": None}},
+            {"type": "model_output", "content": {"claim": claim, "verdict": verdict, "reasoning": "r"}},
+        ],
+        "metadata": {"timestamp": timestamp},
+    }
+    with open(os.path.join(directory, f"{proof_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(log_data, f)
+
+
+class TestVerdictIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_normalize_claim(self):
+        self.assertEqual(normalize_claim("  Donald Trump's   claim: 3.5% RISE!"), "donald trumps claim 3.5% rise")
+
+    def test_exact_and_near_lookup(self):
+        index = VerdictIndex()
+        index.add("p1", "The moon landing in 1969 was faked by NASA.", {"verdict": "DISPROVEN"})
+
+        hit = index.lookup("the moon landing in 1969 was faked by nasa")
+        self.assertEqual(hit["match"], "exact")
+        self.assertEqual(hit["proof_id"], "p1")
+        self.assertEqual(hit["verdict"], "DISPROVEN")
+        self.assertGreaterEqual(hit["age_seconds"], 0)
+
+        hit = index.lookup("The 1969 moon landing was faked by NASA")
+        self.assertEqual(hit["match"], "near")
+        self.assertGreaterEqual(hit["similarity"], 0.6)
+
+        self.assertIsNone(index.lookup("Drinking coffee causes cancer"))
+
+    def test_numbers_and_negation_must_match(self):
+        index = VerdictIndex(similarity_threshold=0.1)
+        index.add("p1", "2025 is a prime number", {"verdict": "DISPROVEN"})
+        index.add("p2", "Vaccines cause autism", {"verdict": "DISPROVEN"})
+        self.assertIsNone(index.lookup("2027 is a prime number"))
+        self.assertIsNone(index.lookup("Vaccines do not cause autism"))
+        self.assertEqual(index.lookup("Vaccines really cause autism")["proof_id"], "p2")
+
+    def test_ttl_depends_on_verdict(self):
+        index = VerdictIndex()
+        two_days_ago = time.time() - 2 * 86400
+        index.add("p1", "Claim one", {"verdict": "UNSUPPORTED"}, two_days_ago)
+        index.add("p2", "Claim two", {"verdict": "PROVEN"}, two_days_ago)
+        self.assertIsNone(index.lookup("Claim one"))
+        self.assertEqual(index.lookup("Claim two")["proof_id"], "p2")
+
+        index = VerdictIndex(ttl_seconds={"UNSUPPORTED": 3 * 86400})
+        index.add("p1", "Claim one", {"verdict": "UNSUPPORTED"}, two_days_ago)
+        self.assertIsNotNone(index.lookup("Claim one"))
+
+    def test_superseded_verdict_is_not_served_after_replacement_expires(self):
+        index = VerdictIndex()
+        now = time.time()
+        claim = "The Great Wall of China is visible from space."
+        index.add("old", claim, {"verdict": "DISPROVEN"}, created_at=now - 5 * 86400)
+        index.add("new", claim, {"verdict": "UNSUPPORTED"}, created_at=now - 2 * 86400)
+
+        self.assertIsNone(index.lookup(claim))
+        self.assertEqual(index.stats(), {"entries": 1, "claims": 1})
+        self.assertTrue(all("old" not in bucket for bucket in index._buckets.values()))
+
+    def test_load_directory(self):
+        now = proof_tool.datetime.now().isoformat()
+        _write_proof(self.tmpdir.name, "p1", "Water boils at 100C at sea level", "PROVEN", now)
+        _write_proof(self.tmpdir.name, "p2", "Unfinished claim", None, now)
+        with open(os.path.join(self.tmpdir.name, "broken.json"), "w") as f:
+            f.write("{")
+        index = VerdictIndex.from_directory(self.tmpdir.name)
+        self.assertEqual(index.stats()["entries"], 1)
+        self.assertEqual(index.lookup("water boils at 100C at sea level")["proof_id"], "p1")
+
+    def test_load_directory_skips_malformed_logs(self):
+        now = proof_tool.datetime.now().isoformat()
+        _write_proof(self.tmpdir.name, "p1", "Water boils at 100C at sea level", "PROVEN", now)
+        malformed = [
+            {"claim": "Bad events", "events": ["oops", None, {"type": "model_output", "content": {"verdict": "PROVEN"}}],
+             "metadata": "not a dict", "timestamp": now},
+            {"claim": "Events not a list", "events": {"type": "model_output"}, "timestamp": now},
+            {"claim": ["not", "a", "string"], "events": []},
+            ["not", "a", "log"],
+        ]
+        for i, log_data in enumerate(malformed):
+            with open(os.path.join(self.tmpdir.name, f"m{i}.json"), "w") as f:
+                json.dump(log_data, f)
+        index = VerdictIndex.from_directory(self.tmpdir.name)
+        self.assertEqual(index.stats()["entries"], 2)
+        self.assertEqual(index.lookup("Bad events")["verdict"], "PROVEN")
+
+
+class TestProofToolVerdictCache(ProofsDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = ProofTool("test_key", verdict_index=VerdictIndex())
+
+        response = mock_completion(json.dumps({"verdict": "DISPROVEN", "reasoning": "r"}))
+        self.agent.client.chat.completions.create = Mock(return_value=response)
+
+    def test_completed_proof_is_reused(self):
+        content, metadata = self.agent.prove_claim("The Earth is flat")
+        self.assertEqual(content["verdict"], "DISPROVEN")
+        self.assertNotIn("verdict_cache", metadata)
+
+        cached, metadata = self.agent.prove_claim("the earth is flat!")
+        self.assertEqual(cached, content)
+        self.assertEqual(metadata["verdict_cache"]["match"], "exact")
+        self.assertEqual(metadata["tokens"]["total"], 0)
+        self.assertEqual(self.agent.client.chat.completions.create.call_count, 1)
+
+        proof_ids = [name[:-5] for name in os.listdir(self.tmpdir.name) if name.endswith(".json")]
+        self.assertEqual([metadata["verdict_cache"]["proof_id"]], proof_ids)
+
+        self.agent.prove_claim("the earth is flat!", use_verdict_cache=False)
+        self.assertEqual(self.agent.client.chat.completions.create.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
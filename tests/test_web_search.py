@@ -1,10 +1,40 @@
 import unittest
 import sys
 import os
+import tempfile
+import time
+import json
+import asyncio
+from unittest.mock import Mock, AsyncMock, patch
+
+import requests
+from openai import APIConnectionError, APIStatusError
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from proof_tool import WebSearchTool, get_search_schema as get_tool_schema
+import proof_tool
+from proof_tool import WebSearchTool, SearchCache, normalize_query, get_search_schema as get_tool_schema
+
+
+def _response(status_code, data=None, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json = Mock(return_value=data)
+    return response
+
+
+SEARCH_DATA = {
+    "choices": [{
+        "message": {
+            "content": "results",
+            "annotations": [
+                {"type": "url_citation", "url_citation": {"url": "https://a.gov", "title": "A", "content": "a"}},
+                {"type": "url_citation", "url_citation": {"url": "https://b.gov", "title": "B", "content": "b"}},
+            ],
+        }
+    }]
+}
 
 
 class TestWebSearchTool(unittest.TestCase):
@@ -56,5 +86,174 @@ class TestWebSearchTool(unittest.TestCase):
         if result["results"]:
             self.assertLessEqual(len(result["results"]), 3)
 
+class TestWebSearchSession(unittest.TestCase):
+    def setUp(self):
+        self.session = Mock()
+        self.tool = WebSearchTool("key", session=self.session, backoff_base=0.01)
+        patcher = patch.object(proof_tool.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shared_session_is_pooled(self):
+        a = WebSearchTool("key_a")
+        b = WebSearchTool("key_b")
+        self.assertIs(a.session, b.session)
+        self.assertIsNot(a.session, WebSearchTool("key_c", pool_size=3).session)
+
+    def test_timeouts_passed_to_session(self):
+        self.session.post.return_value = _response(200, SEARCH_DATA)
+        tool = WebSearchTool("key", session=self.session, connect_timeout=2, read_timeout=30)
+        tool.search("q")
+        self.assertEqual(self.session.post.call_args.kwargs["timeout"], (2, 30))
+
+    def test_retries_on_5xx_and_reports_counts(self):
+        self.session.post.side_effect = [_response(503), _response(502), _response(200, SEARCH_DATA)]
+        result = self.tool.search("q", max_results=1)
+        self.assertNotIn("error", result)
+        self.assertEqual(result["retries"], 2)
+        self.assertIn("latency_seconds", result)
+        self.assertEqual(len(result["results"]), 1)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_honors_retry_after(self):
+        self.session.post.side_effect = [
+            _response(429, headers={"Retry-After": "7"}),
+            _response(200, SEARCH_DATA),
+        ]
+        result = self.tool.search("q")
+        self.assertEqual(result["retries"], 1)
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_gives_up_after_max_retries(self):
+        self.session.post.return_value = _response(500)
+        result = self.tool.search("q")
+        self.assertEqual(result["error"], "Search failed with status 500")
+        self.assertEqual(result["retries"], self.tool.max_retries)
+        self.assertEqual(self.session.post.call_count, self.tool.max_retries + 1)
+
+    def test_connection_errors_are_retried(self):
+        self.session.post.side_effect = requests.ConnectionError("reset")
+        result = self.tool.search("q")
+        self.assertIn("reset", result["error"])
+        self.assertEqual(result["retries"], self.tool.max_retries)
+
+    def test_client_errors_are_not_retried(self):
+        self.session.post.return_value = _response(401)
+        result = self.tool.search("q")
+        self.assertEqual(result["retries"], 0)
+        self.assertEqual(self.session.post.call_count, 1)
+
+
+def _status_error(status_code, headers=None):
+    return APIStatusError(
+        f"status {status_code}",
+        response=Mock(status_code=status_code, headers=headers or {}),
+        body=None,
+    )
+
+
+class TestAsyncWebSearch(unittest.TestCase):
+    def setUp(self):
+        self.tool = WebSearchTool("key", backoff_base=0.01)
+        self.create = AsyncMock()
+        self.tool._async_client = Mock()
+        self.tool._async_client.chat.completions.with_raw_response.create = self.create
+
+    def test_asearch_parses_results(self):
+        self.create.return_value = Mock(text=json.dumps(SEARCH_DATA))
+        result = asyncio.run(self.tool.asearch("test query", max_results=1))
+        self.assertEqual(result["content"], SEARCH_DATA["choices"][0]["message"]["content"])
+        self.assertEqual(len(result["results"]), 1)
+        self.assertEqual(result["retries"], 0)
+        self.assertEqual(self.create.call_args.kwargs["extra_body"], {"usage": {"include": True}})
+
+    def test_asearch_retries_transient_failures(self):
+        self.create.side_effect = [
+            _status_error(503),
+            APIConnectionError(request=Mock()),
+            Mock(text=json.dumps(SEARCH_DATA)),
+        ]
+        result = asyncio.run(self.tool.asearch("test query"))
+        self.assertNotIn("error", result)
+        self.assertEqual(result["retries"], 2)
+
+    def test_asearch_reports_status_error(self):
+        self.create.side_effect = _status_error(401)
+        result = asyncio.run(self.tool.asearch("test query"))
+        self.assertEqual(result["error"], "Search failed with status 401")
+        self.assertEqual(result["results"], [])
+        self.assertEqual(self.create.call_count, 1)
+
+    def test_asearch_gives_up_after_max_retries(self):
+        self.create.side_effect = APIConnectionError(request=Mock())
+        result = asyncio.run(self.tool.asearch("test query"))
+        self.assertIn("error", result)
+        self.assertEqual(result["retries"], self.tool.max_retries)
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = SearchCache(os.path.join(self.tmpdir.name, "cache.sqlite3"))
+        self.addCleanup(self.cache.close)
+        self.session = Mock()
+        self.session.post.return_value = _response(200, SEARCH_DATA)
+        self.tool = WebSearchTool("key", session=self.session, cache=self.cache)
+
+    def test_normalize_query(self):
+        self.assertEqual(
+            normalize_query('  Alkaline   WATER site:nih.gov OR site:gov -blog'),
+            normalize_query('alkaline water -blog site:gov OR site:nih.gov'),
+        )
+        self.assertEqual(
+            normalize_query('"Alkaline  Water" benefits OR effects'),
+            normalize_query('"alkaline water" effects OR benefits'),
+        )
+        self.assertNotEqual(normalize_query("water alkaline"), normalize_query("alkaline water"))
+
+    def test_hit_serves_any_max_results(self):
+        first = self.tool.search("alkaline water site:nih.gov OR site:gov", max_results=1)
+        self.assertFalse(first["cache_hit"])
+        self.assertEqual(len(first["results"]), 1)
+
+        second = self.tool.search("ALKALINE water site:gov OR site:nih.gov")
+        self.assertTrue(second["cache_hit"])
+        self.assertEqual(len(second["results"]), 2)
+        self.assertGreaterEqual(second["age_seconds"], 0)
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_errors_are_not_cached(self):
+        self.session.post.return_value = _response(401)
+        self.tool.search("q")
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_ttl_expiry(self):
+        self.cache.ttl_seconds = 60
+        self.cache.put("q", self.tool.model, {"content": "", "annotations": []})
+        with patch.object(proof_tool.time, "time", return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get("q", self.tool.model))
+
+    def test_lru_eviction(self):
+        self.cache.max_entries = 2
+        for q in ("a", "b"):
+            self.cache.put(q, "m", {"content": q, "annotations": []})
+            time.sleep(0.01)
+        self.assertIsNotNone(self.cache.get("a", "m"))
+        time.sleep(0.01)
+        self.cache.put("c", "m", {"content": "c", "annotations": []})
+        self.assertIsNotNone(self.cache.get("a", "m"))
+        self.assertIsNone(self.cache.get("b", "m"))
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    def test_size_eviction(self):
+        self.cache.max_bytes = 150
+        for q in ("a", "b", "c"):
+            self.cache.put(q, "m", {"content": q * 40, "annotations": []})
+            time.sleep(0.01)
+        self.assertLessEqual(self.cache.stats()["bytes"], 150)
+        self.assertIsNotNone(self.cache.get("c", "m"))
+
+
 if __name__ == '__main__':
     unittest.main()
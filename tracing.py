@@ -0,0 +1,198 @@
+import json
+import time
+import threading
+import itertools
+import contextvars
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class NoopSpan:
+    recording = False
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Span:
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        self.parent_id: Optional[int] = None
+        self.trace_id: Optional[int] = None
+        self.start_time = 0.0
+        self.start_perf = 0.0
+        self.duration = 0.0
+        self._token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.start_time = time.time()
+        self.start_perf = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self.start_perf
+        if exc is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        self.tracer.finish(self)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": round(self.duration, 6),
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    def span(self, name: str, **attributes: Any) -> NoopSpan:
+        return NOOP_SPAN
+
+    def finish(self, span: Span) -> None:
+        pass
+
+
+class RecordingTracer(Tracer):
+    def __init__(self, *exporters: Any):
+        self.exporters = list(exporters)
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        return Span(self, name, attributes)
+
+    def finish(self, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except (OSError, ValueError, TypeError):
+                pass
+
+
+class JSONLExporter:
+    def __init__(self, path: Optional[str] = None, stream: Optional[TextIO] = None):
+        self.path = path
+        self._file = stream if stream is not None else open(path, "a", encoding="utf-8")
+        self._owns_file = stream is None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._owns_file:
+                self._file.close()
+
+
+class HistogramAggregator:
+    def __init__(self):
+        self._durations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._durations.setdefault(span.name, []).append(span.duration)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+        summary = {}
+        for name, values in durations.items():
+            summary[name] = {
+                "count": len(values),
+                "p50": round(_percentile(values, 0.50), 6),
+                "p95": round(_percentile(values, 0.95), 6),
+                "max": round(values[-1], 6),
+                "total": round(sum(values), 6),
+            }
+        return summary
+
+    def dump(self, path: Optional[str] = None) -> str:
+        text = json.dumps(self.summary(), indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        return text
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+_tracer: Tracer = Tracer()
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Tracer:
+    global _tracer
+    previous = _tracer
+    _tracer = tracer if tracer is not None else Tracer()
+    return previous
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    return _tracer.span(name, **attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def bind_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    if type(_tracer) is Tracer:
+        return func
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return context.run(func, *args, **kwargs)
+
+    return run